@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from providers import env
+from providers.db import make_database_settings
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,11 +26,13 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "ninja",  # manage.py export_openapi_schema
     # Apps
     "core",
 ]
 
 MIDDLEWARE = [
+    "core.tracing.tracing_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -61,20 +64,29 @@ ASGI_APPLICATION = "app.asgi.application"
 
 # Database
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "HOST": env.db_host,
-        "PORT": env.db_port,
-        "NAME": env.db_name,
-        "USER": env.db_user,
-        "PASSWORD": env.db_password,
-    }
+    "default": make_database_settings(),
 }
 
 AUTH_USER_MODEL = "core.UserModel"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Cache
+if env.redis_cache_enabled:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": env.redis_cache_dsn,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,6 +124,6 @@ LOGGING = {
     },
     "root": {
         "handlers": ["console"],
-        "level": "INFO",
+        "level": env.log_level,
     },
 }
@@ -1,6 +1,11 @@
-from ninja import Router
+from asgiref.sync import sync_to_async
+from ninja import Query, Router
+from ninja.errors import HttpError
 
+from core.models.user import UserModel
+from core.response_cache import cached_response
 from core.typedefs import AuthedRequest
+from core.user_import import UserImportError, import_users, parse_rows
 
 from . import schemas
 
@@ -9,8 +14,91 @@ router = Router()
 
 
 @router.get("/me/", response=schemas.SUsersGetMeOut)
+@cached_response(ttl=60)
 async def get_me(request: AuthedRequest):
     return schemas.SUsersGetMeOut(
         tg_id=request.auth.tg_id,
         is_superuser=request.auth.is_superuser,
     )
+
+
+@router.post("/batch/", response=list[schemas.SUsersGetMeOut])
+async def get_many(request: AuthedRequest, payload: schemas.SUsersGetManyIn):
+    """
+    Пользователи по списку tg_id одним запросом.
+    create_missing: создать отсутствующих пользователей (одним bulk insert).
+    """
+    tg_ids = set(payload.tg_ids)
+    users = [
+        schemas.SUsersGetMeOut(**user)
+        async for user in UserModel.objects.filter(tg_id__in=tg_ids).values(
+            "tg_id",
+            "is_superuser",
+        )
+    ]
+
+    if payload.create_missing:
+        missing_tg_ids = tg_ids - {user.tg_id for user in users}
+        if missing_tg_ids:
+            await UserModel.objects.abulk_create(
+                [UserModel(tg_id=tg_id) for tg_id in missing_tg_ids],
+                ignore_conflicts=True,
+            )
+            users.extend(
+                schemas.SUsersGetMeOut(tg_id=tg_id, is_superuser=False) for tg_id in missing_tg_ids
+            )
+
+    return users
+
+
+@router.get("/", response=schemas.SUsersPageOut)
+async def list_users(
+    request: AuthedRequest,
+    after: int | None = None,
+    limit: int = Query(100, ge=1, le=schemas.USERS_PAGE_MAX_SIZE),
+):
+    """
+    Keyset-пагинация по tg_id: страница после указанного tg_id, без OFFSET.
+    """
+    if not request.auth.is_superuser:
+        raise HttpError(403, "Superuser required")
+
+    queryset = UserModel.objects.order_by("tg_id").values("tg_id", "is_superuser")
+    if after is not None:
+        queryset = queryset.filter(tg_id__gt=after)
+
+    items = [schemas.SUsersGetMeOut(**user) async for user in queryset[:limit]]
+    return schemas.SUsersPageOut(
+        items=items,
+        next_after=items[-1].tg_id if len(items) == limit else None,
+    )
+
+
+@router.post(
+    "/import/",
+    response=schemas.SUsersImportOut,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_users_stream(request: AuthedRequest):
+    """
+    Bulk upsert пользователей из тела запроса: CSV с заголовком (Content-Type: text/csv)
+    или NDJSON (application/x-ndjson). Тело читается построчно, не загружаясь в память целиком.
+    """
+    if not request.auth.is_superuser:
+        raise HttpError(403, "Superuser required")
+
+    format = "csv" if request.content_type == "text/csv" else "ndjson"
+    try:
+        result = await sync_to_async(import_users)(parse_rows(request, format))
+    except UserImportError as e:
+        raise HttpError(400, str(e))
+
+    return schemas.SUsersImportOut(rows=result.rows, seconds=round(result.seconds, 3))
@@ -1,6 +1,25 @@
-from ninja import Schema
+from ninja import Field, Schema
+
+
+USERS_BATCH_MAX_SIZE = 1000
+USERS_PAGE_MAX_SIZE = 1000
 
 
 class SUsersGetMeOut(Schema):
     tg_id: int
     is_superuser: bool
+
+
+class SUsersGetManyIn(Schema):
+    tg_ids: list[int] = Field(..., max_length=USERS_BATCH_MAX_SIZE)
+    create_missing: bool = False
+
+
+class SUsersPageOut(Schema):
+    items: list[SUsersGetMeOut]
+    next_after: int | None = Field(None, description="tg_id для запроса следующей страницы")
+
+
+class SUsersImportOut(Schema):
+    rows: int
+    seconds: float
@@ -0,0 +1,214 @@
+import atexit
+from datetime import datetime
+import threading
+from typing import Callable, Sequence
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.auth_cache import TTLCache
+from core.models.user import UserModel
+from providers import env
+from providers.logger import logger
+
+
+Touch = tuple[int, datetime]  # tg_id, время последнего запроса
+
+
+# ===============
+# Write
+# ===============
+
+
+def write_last_seen(touches: Sequence[Touch]) -> None:
+    """
+    last_seen пакета пользователей одним UPDATE.
+
+    Postgres: UPDATE ... FROM (VALUES ...), last_seen только увеличивается, поэтому
+    воркеры могут писать одних и тех же пользователей в любом порядке.
+    Другие СУБД (SQLite для локального запуска): executemany по строке в одной транзакции,
+    без этой проверки.
+    """
+    connection = connections[UserModel.objects.db]
+    table = connection.ops.quote_name(UserModel._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            values = ", ".join(["(%s::bigint, %s::timestamptz)"] * len(touches))
+            cursor.execute(
+                f"UPDATE {table} AS u SET last_seen = v.last_seen "
+                f"FROM (VALUES {values}) AS v (tg_id, last_seen) "
+                "WHERE u.tg_id = v.tg_id AND (u.last_seen IS NULL OR u.last_seen < v.last_seen)",
+                [param for touch in touches for param in touch],
+            )
+        else:
+            with transaction.atomic(using=connection.alias):
+                cursor.executemany(
+                    f"UPDATE {table} SET last_seen = %s WHERE tg_id = %s",
+                    [
+                        (connection.ops.adapt_datetimefield_value(seen), tg_id)
+                        for tg_id, seen in touches
+                    ],
+                )
+
+
+# ===============
+# Buffer
+# ===============
+
+
+class ActivityBuffer:
+    """
+    Буфер активности пользователей в памяти воркера с записью пакетами из фонового потока.
+
+    touch не обращается к БД: пользователь попадает в буфер не чаще раза в resolution секунд
+    (одна запись на пользователя в буфере, повторы в пределах resolution пропускаются),
+    буфер записывается раз в flush_interval секунд или сразу при накоплении batch_size
+    пользователей - не больше одного UPDATE строки пользователя на воркер за resolution.
+
+    Гарантии:
+    - last_seen отстает от последнего запроса не больше чем на resolution + flush_interval
+    - при штатной остановке процесса буфер записывается (atexit)
+    - при падении процесса теряются касания, не записанные за последний flush_interval
+    - при ошибке БД пакет возвращается в буфер и пишется следующей попыткой;
+      новые пользователи сверх max_size отбрасываются (счетчик dropped, предупреждение в лог)
+    """
+
+    def __init__(
+        self,
+        resolution: float,
+        flush_interval: float,
+        batch_size: int,
+        max_size: int,
+        writer: Callable[[Sequence[Touch]], None] = write_last_seen,
+    ) -> None:
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_size = max_size
+        self._writer = writer
+        self._pending: dict[int, datetime] = {}
+        # tg_id, принятые в буфер за последние resolution секунд
+        self._recent = TTLCache(max_size=max_size, ttl=resolution)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, tg_id: int) -> None:
+        key = str(tg_id)
+        if self._recent.get(key) is not None:
+            return
+
+        with self._lock:
+            if tg_id not in self._pending and len(self._pending) >= self._max_size:
+                self.dropped += 1
+                accepted = False
+            else:
+                self._pending[tg_id] = timezone.now()
+                accepted = True
+            full = len(self._pending) >= self._batch_size
+
+        if not accepted:
+            logger.warning(f"Activity buffer is full ({self._max_size}), touch dropped")
+            return
+
+        self._recent.set(key, True)
+        self._start_flusher()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Запись буфера пакетами по batch_size. Возвращает число записанных пользователей.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            # Одинаковый порядок блокировки строк у всех воркеров - без взаимных блокировок
+            touches = sorted(pending.items())
+
+            written = 0
+            try:
+                while written < len(touches):
+                    batch = touches[written : written + self._batch_size]
+                    self._writer(batch)
+                    written += len(batch)
+            except Exception:
+                # Поток записи не должен завершиться: пакет остается в буфере до следующей попытки
+                logger.exception(f"Activity flush failed, {len(touches) - written} touches kept")
+                self._requeue(touches[written:])
+            return written
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _requeue(self, touches: list[Touch]) -> None:
+        dropped: list[int] = []
+        with self._lock:
+            for tg_id, seen in touches:
+                current = self._pending.get(tg_id)
+                if current is not None:
+                    # Пока шла запись, пришло более позднее касание
+                    continue
+                if len(self._pending) >= self._max_size:
+                    dropped.append(tg_id)
+                    continue
+                self._pending[tg_id] = seen
+            self.dropped += len(dropped)
+
+        if not dropped:
+            return
+        # Отброшенные пользователи не ждут resolution: следующий запрос снова попадет в буфер
+        for tg_id in dropped:
+            self._recent.delete(str(tg_id))
+        logger.warning(
+            f"Activity buffer is full ({self._max_size}), {len(dropped)} requeued touches dropped"
+        )
+
+    def _start_flusher(self) -> None:
+        # Поток запускается при первом касании: в manage.py командах и до fork воркеров его нет
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="activity-flusher", daemon=True
+            )
+            self._flusher.start()
+        atexit.register(self.stop)
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.flush()
+            finally:
+                # Соединение потока возвращается в пул до следующей записи
+                connections.close_all()
+
+
+activity_buffer = ActivityBuffer(
+    resolution=env.activity_resolution,
+    flush_interval=env.activity_flush_interval,
+    batch_size=env.activity_flush_batch_size,
+    max_size=env.activity_buffer_max_size,
+)
+
+
+__all__ = (
+    "ActivityBuffer",
+    "activity_buffer",
+    "write_last_seen",
+)
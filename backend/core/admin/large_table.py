@@ -0,0 +1,195 @@
+import json
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from unfold.views import ChangeList
+
+
+AFTER_VAR = "after"
+
+# Ниже этого числа строк точный COUNT дешевле и полезнее оценки
+EXACT_COUNT_THRESHOLD = 10_000
+
+BIGINT_MAX = 2**63 - 1
+
+
+# ===============
+# Count
+# ===============
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """
+    Оценка числа строк планировщиком Postgres без обхода таблицы:
+    для запроса без фильтров - pg_class.reltuples, иначе - Plan Rows из EXPLAIN.
+    None на других СУБД и для таблицы, по которой еще не собрана статистика.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            estimate = cursor.fetchone()[0]
+            # -1: таблица еще не анализировалась
+            return estimate if estimate >= 0 else None
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator без полного COUNT(*) на больших таблицах: точное число строк
+    считается, только если оценка Postgres меньше EXACT_COUNT_THRESHOLD.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+# ===============
+# Keyset pagination
+# ===============
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist с keyset-пагинацией по полю model_admin.keyset_field: следующая страница
+    запрашивается как ?after=<значение последней строки>, без OFFSET.
+    Сортировка - только по этому полю (в любую сторону).
+    """
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(AFTER_VAR, None)
+        return params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Ссылки сортировки и фильтров открывают первую страницу
+        if not new_params or AFTER_VAR not in new_params:
+            remove = [*(remove or ()), AFTER_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_ordering(self, request, queryset):
+        # ?o= может сортировать по нескольким колонкам или по другому полю (?o=1.-0),
+        # keyset-пагинация возможна только по keyset_field - остальное отбрасывается
+        field = self.model_admin.keyset_field
+        for part in super().get_ordering(request, queryset):
+            if part in (field, f"-{field}"):
+                return [part]
+        return [field]
+
+    def get_ordering_field_columns(self):
+        # Стрелки сортировки в заголовках - по фактической сортировке, а не по ?o=
+        field = self.model_admin.keyset_field
+        descending = self.queryset.query.order_by[:1] == (f"-{field}",)
+        for index, name in enumerate(self.list_display):
+            if self.get_ordering_field(name) == field:
+                return {index: "desc" if descending else "asc"}
+        return {}
+
+    def get_results(self, request):
+        field = self.model_admin.keyset_field
+        try:
+            after = int(request.GET[AFTER_VAR]) if AFTER_VAR in request.GET else None
+        except ValueError:
+            raise IncorrectLookupParameters
+
+        queryset = self.queryset
+        if after is not None:
+            descending = queryset.query.order_by[:1] == (f"-{field}",)
+            queryset = queryset.filter(**{f"{field}__{'lt' if descending else 'gt'}": after})
+
+        self.result_list = queryset[: self.list_per_page]
+        rows = list(self.result_list)  # Кэширует результат в QuerySet
+        self.next_after = getattr(rows[-1], field) if len(rows) == self.list_per_page else None
+        self.after = after
+        self.first_page_url = self.get_query_string()
+        self.next_page_url = self.get_query_string({AFTER_VAR: self.next_after})
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = after is not None or self.next_after is not None
+
+
+class LargeTableAdminMixin:
+    """
+    Режим changelist для таблиц в миллионы строк: оценка числа строк вместо COUNT(*),
+    keyset-пагинация по keyset_field, поиск по точному значению или десятичному префиксу
+    целочисленного keyset_field (диапазоны по его индексу) и без подсчета фасетов.
+    """
+
+    keyset_field = "id"
+    change_list_template = "admin/core/large_table_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    search_help_text = "Число - поиск по префиксу, =число - точное совпадение"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_sortable_by(self, request):
+        return (self.keyset_field,)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        exact = search_term.startswith("=")
+        digits = search_term.removeprefix("=")
+        if not digits.isdigit() or int(digits) > BIGINT_MAX:
+            return queryset.none(), False
+
+        value = int(digits)
+        if exact:
+            return queryset.filter(**{self.keyset_field: value}), False
+        if digits != str(value):  # Ведущие нули: таких чисел нет
+            return queryset.none(), False
+        return queryset.filter(prefix_ranges(self.keyset_field, value)), False
+
+
+def prefix_ranges(field: str, prefix: int) -> Q:
+    """
+    Условие "десятичная запись field начинается с prefix" как OR диапазонов
+    [prefix * 10^k, (prefix + 1) * 10^k) для всех длин до bigint - каждый диапазон идет по индексу.
+    """
+    condition = Q(**{field: prefix})
+    scale = 10
+    while 0 < prefix * scale <= BIGINT_MAX:
+        upper = min((prefix + 1) * scale - 1, BIGINT_MAX)
+        condition |= Q(**{f"{field}__range": (prefix * scale, upper)})
+        scale *= 10
+    return condition
+
+
+__all__ = (
+    "AFTER_VAR",
+    "EstimatedCountPaginator",
+    "KeysetChangeList",
+    "LargeTableAdminMixin",
+    "estimate_count",
+    "prefix_ranges",
+)
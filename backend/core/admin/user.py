@@ -3,13 +3,25 @@ from unfold.admin import ModelAdmin
 
 from core.models.user import UserModel
 
+from .large_table import LargeTableAdminMixin
+
 
 @admin.register(UserModel)
-class UserModelAdmin(ModelAdmin):
+class UserModelAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = [
         "tg_id",
         "is_staff",
+        "is_superuser",
+        "last_seen",
+    ]
+    list_filter = [
+        "is_staff",
+        "is_superuser",
     ]
+    search_fields = ["tg_id"]
+    ordering = ["tg_id"]
+    keyset_field = "tg_id"
+    readonly_fields = ["last_seen"]
 
     exclude = [
         "password",
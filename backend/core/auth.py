@@ -1,10 +1,13 @@
-import hmac
-
 from django.http import HttpRequest
 from ninja.errors import AuthenticationError
 
+from core.activity import activity_buffer
+from core.auth_cache import principal_cache
 from core.models.user import UserModel
+from core.typedefs import UserSnapshot
 from providers import env
+from providers.signing import signer
+from providers.tracing import start_span
 
 
 # Helpers
@@ -26,27 +29,46 @@ def parse_auth_payload(auth_payload: str) -> tuple[str, str]:
 
 
 def generate_tg_id_sign(tg_id: str) -> str:
-    return hmac.new(
-        key=env.secret_key.encode(),
-        msg=str(tg_id).encode(),
-        digestmod="sha256",
-    ).hexdigest()
+    return signer.sign(tg_id)
 
 
 def is_valid_tg_id_sign(tg_id: str, tg_id_sign: str) -> bool:
-    real_tg_id_sign = generate_tg_id_sign(tg_id)
-    return hmac.compare_digest(real_tg_id_sign, tg_id_sign)
+    return signer.verify(tg_id, tg_id_sign)
+
+
+def make_auth_payload(tg_id: int | str) -> str:
+    return f"{tg_id}:{generate_tg_id_sign(str(tg_id))}"
+
+
+def invalidate_auth_cache(tg_id: int | str) -> None:
+    for tg_id_sign in signer.signatures(tg_id):
+        principal_cache.invalidate(f"{tg_id}:{tg_id_sign}")
 
 
 # Auth variants
 
 
-async def bot_auth(request: HttpRequest):
+async def bot_auth(request: HttpRequest) -> UserSnapshot:
+    with start_span("bot_auth") as span:
+        snapshot = await _bot_auth(request)
+        if env.activity_tracking_enabled:
+            activity_buffer.touch(snapshot.tg_id)
+        if span is not None:
+            span.set_attribute("tg_id", snapshot.tg_id)
+        return snapshot
+
+
+async def _bot_auth(request: HttpRequest) -> UserSnapshot:
     try:
         auth_payload = extract_auth_payload(request)
     except ValueError:
         raise AuthenticationError
 
+    if env.auth_cache_enabled:
+        snapshot = await principal_cache.aget(auth_payload)
+        if snapshot is not None:
+            return snapshot
+
     try:
         tg_id, tg_id_sign = parse_auth_payload(auth_payload)
     except ValueError:
@@ -57,7 +79,13 @@ async def bot_auth(request: HttpRequest):
         raise AuthenticationError
 
     user, _ = await UserModel.objects.aget_or_create(tg_id=tg_id)
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    if env.auth_cache_enabled:
+        await principal_cache.aset(auth_payload, snapshot)
+    return snapshot
 
 
-__all__ = ("bot_auth",)
+__all__ = (
+    "bot_auth",
+    "invalidate_auth_cache",
+)
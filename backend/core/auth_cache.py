@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import threading
+import time
+
+from django.core.cache import cache as shared_cache
+
+from core.typedefs import UserSnapshot
+from providers import env
+
+
+class TTLCache:
+    """
+    Потокобезопасный in-process LRU с TTL на запись.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> object | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: object) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class PrincipalCache:
+    """
+    Кэш проверенных пользователей по payload заголовка Authorization.
+
+    Ключ содержит подпись, поэтому попасть в кэш может только прошедший проверку payload.
+    Локальный уровень у других ASGI-воркеров может отставать от инвалидации не дольше TTL.
+    """
+
+    prefix = "auth_principal:"
+
+    def __init__(self, max_size: int, ttl: float, shared: bool) -> None:
+        self._local = TTLCache(max_size=max_size, ttl=ttl)
+        self._ttl = ttl
+        self._shared = shared
+
+    async def aget(self, auth_payload: str) -> UserSnapshot | None:
+        snapshot = self._local.get(auth_payload)
+        if snapshot is not None or not self._shared:
+            return snapshot  # type: ignore[return-value]
+
+        snapshot = await shared_cache.aget(self.prefix + auth_payload)
+        if snapshot is not None:
+            self._local.set(auth_payload, snapshot)
+        return snapshot
+
+    async def aset(self, auth_payload: str, snapshot: UserSnapshot) -> None:
+        self._local.set(auth_payload, snapshot)
+        if self._shared:
+            await shared_cache.aset(self.prefix + auth_payload, snapshot, timeout=self._ttl)
+
+    def invalidate(self, auth_payload: str) -> None:
+        self._local.delete(auth_payload)
+        if self._shared:
+            shared_cache.delete(self.prefix + auth_payload)
+
+
+principal_cache = PrincipalCache(
+    max_size=env.auth_cache_max_size,
+    ttl=env.auth_cache_ttl,
+    shared=env.redis_cache_enabled,
+)
+
+
+__all__ = (
+    "PrincipalCache",
+    "principal_cache",
+)
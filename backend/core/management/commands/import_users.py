@@ -0,0 +1,54 @@
+import sys
+from typing import BinaryIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.user_import import (
+    IMPORT_BATCH_SIZE,
+    ImportFormat,
+    UserImportError,
+    UserImportProgress,
+    import_users,
+    parse_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk upsert users from CSV (with header) or NDJSON: tg_id[, is_staff, is_superuser]"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="input file, '-' for stdin")
+        parser.add_argument(
+            "--format", choices=("csv", "ndjson"), default=None, help="by extension by default"
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, path: str, format: str | None, batch_size: int, **options):
+        if format is None:
+            format = "csv" if path.endswith(".csv") else "ndjson"
+
+        try:
+            if path == "-":
+                result = self._import(sys.stdin.buffer, format, batch_size)
+            else:
+                with open(path, "rb") as file:
+                    result = self._import(file, format, batch_size)
+        except UserImportError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.rows} rows in {result.seconds:.1f}s "
+                f"({result.rows_per_second * 60:.0f} rows/min)"
+            )
+        )
+
+    def _import(self, file: BinaryIO, format: ImportFormat, batch_size: int) -> UserImportProgress:
+        return import_users(
+            parse_rows(file, format),
+            batch_size=batch_size,
+            on_progress=self._print_progress,
+        )
+
+    def _print_progress(self, progress: UserImportProgress) -> None:
+        self.stdout.write(f"{progress.rows} rows, {progress.rows_per_second:.0f} rows/s")
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY: вне транзакции, без блокировки записи в таблицу пользователей
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="usermodel",
+            index=models.Index(
+                condition=models.Q(("is_staff", True)),
+                fields=["tg_id"],
+                name="core_user_staff_tg_id_idx",
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="usermodel",
+            index=models.Index(
+                condition=models.Q(("is_superuser", True)),
+                fields=["tg_id"],
+                name="core_user_superuser_tg_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # Nullable колонка без default добавляется без перезаписи таблицы, индекс - CONCURRENTLY
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("core", "0002_user_admin_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usermodel",
+            name="last_seen",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Последняя активность"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="usermodel",
+            index=models.Index(fields=["last_seen"], name="core_user_last_seen_idx"),
+        ),
+    ]
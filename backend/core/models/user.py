@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
@@ -25,6 +27,13 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
 
     is_staff: bool = models.BooleanField(default=False)  # type: ignore
 
+    # Пишется пакетами из core.activity, с точностью до ACTIVITY_RESOLUTION
+    last_seen: datetime | None = models.DateTimeField(
+        verbose_name="Последняя активность",
+        null=True,
+        blank=True,
+    )  # type: ignore
+
     USERNAME_FIELD = "tg_id"
 
     objects = CustomUserManager()
@@ -32,6 +41,21 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            # Фильтры админки: небольшая доля строк, в порядке keyset-пагинации по tg_id
+            models.Index(
+                fields=["tg_id"],
+                condition=models.Q(is_staff=True),
+                name="core_user_staff_tg_id_idx",
+            ),
+            models.Index(
+                fields=["tg_id"],
+                condition=models.Q(is_superuser=True),
+                name="core_user_superuser_tg_id_idx",
+            ),
+            # Сегменты по активности (рассылки, отчеты)
+            models.Index(fields=["last_seen"], name="core_user_last_seen_idx"),
+        ]
 
     def __str__(self):
         return f"Пользователь {self.tg_id}"
@@ -0,0 +1,103 @@
+from functools import wraps
+import hashlib
+from typing import Awaitable, Callable, Iterable
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from pydantic_core import to_json
+
+from core.typedefs import AuthedRequest
+
+
+TAG_VERSION_TTL = 60 * 60 * 24
+
+
+def _tag_key(tag: str) -> str:
+    return f"response_tag:{tag}"
+
+
+def user_tag(tg_id: int | str) -> str:
+    return f"user:{tg_id}"
+
+
+def _request_user_tags(request: AuthedRequest) -> tuple[str]:
+    return (user_tag(request.auth.tg_id),)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    Инвалидация всех закэшированных ответов с указанными тегами (смена версии тега).
+    """
+    cache.set_many({_tag_key(tag): uuid4().hex for tag in tags}, TAG_VERSION_TTL)
+
+
+def _is_shared_cache() -> bool:
+    # Версии тегов в памяти процесса: invalidate_tags в одном воркере
+    # не видна остальным, и они отдавали бы устаревшие ответы до истечения ttl
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def _make_entry_key(request: AuthedRequest) -> str:
+    query = urlencode(sorted(request.GET.items()))
+    return f"response:{request.auth.tg_id}:{request.path}?{query}"
+
+
+def _make_response(request: AuthedRequest, body: bytes, etag: str) -> HttpResponse:
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cached_response(
+    ttl: int,
+    tags: Callable[[AuthedRequest], Iterable[str]] = _request_user_tags,
+):
+    """
+    Кэш сериализованного ответа ninja-операции на пользователя + ETag / If-None-Match (304).
+
+    Запись хранит версии своих тегов и считается устаревшей, если версия любого тега
+    сменилась (invalidate_tags). По умолчанию ответ помечается тегом пользователя,
+    который сбрасывается при изменении UserModel.
+    Декоратор ставится под @router.get(...), операция должна возвращать pydantic-схему.
+
+    Кэш работает только с общим для процессов бэкендом (Redis, REDIS_CACHE_ENABLED);
+    с LocMemCache операция вызывается без кэша.
+    """
+
+    def decorator(view: Callable[..., Awaitable]):
+        @wraps(view)
+        async def wrapper(request: AuthedRequest, *args, **kwargs):
+            if not _is_shared_cache():
+                return await view(request, *args, **kwargs)
+
+            entry_key = _make_entry_key(request)
+            tag_keys = [_tag_key(tag) for tag in tags(request)]
+
+            cached = await cache.aget_many([entry_key, *tag_keys])
+            versions = [cached.get(tag_key) for tag_key in tag_keys]
+            entry = cached.get(entry_key)
+            if entry is not None and entry["versions"] == versions:
+                return _make_response(request, entry["body"], entry["etag"])
+
+            body = to_json(await view(request, *args, **kwargs))
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            await cache.aset(entry_key, {"body": body, "etag": etag, "versions": versions}, ttl)
+            return _make_response(request, body, etag)
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = (
+    "cached_response",
+    "invalidate_tags",
+    "user_tag",
+)
@@ -0,0 +1,24 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.auth import invalidate_auth_cache
+from core.models.user import UserModel
+from core.response_cache import invalidate_tags, user_tag
+from core.tracing import trace_query
+from providers import env
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def drop_cached_principal(sender, instance: UserModel, **kwargs):
+    # Сохранения из админки тоже проходят через save() и попадают сюда
+    invalidate_auth_cache(instance.tg_id)
+    invalidate_tags(user_tag(instance.tg_id))
+
+
+@receiver(connection_created)
+def install_query_tracing(sender, connection, **kwargs):
+    # Соединение создается (или берется из пула) на каждый запрос, wrapper ставится один раз
+    if env.tracing_enabled and trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query)
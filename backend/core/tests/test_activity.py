@@ -0,0 +1,151 @@
+import threading
+from typing import Sequence
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.activity import ActivityBuffer, Touch
+
+
+class StubWriter:
+    """
+    Writer вместо UPDATE: запоминает пакеты, первые fail_times вызовов падают.
+    """
+
+    def __init__(self, fail_times: int = 0) -> None:
+        self.batches: list[list[Touch]] = []
+        self.fail_times = fail_times
+        self.called = threading.Event()
+
+    def __call__(self, touches: Sequence[Touch]) -> None:
+        self.called.set()
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database is unavailable")
+        self.batches.append(list(touches))
+
+    @property
+    def written(self) -> list[int]:
+        return [tg_id for batch in self.batches for tg_id, _ in batch]
+
+
+class ActivityBufferTests(SimpleTestCase):
+    def make_buffer(self, writer: StubWriter, **kwargs: float) -> ActivityBuffer:
+        options = {"resolution": 60, "flush_interval": 60, "batch_size": 100, "max_size": 100}
+        buffer = ActivityBuffer(**{**options, **kwargs}, writer=writer)
+        self.addCleanup(buffer.stop)
+        return buffer
+
+    def test_touch_is_deduplicated_within_resolution(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer)
+
+        buffer.touch(1)
+        first_seen = buffer._pending[1]
+        buffer.touch(1)
+
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer._pending[1], first_seen)
+
+    def test_flush_by_interval(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer, flush_interval=0.05)
+
+        buffer.touch(1)
+
+        self.assertTrue(writer.called.wait(2))
+        self.assertEqual(writer.written, [1])
+
+    def test_flush_when_batch_is_full(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer, batch_size=2)
+
+        buffer.touch(1)
+        self.assertFalse(writer.called.wait(0.1))
+        buffer.touch(2)
+
+        self.assertTrue(writer.called.wait(2))
+        self.assertEqual(writer.written, [1, 2])
+
+    def test_flush_writes_sorted_batches(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer, batch_size=2)
+        buffer._pending = dict.fromkeys((3, 1, 2), None)  # type: ignore[arg-type]
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual([[tg_id for tg_id, _ in batch] for batch in writer.batches], [[1, 2], [3]])
+
+    def test_requeue_after_writer_error(self) -> None:
+        writer = StubWriter(fail_times=1)
+        buffer = self.make_buffer(writer)
+        buffer.touch(1)
+        buffer.touch(2)
+
+        with mock.patch("core.activity.logger") as logger:
+            self.assertEqual(buffer.flush(), 0)
+        self.assertIn("2 touches kept", logger.exception.call_args.args[0])
+        self.assertEqual(len(buffer), 2)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(writer.written, [1, 2])
+        self.assertEqual(len(buffer), 0)
+
+    def test_requeue_keeps_newer_touch(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer)
+        buffer.touch(1)
+        newer = buffer._pending[1]
+        older = newer.replace(year=newer.year - 1)
+
+        buffer._requeue([(1, older)])
+
+        self.assertEqual(buffer._pending[1], newer)
+
+    def test_overflow_drops_new_touches(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer, max_size=2)
+
+        buffer.touch(1)
+        buffer.touch(2)
+        with mock.patch("core.activity.logger") as logger:
+            buffer.touch(3)
+        logger.warning.assert_called_once()
+
+        self.assertEqual(buffer.dropped, 1)
+        self.assertEqual(sorted(buffer._pending), [1, 2])
+
+    def test_requeue_overflow_is_logged_and_forgotten(self) -> None:
+        writer = StubWriter(fail_times=1)
+        buffer = self.make_buffer(writer, max_size=2)
+        buffer.touch(1)
+        buffer.touch(2)
+
+        def touch_during_write(touches: Sequence[Touch]) -> None:
+            # Пока пакет пишется, буфер заполняют новые пользователи
+            buffer.touch(3)
+            buffer.touch(4)
+            writer(touches)
+
+        buffer._writer = touch_during_write
+        with mock.patch("core.activity.logger") as logger:
+            buffer.flush()
+
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual(sorted(buffer._pending), [3, 4])
+        self.assertIn("2 requeued touches dropped", logger.warning.call_args.args[0])
+
+        # Отброшенные пользователи снова принимаются, не дожидаясь resolution
+        buffer._writer = writer
+        buffer.flush()
+        buffer.touch(1)
+        self.assertEqual(sorted(buffer._pending), [1])
+
+    def test_flush_on_stop(self) -> None:
+        writer = StubWriter()
+        buffer = self.make_buffer(writer)
+        buffer.touch(1)
+
+        buffer.stop()
+
+        self.assertEqual(writer.written, [1])
+        self.assertFalse(buffer._flusher.is_alive())
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.response_cache import cached_response, invalidate_tags, user_tag
+
+
+SHARED_CACHES = {
+    "default": {
+        # Общий для процессов бэкенд без Redis
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/tmp/response-cache-tests",
+    }
+}
+
+
+class CachedResponseTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.calls = 0
+
+        @cached_response(ttl=60)
+        async def view(request):
+            self.calls += 1
+            return {"calls": self.calls}
+
+        self.view = view
+
+    def make_request(self, **headers: str):
+        request = RequestFactory().get("/api/users/me/", headers=headers)
+        request.auth = SimpleNamespace(tg_id=1)
+        return request
+
+    async def test_local_memory_cache_is_bypassed(self) -> None:
+        first = await self.view(self.make_request())
+        second = await self.view(self.make_request())
+
+        self.assertEqual((first, second), ({"calls": 1}, {"calls": 2}))
+
+    @override_settings(CACHES=SHARED_CACHES)
+    async def test_shared_cache_serves_etag_until_tag_is_invalidated(self) -> None:
+        await cache.aclear()
+        first = await self.view(self.make_request())
+        not_modified = await self.view(self.make_request(if_none_match=first["ETag"]))
+        invalidate_tags(user_tag(1))
+        fresh = await self.view(self.make_request())
+
+        self.assertEqual((first.status_code, not_modified.status_code), (200, 304))
+        self.assertEqual(fresh.content, b'{"calls":2}')
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,63 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+from providers.tracing import get_current_span, start_span
+
+
+def _span_name(request: HttpRequest) -> str:
+    # Шаблон пути вместо самого пути: имена span не зависят от параметров
+    match = request.resolver_match
+    route = match.route if match is not None else request.path
+    return f"{request.method} {route}"
+
+
+def _finish_span(span, request: HttpRequest, response: HttpResponse) -> None:
+    if span is None:
+        return
+    span.name = _span_name(request)
+    span.set_attribute("status_code", response.status_code)
+
+
+@sync_and_async_middleware
+def tracing_middleware(get_response):
+    """
+    Span на запрос, продолжающий трейс бота из заголовка traceparent.
+    Аутентификация, view и запросы к БД внутри становятся его дочерними span.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request: HttpRequest) -> HttpResponse:
+            with start_span(request.path, traceparent=request.headers.get("traceparent")) as span:
+                response = await get_response(request)
+                _finish_span(span, request, response)
+            return response
+
+        markcoroutinefunction(middleware)
+    else:
+
+        def middleware(request: HttpRequest) -> HttpResponse:
+            with start_span(request.path, traceparent=request.headers.get("traceparent")) as span:
+                response = get_response(request)
+                _finish_span(span, request, response)
+            return response
+
+    return middleware
+
+
+def trace_query(execute, sql, params, many, context):
+    """
+    Execute wrapper Django: span на SQL запрос внутри отобранного трейса.
+    """
+    span = get_current_span()
+    if span is None or not span.sampled:
+        return execute(sql, params, many, context)
+
+    with start_span("db.query", statement=sql, many=many):
+        return execute(sql, params, many, context)
+
+
+__all__ = (
+    "trace_query",
+    "tracing_middleware",
+)
@@ -1,7 +1,30 @@
+from dataclasses import dataclass
+
 from django.http.request import HttpRequest
 
 from core.models.user import UserModel
 
 
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """
+    Легковесный снимок пользователя для request.auth (кэшируется вместо инстанса модели).
+    """
+
+    id: int
+    tg_id: int
+    is_staff: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: UserModel) -> "UserSnapshot":
+        return cls(
+            id=user.pk,
+            tg_id=user.tg_id,
+            is_staff=user.is_staff,
+            is_superuser=user.is_superuser,
+        )
+
+
 class AuthedRequest(HttpRequest):
-    auth: UserModel
+    auth: UserSnapshot
@@ -0,0 +1,178 @@
+import codecs
+import csv
+from dataclasses import dataclass
+import itertools
+import json
+import time
+from typing import Callable, Iterable, Iterator, Literal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from core.auth import invalidate_auth_cache
+from core.models.user import UserModel
+from core.response_cache import invalidate_tags, user_tag
+
+
+ImportFormat = Literal["csv", "ndjson"]
+
+IMPORT_BATCH_SIZE = 5000
+# Поля, которые можно передать в импорте кроме tg_id; остальные колонки игнорируются
+IMPORT_UPDATE_FIELDS = ("is_staff", "is_superuser")
+
+
+class UserImportError(ValueError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+@dataclass
+class UserImportProgress:
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# ===============
+# Parsing
+# ===============
+
+
+def _parse_bool(value: object, line: int, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ("1", "true", "yes"):
+        return True
+    if normalized in ("", "0", "false", "no"):
+        return False
+    raise UserImportError(line, f"invalid boolean in {field}: {value!r}")
+
+
+def _parse_row(raw: dict, line: int) -> dict:
+    try:
+        tg_id = int(raw["tg_id"])
+    except KeyError:
+        raise UserImportError(line, "tg_id is required")
+    except (TypeError, ValueError):
+        raise UserImportError(line, f"invalid tg_id: {raw['tg_id']!r}")
+
+    row = {"tg_id": tg_id}
+    for field in IMPORT_UPDATE_FIELDS:
+        if field in raw:
+            row[field] = _parse_bool(raw[field], line, field)
+    return row
+
+
+def _iter_raw(lines: Iterable[bytes], format: ImportFormat) -> Iterator[tuple[int, dict]]:
+    if format == "csv":
+        reader = csv.DictReader(codecs.iterdecode(lines, "utf-8"))
+        for raw in reader:
+            yield reader.line_num, raw
+        return
+
+    for line, data in enumerate(lines, start=1):
+        if not data.strip():
+            continue
+        try:
+            raw = json.loads(data)
+        except ValueError:
+            raise UserImportError(line, "invalid JSON")
+        if not isinstance(raw, dict):
+            raise UserImportError(line, "JSON object expected")
+        yield line, raw
+
+
+def parse_rows(lines: Iterable[bytes], format: ImportFormat) -> Iterator[dict]:
+    """
+    Строки пользователей из потока байтов CSV (с заголовком) или NDJSON.
+    Поток читается построчно, файл целиком в память не загружается.
+    Все строки должны содержать тот же набор полей, что и первая.
+    """
+    fields = None
+    for line, raw in _iter_raw(lines, format):
+        row = _parse_row(raw, line)
+        if fields is None:
+            fields = row.keys()
+        elif row.keys() != fields:
+            raise UserImportError(line, f"expected fields: {', '.join(fields)}")
+        yield row
+
+
+# ===============
+# Import
+# ===============
+
+
+def _write_batch(batch: list[dict], update_fields: list[str]) -> None:
+    # Повтор tg_id в пакете: ON CONFLICT DO UPDATE не может изменить строку дважды
+    # в одном INSERT, поэтому остается последняя строка, как при построчной записи
+    batch = list({row["tg_id"]: row for row in batch}.values())
+    # Непригодный для входа пароль без вызова хешера; случайная часть после "!" не секретна,
+    # одно значение на пакет (генерация на каждую строку занимала больше половины времени импорта)
+    password = make_password(None)
+    users = [UserModel(password=password, **row) for row in batch]
+    with transaction.atomic():
+        if update_fields:
+            UserModel.objects.bulk_create(
+                users,
+                update_conflicts=True,
+                unique_fields=["tg_id"],
+                update_fields=update_fields,
+            )
+        else:
+            UserModel.objects.bulk_create(users, ignore_conflicts=True)
+
+    if update_fields:
+        # bulk_create не отправляет post_save: права пользователей сбрасываются в кэшах вручную
+        tg_ids = [row["tg_id"] for row in batch]
+        for tg_id in tg_ids:
+            invalidate_auth_cache(tg_id)
+        invalidate_tags(*(user_tag(tg_id) for tg_id in tg_ids))
+
+
+def import_users(
+    rows: Iterable[dict],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Callable[[UserImportProgress], None] | None = None,
+) -> UserImportProgress:
+    """
+    Upsert пользователей пакетами по batch_size строк, каждый пакет в своей транзакции.
+
+    Существующие пользователи (по tg_id) обновляются по полям из первой строки
+    (IMPORT_UPDATE_FIELDS), без таких полей - пропускаются. При ошибке уже записанные
+    пакеты остаются: импорт идемпотентен, его можно повторить после исправления файла.
+    """
+    started = time.perf_counter()
+    progress = UserImportProgress(rows=0, batches=0, seconds=0.0)
+    rows = iter(rows)
+    update_fields: list[str] | None = None
+
+    while batch := list(itertools.islice(rows, batch_size)):
+        if update_fields is None:
+            update_fields = [field for field in IMPORT_UPDATE_FIELDS if field in batch[0]]
+
+        _write_batch(batch, update_fields)
+        progress.rows += len(batch)
+        progress.batches += 1
+        progress.seconds = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(progress)
+
+    progress.seconds = time.perf_counter() - started
+    return progress
+
+
+__all__ = (
+    "IMPORT_BATCH_SIZE",
+    "ImportFormat",
+    "UserImportError",
+    "UserImportProgress",
+    "import_users",
+    "parse_rows",
+)
@@ -0,0 +1,68 @@
+from django.core.exceptions import ImproperlyConfigured
+
+from providers import env
+
+
+def make_database_settings() -> dict:
+    """
+    Настройки БД с пулом соединений psycopg3.
+
+    Async ORM выполняет запросы через sync_to_async: под ASGI у каждого запроса свой
+    поток, а у потока свое соединение. Без пула при CONN_MAX_AGE > 0 соединения
+    копятся вместе с потоками, поэтому при включенном пуле CONN_MAX_AGE должен быть 0,
+    а число одновременно работающих с БД запросов ограничивает DB_POOL_MAX_SIZE
+    (остальные ждут соединение не дольше DB_POOL_TIMEOUT).
+    Все воркеры gunicorn вместе не должны превышать DB_MAX_CONNECTIONS.
+
+    DB_ENGINE=sqlite - для локального запуска и бенчмарков без Postgres.
+    """
+    if env.db_engine == "sqlite":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": env.db_name,
+            "OPTIONS": {
+                # Параллельные запросы ASGI пишут в один файл: ждать блокировку, а не падать
+                "timeout": 20,
+                "transaction_mode": "IMMEDIATE",
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+            },
+        }
+    settings = {
+        "ENGINE": "django.db.backends.postgresql",
+        "HOST": env.db_host,
+        "PORT": env.db_port,
+        "NAME": env.db_name,
+        "USER": env.db_user,
+        "PASSWORD": env.db_password,
+        "CONN_MAX_AGE": env.db_conn_max_age,
+        "CONN_HEALTH_CHECKS": env.db_conn_health_checks,
+    }
+    if not env.db_pool_enabled:
+        return settings
+
+    if env.db_conn_max_age != 0:
+        raise ImproperlyConfigured("DB_CONN_MAX_AGE must be 0 when DB_POOL_ENABLED")
+    if env.db_pool_min_size > env.db_pool_max_size:
+        raise ImproperlyConfigured("DB_POOL_MIN_SIZE must not exceed DB_POOL_MAX_SIZE")
+    if env.web_concurrency * env.db_pool_max_size > env.db_max_connections:
+        raise ImproperlyConfigured(
+            f"WEB_CONCURRENCY * DB_POOL_MAX_SIZE ({env.web_concurrency * env.db_pool_max_size}) "
+            f"exceeds DB_MAX_CONNECTIONS ({env.db_max_connections})"
+        )
+
+    from psycopg_pool import ConnectionPool
+
+    settings["OPTIONS"] = {
+        "pool": {
+            "min_size": env.db_pool_min_size,
+            "max_size": env.db_pool_max_size,
+            "timeout": env.db_pool_timeout,
+            "max_idle": env.db_pool_max_idle,
+            # Проверка соединения перед выдачей из пула
+            "check": ConnectionPool.check_connection if env.db_conn_health_checks else None,
+        },
+    }
+    return settings
+
+
+__all__ = ("make_database_settings",)
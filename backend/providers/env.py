@@ -7,13 +7,63 @@ is_run_as_service = _env.bool("IS_RUN_AS_SERVICE", default=False)
 
 debug = _env.bool("DEBUG")
 secret_key = _env.str("SECRET_KEY")
+# Ключи подписи tg_id: первый основной, остальные принимаются при проверке (ротация)
+api_sign_keys = _env.list("API_SIGN_KEYS", default=[secret_key])
 
 if is_run_as_service:
     db_host = _env.str("DB_HOST")
+    redis_host = "redis"
 else:
     db_host = "localhost"
+    redis_host = "localhost"
 
+# postgresql | sqlite (DB_NAME - путь к файлу)
+db_engine = _env.str("DB_ENGINE", default="postgresql")
 db_port = _env.str("DB_PORT")
 db_name = _env.str("DB_NAME")
 db_user = _env.str("DB_USER")
 db_password = _env.str("DB_PASSWORD")
+db_conn_max_age = _env.int("DB_CONN_MAX_AGE", default=0)
+db_conn_health_checks = _env.bool("DB_CONN_HEALTH_CHECKS", default=True)
+db_max_connections = _env.int("DB_MAX_CONNECTIONS", default=100)  # max_connections в Postgres
+
+# Connection pool (psycopg3)
+db_pool_enabled = _env.bool("DB_POOL_ENABLED", default=True)
+db_pool_min_size = _env.int("DB_POOL_MIN_SIZE", default=2)
+db_pool_max_size = _env.int("DB_POOL_MAX_SIZE", default=20)
+db_pool_timeout = _env.float("DB_POOL_TIMEOUT", default=10.0)
+db_pool_max_idle = _env.float("DB_POOL_MAX_IDLE", default=600.0)
+
+web_concurrency = _env.int("WEB_CONCURRENCY", default=1)  # число воркеров gunicorn
+
+redis_password = _env.str("REDIS_PASSWORD")
+redis_cache_enabled = _env.bool("REDIS_CACHE_ENABLED", default=False)
+redis_cache_db = 2
+redis_cache_dsn = f"redis://:{redis_password}@{redis_host}:6379/{redis_cache_db}"
+
+# Auth principal cache
+auth_cache_enabled = _env.bool("AUTH_CACHE_ENABLED", default=True)
+auth_cache_max_size = _env.int("AUTH_CACHE_MAX_SIZE", default=10_000)
+auth_cache_ttl = _env.float("AUTH_CACHE_TTL", default=30.0)
+
+# User activity (last_seen), буфер в памяти воркера
+activity_tracking_enabled = _env.bool("ACTIVITY_TRACKING_ENABLED", default=True)
+activity_resolution = _env.float("ACTIVITY_RESOLUTION", default=60.0)  # сек. между записями
+activity_flush_interval = _env.float("ACTIVITY_FLUSH_INTERVAL", default=10.0)
+activity_flush_batch_size = _env.int("ACTIVITY_FLUSH_BATCH_SIZE", default=1000)  # строк в UPDATE
+activity_buffer_max_size = _env.int("ACTIVITY_BUFFER_MAX_SIZE", default=100_000)  # пользователей
+# Logging
+log_level = _env.str("LOG_LEVEL", default="INFO")
+log_format = _env.str("LOG_FORMAT", default="text")  # text | json
+log_sink = _env.str("LOG_SINK", default="stderr")  # stderr | путь к файлу | tcp://host:port
+log_batch_size = _env.int("LOG_BATCH_SIZE", default=500)
+log_flush_interval = _env.float("LOG_FLUSH_INTERVAL", default=0.5)
+# Не более LOG_REPEAT_BURST одинаковых предупреждений/ошибок с одного места за окно
+log_repeat_burst = _env.int("LOG_REPEAT_BURST", default=10)
+log_repeat_window = _env.float("LOG_REPEAT_WINDOW", default=60.0)
+
+# Tracing (W3C traceparent, общий трейс бота и бэкенда)
+tracing_enabled = _env.bool("TRACING_ENABLED", default=False)
+tracing_sample_rate = _env.float("TRACING_SAMPLE_RATE", default=0.01)  # доля новых трейсов
+tracing_exporter = _env.str("TRACING_EXPORTER", default="stdout")  # stdout | путь к файлу
+tracing_service_name = _env.str("TRACING_SERVICE_NAME", default="backend")
@@ -0,0 +1,60 @@
+from functools import lru_cache
+import hashlib
+import hmac
+from typing import Sequence
+
+from providers import env
+
+
+class HMACSigner:
+    """
+    Подпись tg_id через HMAC-SHA256.
+
+    Ключевое состояние HMAC считается один раз и копируется на каждую подпись,
+    подписи основным ключом мемоизируются в ограниченном LRU.
+    Первый ключ основной (им подписываем), остальные принимаются при проверке (ротация ключей).
+    """
+
+    def __init__(self, keys: Sequence[str], cache_size: int = 10_000) -> None:
+        if not keys:
+            raise ValueError("At least one signing key is required")
+
+        self._states = tuple(hmac.new(key.encode(), digestmod=hashlib.sha256) for key in keys)
+        self._sign_primary = lru_cache(maxsize=cache_size)(self._sign_primary_uncached)
+
+    @staticmethod
+    def _sign_with(state: "hmac.HMAC", tg_id: str) -> str:
+        signature = state.copy()
+        signature.update(tg_id.encode())
+        return signature.hexdigest()
+
+    def _sign_primary_uncached(self, tg_id: str) -> str:
+        return self._sign_with(self._states[0], tg_id)
+
+    def sign(self, tg_id: int | str) -> str:
+        return self._sign_primary(str(tg_id))
+
+    def signatures(self, tg_id: int | str) -> tuple[str, ...]:
+        """
+        Подписи всеми активными ключами.
+        """
+        tg_id = str(tg_id)
+        return (self.sign(tg_id), *(self._sign_with(state, tg_id) for state in self._states[1:]))
+
+    def verify(self, tg_id: int | str, signature: str) -> bool:
+        tg_id = str(tg_id)
+        if hmac.compare_digest(self.sign(tg_id), signature):
+            return True
+        return any(
+            hmac.compare_digest(self._sign_with(state, tg_id), signature)
+            for state in self._states[1:]
+        )
+
+
+signer = HMACSigner(env.api_sign_keys)
+
+
+__all__ = (
+    "HMACSigner",
+    "signer",
+)
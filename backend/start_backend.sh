@@ -9,4 +9,5 @@ done
 uv run manage.py collectstatic --noinput
 uv run python -m gunicorn app.asgi:application -k uvicorn_worker.UvicornWorker \
     --bind 0.0.0.0:8000 \
+    --workers "${WEB_CONCURRENCY:-1}" \
     --log-level info
\ No newline at end of file
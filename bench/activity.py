@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+FIRST_TG_ID = 1_000_000_000
+
+
+def setup_backend_env(database: str, workdir: Path) -> None:
+    # providers.env читает окружение при импорте, поэтому модули бэкенда импортируются после этого
+    os.environ.update(
+        {
+            "DEBUG": "False",
+            "SECRET_KEY": "bench-secret-key",
+            "REDIS_PASSWORD": "bench",
+            "REDIS_CACHE_ENABLED": "False",
+            "LOG_LEVEL": "WARNING",
+            "TRACING_ENABLED": "False",
+            "DJANGO_SETTINGS_MODULE": "app.settings",
+        }
+    )
+    if database == "sqlite":
+        os.environ.update(
+            {
+                "DB_ENGINE": "sqlite",
+                "DB_NAME": str(workdir / "bench.sqlite3"),
+                "DB_PORT": "0",
+                "DB_USER": "bench",
+                "DB_PASSWORD": "bench",
+            }
+        )
+    else:
+        # Локальный Postgres из DB_* окружения (.env)
+        os.environ["DB_ENGINE"] = "postgresql"
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import django
+
+    django.setup()
+
+
+def run(users: int, requests: int, batch_size: int) -> dict:
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from core.activity import ActivityBuffer, write_last_seen
+    from core.models.user import UserModel
+    from core.user_import import import_users
+
+    call_command("migrate", verbosity=0)
+    import_users({"tg_id": FIRST_TG_ID + index} for index in range(users))
+    # Запросы распределены по пользователям равномерно, у каждого requests / users запросов
+    tg_ids = [FIRST_TG_ID + index % users for index in range(requests)]
+
+    # Без буфера: UPDATE на каждый запрос
+    started = time.perf_counter()
+    for tg_id in tg_ids[: min(requests, 5000)]:
+        UserModel.objects.filter(tg_id=tg_id).update(last_seen=timezone.now())
+    update_per_request_us = (time.perf_counter() - started) / min(requests, 5000) * 1_000_000
+
+    # Буфер: касания в потоке запросов, запись пакетами из фонового потока
+    flushes: list[tuple[int, float]] = []
+
+    def writer(touches) -> None:
+        started = time.perf_counter()
+        write_last_seen(touches)
+        flushes.append((len(touches), time.perf_counter() - started))
+
+    buffer = ActivityBuffer(
+        resolution=3600,
+        flush_interval=3600,
+        batch_size=batch_size,
+        max_size=users,
+        writer=writer,
+    )
+    started = time.perf_counter()
+    for tg_id in tg_ids:
+        buffer.touch(tg_id)
+    touch_us = (time.perf_counter() - started) / requests * 1_000_000
+    buffer.stop()
+
+    written = sum(rows for rows, _ in flushes)
+    flush_seconds = sum(seconds for _, seconds in flushes)
+
+    return {
+        "users": users,
+        "requests": requests,
+        "update_per_request_us": round(update_per_request_us, 2),
+        "touch_us": round(touch_us, 2),
+        "flush": {
+            "rows": written,
+            "statements": len(flushes),
+            "seconds": round(flush_seconds, 3),
+            "rows_per_second": round(written / flush_seconds) if flush_seconds else None,
+        },
+        # Строк, записанных на запрос: буфер пишет пользователя один раз за resolution
+        "writes_per_request": round(written / requests, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="last_seen tracking: UPDATE per request vs buffered batched writes"
+    )
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-activity-") as workdir:
+        setup_backend_env(args.database, Path(workdir))
+        print(json.dumps(run(args.users, args.requests, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
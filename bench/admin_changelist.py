@@ -0,0 +1,151 @@
+import argparse
+from functools import partial
+import json
+import os
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+CHANGELIST_URL = "/admin/core/usermodel/"
+PAGE_SIZE = 100
+FIRST_TG_ID = 1_000_000_000
+ADMIN_TG_ID = 42
+
+
+def setup_backend_env(database: str, workdir: Path) -> None:
+    # providers.env читает окружение при импорте, поэтому модули бэкенда импортируются после этого
+    os.environ.update(
+        {
+            "DEBUG": "False",
+            "SECRET_KEY": "bench-secret-key",
+            "REDIS_PASSWORD": "bench",
+            "REDIS_CACHE_ENABLED": "False",
+            "LOG_LEVEL": "WARNING",
+            "TRACING_ENABLED": "False",
+            "DJANGO_SETTINGS_MODULE": "app.settings",
+        }
+    )
+    if database == "sqlite":
+        os.environ.update(
+            {
+                "DB_ENGINE": "sqlite",
+                "DB_NAME": str(workdir / "bench.sqlite3"),
+                "DB_PORT": "0",
+                "DB_USER": "bench",
+                "DB_PASSWORD": "bench",
+            }
+        )
+    else:
+        # Локальный Postgres из DB_* окружения (.env)
+        os.environ["DB_ENGINE"] = "postgresql"
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import django
+
+    django.setup()
+
+
+def seed(users: int) -> float:
+    """
+    Пользователи с последовательными tg_id, каждый сотый - is_staff. Возвращает секунды.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+
+    from core.user_import import import_users
+
+    call_command("migrate", verbosity=0)
+    rows = (
+        {"tg_id": FIRST_TG_ID + index, "is_staff": index % 100 == 0, "is_superuser": False}
+        for index in range(users)
+    )
+    progress = import_users(rows)
+    # Статистика для оценок планировщика (reltuples, EXPLAIN)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return progress.seconds
+
+
+def measure(call: Callable[[], object], repeat: int) -> dict[str, float]:
+    """
+    Медиана и максимум в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 2), "max_ms": round(max(timings), 2)}
+
+
+def run(users: int, repeat: int) -> dict:
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from core.models.user import UserModel
+
+    seed_seconds = seed(users)
+    admin = UserModel.objects.filter(tg_id=ADMIN_TG_ID).first()
+    if admin is None:
+        admin = UserModel.objects.create_superuser(tg_id=ADMIN_TG_ID, password=None)
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(admin)
+
+    middle = FIRST_TG_ID + users // 2
+    pages = {
+        "first_page": "",
+        "deep_page": f"?after={middle}",
+        "deep_page_desc": f"?o=-0&after={middle}",
+        "filter_is_staff": f"?is_staff__exact=1&after={middle}",
+        "search_prefix": f"?q={str(middle)[:-3]}",
+        "search_exact": f"?q=={middle}",
+    }
+
+    results: dict = {"users": users, "seed_seconds": round(seed_seconds, 2), "changelist": {}}
+    for name, query in pages.items():
+        url = CHANGELIST_URL + query
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+        # Счетчик до следующих запросов: request_started очищает журнал запросов соединения
+        query_count = len(queries)
+        results["changelist"][name] = {
+            **measure(partial(client.get, url), repeat),
+            "queries": query_count,
+        }
+
+    # Что changelist делал по умолчанию: COUNT(*) всей таблицы и OFFSET до страницы
+    offset = users // 2
+    queryset = UserModel.objects.order_by("tg_id")
+    results["default_costs"] = {
+        "count": measure(lambda: UserModel.objects.count(), repeat),
+        "offset_page": measure(lambda: list(queryset[offset : offset + PAGE_SIZE]), repeat),
+        "keyset_page": measure(lambda: list(queryset.filter(tg_id__gt=middle)[:PAGE_SIZE]), repeat),
+    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="User changelist render time on a large table: keyset pages vs COUNT/OFFSET"
+    )
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-admin-") as workdir:
+        setup_backend_env(args.database, Path(workdir))
+        print(json.dumps(run(args.users, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+ME_BODY = json.dumps({"tg_id": 1, "is_superuser": False}).encode()
+BATCH_BODY = json.dumps([{"tg_id": tg_id, "is_superuser": False} for tg_id in range(100)]).encode()
+
+
+def setup_bot_env() -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": "42:bench",
+        "SECRET_KEY": "bench-secret-key",
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": "http://backend/api",
+        "API_CACHE_REDIS": "False",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+class StubHTTPClient:
+    """
+    Вместо httpx.AsyncClient: готовый ответ без сети и транспорта httpx,
+    поэтому время вызова - это накладные расходы клиента и валидация ответа.
+    """
+
+    def __init__(self) -> None:
+        self._responses = {
+            path: httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+            for path, body in (("/users/me/", ME_BODY), ("/users/batch/", BATCH_BODY))
+        }
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return self._responses[url[url.index("/users/") :]]
+
+
+async def measure(call: Callable[[], Awaitable[Any]], calls: int) -> float:
+    """
+    Среднее время вызова в микросекундах.
+    """
+    for _ in range(min(calls, 200)):
+        await call()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+async def run(calls: int, rounds: int) -> dict[str, dict[str, float]]:
+    from core.generated_api import BaseUsersAPI, UsersGetMeOutDTO
+    from providers.api import APIClient, get_type_adapter
+
+    http_client = StubHTTPClient()
+    api_client = APIClient(tg_id=1, http_client=http_client)
+    users_api = BaseUsersAPI(api_client=api_client)
+    base_url = os.environ["API_BASE_URL"]
+    me_adapter = get_type_adapter(UsersGetMeOutDTO)
+    batch_adapter = get_type_adapter(list[UsersGetMeOutDTO])
+    tg_ids = list(range(100))
+
+    async def raw_me():
+        response = await http_client.request("GET", f"{base_url}/users/me/")
+        return me_adapter.validate_json(response.content)
+
+    async def raw_batch():
+        response = await http_client.request(
+            "POST",
+            f"{base_url}/users/batch/",
+            json={"tg_ids": tg_ids, "create_missing": False},
+        )
+        return batch_adapter.validate_json(response.content)
+
+    scenarios = {
+        "get_me": {
+            "raw": raw_me,
+            "generic": lambda: api_client.get("/users/me/", response_dto=UsersGetMeOutDTO),
+            "endpoint": users_api.get_me,
+        },
+        "get_many": {
+            "raw": raw_batch,
+            "generic": lambda: api_client.post(
+                "/users/batch/",
+                response_dto=list[UsersGetMeOutDTO],
+                json={"tg_ids": tg_ids, "create_missing": False},
+            ),
+            "endpoint": lambda: users_api.get_many(tg_ids),
+        },
+    }
+
+    results = {}
+    for scenario, variants in scenarios.items():
+        # Варианты чередуются по раундам, берется лучший раунд: меньше влияние шума
+        timings = dict.fromkeys(variants, float("inf"))
+        for _ in range(rounds):
+            for variant, call in variants.items():
+                timings[variant] = min(timings[variant], await measure(call, calls // rounds))
+        results[scenario] = {
+            **{f"{variant}_us": round(value, 2) for variant, value in timings.items()},
+            # Накладные расходы клиента сверх валидации ответа
+            "generic_overhead_us": round(timings["generic"] - timings["raw"], 2),
+            "endpoint_overhead_us": round(timings["endpoint"] - timings["raw"], 2),
+        }
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-call overhead: generic APIClient methods vs generated endpoint methods"
+    )
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_bot_env()
+    print(json.dumps(asyncio.run(run(args.calls, args.rounds)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
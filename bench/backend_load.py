@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+from typing import Any
+
+import httpx
+from pipeline import SECRET_KEY, Backend, free_port, git_commit, percentiles
+
+
+FIRST_TG_ID = 1_000_000
+
+# Окружение бэкенда для каждого варианта, остальное как в pipeline.Backend
+VARIANTS = {
+    "auth_cache": {"AUTH_CACHE_ENABLED": "True"},
+    "no_auth_cache": {"AUTH_CACHE_ENABLED": "False"},
+    # Соединения Postgres (только --database postgres), кэш авторизации выключен:
+    # каждый запрос идет в БД
+    "pool": {"AUTH_CACHE_ENABLED": "False", "DB_POOL_ENABLED": "True", "DB_CONN_MAX_AGE": "0"},
+    "no_pool": {"AUTH_CACHE_ENABLED": "False", "DB_POOL_ENABLED": "False", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {
+        "AUTH_CACHE_ENABLED": "False",
+        "DB_POOL_ENABLED": "False",
+        "DB_CONN_MAX_AGE": "60",
+    },
+}
+POSTGRES_VARIANTS = ("pool", "no_pool", "persistent")
+
+BATCH_SIZE = 50
+
+
+def auth_header(tg_id: int) -> str:
+    # Как подписывает бот: HMAC-SHA256 tg_id ключом SECRET_KEY
+    signature = hmac.new(SECRET_KEY.encode(), str(tg_id).encode(), hashlib.sha256).hexdigest()
+    return f"Bearer {tg_id}:{signature}"
+
+
+async def load(
+    port: int, endpoint: str, users: int, requests: int, concurrency: int, seed: int
+) -> dict[str, Any]:
+    """
+    Запросы к endpoint от users пользователей, не больше concurrency одновременно:
+    me - GET /api/users/me/, batch - POST /api/users/batch/ с BATCH_SIZE пользователями.
+    """
+    rnd = random.Random(seed)
+    tg_ids = [FIRST_TG_ID + rnd.randrange(users) for _ in range(requests)]
+    headers = {tg_id: {"Authorization": auth_header(tg_id)} for tg_id in set(tg_ids)}
+    url = f"http://127.0.0.1:{port}/api/users/{'me' if endpoint == 'me' else 'batch'}/"
+    batch = {
+        "tg_ids": [FIRST_TG_ID + tg_id for tg_id in range(min(users, BATCH_SIZE))],
+        "create_missing": True,
+    }
+
+    latency: list[float] = []
+    statuses: dict[str, int] = {}
+    queue = iter(tg_ids)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def worker() -> None:
+            for tg_id in queue:
+                started = time.perf_counter()
+                try:
+                    if endpoint == "me":
+                        response = await client.get(url, headers=headers[tg_id])
+                    else:
+                        response = await client.post(url, headers=headers[tg_id], json=batch)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latency.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(requests / elapsed, 1),
+        "statuses": statuses,
+        "latency_ms": percentiles(latency),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    results = {}
+    for variant in args.variants:
+        port = free_port()
+        with tempfile.TemporaryDirectory(prefix="bench-backend-") as workdir:
+            backend = Backend(
+                args.backend_python, port, args.database, Path(workdir), VARIANTS[variant]
+            )
+            backend.start()
+            try:
+                await backend.wait_ready()
+                # Прогрев: пользователи созданы, соединения и кэши заполнены
+                await load(
+                    port, args.endpoint, args.users, args.users * 2, args.concurrency, args.seed
+                )
+                results[variant] = await load(
+                    port, args.endpoint, args.users, args.requests, args.concurrency, args.seed + 1
+                )
+            finally:
+                backend.stop()
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "users": args.users,
+            "requests": args.requests,
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "database": args.database,
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Backend throughput on auth-protected endpoints per configuration"
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=tuple(VARIANTS),
+        default=["no_auth_cache", "auth_cache"],
+    )
+    parser.add_argument("--endpoint", choices=("me", "batch"), default="me")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--backend-python", default=sys.executable, help="python with backend deps")
+    args = parser.parse_args()
+    if args.database != "postgres" and set(args.variants) & set(POSTGRES_VARIANTS):
+        parser.error(f"{', '.join(POSTGRES_VARIANTS)} variants require --database postgres")
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
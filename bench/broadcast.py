@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+from collections import Counter
+import json
+import os
+from pathlib import Path
+import socket
+import sys
+import time
+from typing import Any
+
+from aiohttp import web
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+BOT_TOKEN = "42:bench"
+FIRST_TG_ID = 1_000_000
+
+
+def setup_bot_env(port: int, args: argparse.Namespace) -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": BOT_TOKEN,
+        "SECRET_KEY": "bench-secret-key",
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": f"http://127.0.0.1:{port}/api",
+        "API_CACHE_REDIS": "False",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+        "BROADCAST_RATE": str(args.rate),
+        "BROADCAST_PAGE_SIZE": str(args.page_size),
+        "BROADCAST_LEASE_TTL": str(args.lease_ttl),
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeTelegram:
+    """
+    Bot API (copyMessage) с флуд-лимитом Telegram и список пользователей бэкенда (/api/users/).
+
+    Сверх limit сообщений в секунду отвечает 429 с retry_after, каждый blocked_every-й
+    пользователь заблокировал бота (403). Доставки считаются по чатам: повторная
+    отправка одному чату видна в duplicates.
+    """
+
+    def __init__(self, users: int, limit: float, retry_after: int, blocked_every: int) -> None:
+        self.users = users
+        self.limit = limit
+        self.retry_after = retry_after
+        self.blocked_every = blocked_every
+        self.delivered: Counter[int] = Counter()
+        self.responses: Counter[int] = Counter()
+        self._window_started = time.monotonic()
+        self._window_count = 0
+        self._blocked_until = 0.0
+
+    def _over_limit(self) -> bool:
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return True
+        if now - self._window_started >= 1:
+            self._window_started, self._window_count = now, 0
+        self._window_count += 1
+        if self._window_count > self.limit:
+            self._blocked_until = now + self.retry_after
+            return True
+        return False
+
+    async def bot_api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+            return web.json_response({"ok": True, "result": result})
+
+        data = await request.post()
+        chat_id = int(data["chat_id"])
+        if self._over_limit():
+            self.responses[429] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+            )
+        if self.blocked_every and (chat_id - FIRST_TG_ID) % self.blocked_every == 0:
+            self.responses[403] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                },
+                status=403,
+            )
+
+        self.responses[200] += 1
+        self.delivered[chat_id] += 1
+        return web.json_response({"ok": True, "result": {"message_id": 1}})
+
+    async def users_page(self, request: web.Request) -> web.Response:
+        after = int(request.query.get("after", FIRST_TG_ID - 1))
+        limit = int(request.query.get("limit", 100))
+        first = max(after + 1, FIRST_TG_ID)
+        last = min(first + limit, FIRST_TG_ID + self.users)
+        items = [{"tg_id": tg_id, "is_superuser": False} for tg_id in range(first, last)]
+        next_after = items[-1]["tg_id"] if last < FIRST_TG_ID + self.users else None
+        return web.json_response({"items": items, "next_after": next_after})
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.bot_api)
+        app.router.add_get("/api/users/", self.users_page)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    port = free_port()
+    setup_bot_env(port, args)
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from httpx import AsyncClient
+    from redis.asyncio import Redis
+
+    from contexts.broadcasts.engine import Broadcaster
+    from providers import env
+    from providers.cache import ResponseCache
+    from providers.resilience import APIResilience
+
+    fake = FakeTelegram(args.users, args.telegram_limit, args.retry_after, args.blocked_every)
+    runner = await fake.start(port)
+    redis = Redis.from_url(args.redis_url)
+    http_client = AsyncClient()
+    bots: list[Bot] = []
+
+    def make_broadcaster() -> Broadcaster:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}"))
+        bot = Bot(token=BOT_TOKEN, session=session)
+        bots.append(bot)
+        return Broadcaster(
+            bot=bot,
+            redis=redis,
+            http_client=http_client,
+            response_cache=ResponseCache(max_size=1000),
+            resilience=APIResilience(
+                max_concurrency=env.api_max_concurrency,
+                acquire_timeout=env.api_acquire_timeout,
+                failure_threshold=env.api_circuit_failure_threshold,
+                recovery_timeout=env.api_circuit_recovery_timeout,
+                retries=env.api_retries,
+                backoff_base=env.api_backoff_base,
+                backoff_max=env.api_backoff_max,
+                hedge_delay=env.api_hedge_delay,
+            ),
+        )
+
+    async def wait_done(broadcaster: Broadcaster, job_id: str) -> Any:
+        while True:
+            job = await broadcaster.get_job(job_id)
+            if job is not None and job.status != "running":
+                return job
+            await asyncio.sleep(0.2)
+
+    try:
+        broadcaster = make_broadcaster()
+        started = time.perf_counter()
+        job = await broadcaster.start(admin_tg_id=1, from_chat_id=1, message_id=1)
+
+        if args.restart_after:
+            # Остановка процесса посреди рассылки: задачу подхватывает supervisor другого процесса
+            await asyncio.sleep(args.restart_after)
+            await broadcaster.stop()
+            broadcaster = make_broadcaster()
+            broadcaster.run_supervisor()
+
+        job = await wait_done(broadcaster, job.id)
+        elapsed = time.perf_counter() - started
+        await broadcaster.stop()
+    finally:
+        for bot in bots:
+            await bot.session.close()
+        await http_client.aclose()
+        await redis.aclose()
+        await runner.cleanup()
+
+    duplicates = sum(count - 1 for count in fake.delivered.values() if count > 1)
+    return {
+        "config": {
+            "users": args.users,
+            "rate": args.rate,
+            "telegram_limit": args.telegram_limit,
+            "page_size": args.page_size,
+            "restart_after": args.restart_after,
+        },
+        "status": job.status,
+        "seconds": round(elapsed, 2),
+        "messages_per_second": round(job.sent / elapsed, 1),
+        "job": {"sent": job.sent, "blocked": job.blocked, "failed": job.failed},
+        "telegram_responses": {str(code): count for code, count in sorted(fake.responses.items())},
+        "delivered_chats": len(fake.delivered),
+        "missed_chats": args.users - len(fake.delivered) - job.blocked,
+        "duplicates": duplicates,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Broadcast against a fake Bot API with flood limits (429 RetryAfter)"
+    )
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--rate", type=float, default=50, help="BROADCAST_RATE, messages/sec")
+    parser.add_argument("--telegram-limit", type=float, default=30, help="fake 429 over this rate")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument(
+        "--blocked-every", type=int, default=50, help="every Nth user blocked the bot"
+    )
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--lease-ttl", type=int, default=30)
+    parser.add_argument("--restart-after", type=float, default=0, help="seconds, 0 - no restart")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
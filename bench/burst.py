@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import resource
+import sys
+import tempfile
+import time
+from typing import Any
+
+from pipeline import (
+    BOT_TOKEN,
+    Backend,
+    FakeBotAPI,
+    free_port,
+    generate_updates,
+    git_commit,
+    percentiles,
+    setup_bot_env,
+)
+
+
+MODES = ("unbounded", "scheduler")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux - килобайты
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# ===============
+# Bot (дочерний процесс: пиковый RSS у каждого режима свой)
+# ===============
+
+
+async def run_burst(args: argparse.Namespace) -> dict[str, Any]:
+    setup_bot_env(args.backend_port)
+    # Span бота не нужны, меряется только обработка
+    os.environ["TRACING_ENABLED"] = "False"
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.types import Update
+
+    from app.run_bot import build_dispatcher
+    from app.update_scheduler import UpdateScheduler
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.api_port}"))
+    bot = Bot(token=BOT_TOKEN, session=session)
+    dp = build_dispatcher(MemoryStorage())
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+
+    # Апдейты разобраны заранее: в пиковый RSS входит только их обработка
+    updates = [
+        Update.model_validate(raw, context={"bot": bot})
+        for raw in generate_updates(args.updates, args.users, args.start_share, args.seed)
+    ]
+    rss_before = peak_rss_mb()
+
+    latency: list[float] = []
+    failed = 0
+    in_flight = peak_in_flight = 0
+
+    async def process(update: Update) -> None:
+        nonlocal failed, in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            failed += 1
+        finally:
+            in_flight -= 1
+            # Все апдейты пришли в момент started: задержка включает ожидание в очереди
+            latency.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        if args.mode == "unbounded":
+            # Как dp.start_polling: задача на каждый апдейт
+            tasks = [asyncio.create_task(process(update)) for update in updates]
+            await asyncio.gather(*tasks)
+        else:
+            scheduler = UpdateScheduler(
+                process,
+                max_concurrency=args.max_concurrency,
+                max_queue=args.max_queue,
+                overflow=args.overflow,
+            )
+            for update in updates:
+                await scheduler.submit(update)
+            await scheduler.drain(timeout=3600)
+        elapsed = time.perf_counter() - started
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+
+    return {
+        "mode": args.mode,
+        "seconds": round(elapsed, 2),
+        "processed": len(latency) - failed,
+        "failed": failed,
+        # Отброшены политикой drop_new / drop_oldest
+        "dropped": len(updates) - len(latency),
+        "peak_in_flight": peak_in_flight,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "latency_ms": percentiles(latency),
+    }
+
+
+# ===============
+# Orchestration
+# ===============
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api_port, backend_port = free_port(), free_port()
+    fake_api = FakeBotAPI()
+    api_runner = await fake_api.start(api_port)
+
+    child_args = [
+        f"--updates={args.updates}",
+        f"--users={args.users}",
+        f"--start-share={args.start_share}",
+        f"--seed={args.seed}",
+        f"--max-concurrency={args.max_concurrency}",
+        f"--max-queue={args.max_queue}",
+        f"--overflow={args.overflow}",
+        f"--api-port={api_port}",
+        f"--backend-port={backend_port}",
+    ]
+    modes = MODES if args.mode == "both" else (args.mode,)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = Backend(args.backend_python, backend_port, args.database, Path(workdir))
+        backend.start()
+        try:
+            await backend.wait_ready()
+            for mode in modes:
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    f"--mode={mode}",
+                    *child_args,
+                    stdout=asyncio.subprocess.PIPE,
+                )
+                stdout, _ = await process.communicate()
+                if process.returncode != 0:
+                    raise RuntimeError(f"{mode} run failed with code {process.returncode}")
+                results[mode] = json.loads(stdout)
+        finally:
+            backend.stop()
+            await api_runner.cleanup()
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "updates": args.updates,
+            "users": args.users,
+            "max_concurrency": args.max_concurrency,
+            "max_queue": args.max_queue,
+            "overflow": args.overflow,
+            "database": args.database,
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Synthetic burst: task per update (start_polling) vs UpdateScheduler"
+    )
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both")
+    parser.add_argument("--updates", type=int, default=10_000, help="updates arriving at once")
+    parser.add_argument("--users", type=int, default=2000, help="distinct users (chats)")
+    parser.add_argument("--start-share", type=float, default=0.5, help="share of /start messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=100)
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--overflow", choices=("block", "drop_new", "drop_oldest"), default="block")
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--backend-python", default=sys.executable, help="python with backend deps")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--api-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_burst(args))))
+        return
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
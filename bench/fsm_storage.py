@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Any
+
+from pipeline import (
+    BOT_TOKEN,
+    Backend,
+    FakeBotAPI,
+    free_port,
+    generate_updates,
+    git_commit,
+    setup_bot_env,
+)
+
+
+VARIANTS = ("redis", "hybrid", "hybrid_write_behind")
+
+
+# ===============
+# Bot (дочерний процесс на вариант: роутеры подключаются к одному диспетчеру)
+# ===============
+
+
+async def run_variant(args: argparse.Namespace) -> dict[str, Any]:
+    setup_bot_env(args.backend_port)
+    # Span бота не нужны, меряются только команды Redis
+    os.environ["TRACING_ENABLED"] = "False"
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.fsm.storage.base import BaseStorage
+    from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+    from aiogram.types import Update
+    from redis.asyncio import Connection, Redis
+
+    from app.run_bot import build_dispatcher
+    from providers.fsm_storage import HybridStorage
+
+    class CountingConnection(Connection):
+        """
+        Round-trip - отправка пакета команд (одна команда или pipeline целиком).
+        """
+
+        roundtrips = 0
+        commands = 0
+
+        async def send_packed_command(self, command, check_health=True) -> None:
+            CountingConnection.roundtrips += 1
+            await super().send_packed_command(command, check_health)
+
+        def pack_command(self, *args):
+            CountingConnection.commands += 1
+            return super().pack_command(*args)
+
+    redis = Redis.from_url(args.redis_url, connection_class=CountingConnection)
+    await redis.flushdb()
+    # Как в run_bot.py
+    redis_storage = RedisStorage(redis, key_builder=DefaultKeyBuilder(with_destiny=True))
+    storage: BaseStorage = redis_storage
+    if args.variant != "redis":
+        storage = HybridStorage(
+            redis_storage,
+            max_size=args.cache_size,
+            write_behind=args.variant == "hybrid_write_behind",
+            flush_interval=args.flush_interval,
+        )
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.api_port}"))
+    bot = Bot(token=BOT_TOKEN, session=session)
+    dp = build_dispatcher(storage)
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+
+    updates = [
+        Update.model_validate(raw, context={"bot": bot})
+        for raw in generate_updates(
+            args.warmup + args.updates, args.users, args.start_share, args.seed
+        )
+    ]
+
+    async def feed(batch: list[Update]) -> None:
+        queue: asyncio.Queue[Update] = asyncio.Queue()
+        for update in batch:
+            queue.put_nowait(update)
+
+        async def worker() -> None:
+            while not queue.empty():
+                await dp.feed_update(bot, queue.get_nowait())
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    try:
+        # Прогрев: соединения, первые импорты; кэш гибридного хранилища заполняется
+        await feed(updates[: args.warmup])
+        CountingConnection.roundtrips = CountingConnection.commands = 0
+
+        started = time.perf_counter()
+        await feed(updates[args.warmup :])
+        elapsed = time.perf_counter() - started
+    finally:
+        # Закрытие хранилища записывает отложенные изменения: они входят в счетчики
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await storage.close()
+        await bot.session.close()
+
+    return {
+        "seconds": round(elapsed, 2),
+        "updates_per_second": round(args.updates / elapsed, 1),
+        "redis_roundtrips": CountingConnection.roundtrips,
+        "redis_commands": CountingConnection.commands,
+        "roundtrips_per_update": round(CountingConnection.roundtrips / args.updates, 2),
+        "commands_per_update": round(CountingConnection.commands / args.updates, 2),
+    }
+
+
+# ===============
+# Runner
+# ===============
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api_port, backend_port = free_port(), free_port()
+    fake_api = FakeBotAPI()
+    api_runner = await fake_api.start(api_port)
+
+    child_args = [
+        f"--updates={args.updates}",
+        f"--warmup={args.warmup}",
+        f"--users={args.users}",
+        f"--start-share={args.start_share}",
+        f"--seed={args.seed}",
+        f"--concurrency={args.concurrency}",
+        f"--cache-size={args.cache_size}",
+        f"--flush-interval={args.flush_interval}",
+        f"--redis-url={args.redis_url}",
+        f"--api-port={api_port}",
+        f"--backend-port={backend_port}",
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-fsm-") as workdir:
+        backend = Backend(args.backend_python, backend_port, args.database, Path(workdir))
+        backend.start()
+        try:
+            await backend.wait_ready()
+            for variant in args.variants:
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    f"--variant={variant}",
+                    *child_args,
+                    stdout=asyncio.subprocess.PIPE,
+                )
+                stdout, _ = await process.communicate()
+                if process.returncode != 0:
+                    raise RuntimeError(f"{variant} run failed with code {process.returncode}")
+                results[variant] = json.loads(stdout)
+        finally:
+            backend.stop()
+            await api_runner.cleanup()
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "updates": args.updates,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "cache_size": args.cache_size,
+            "flush_interval": args.flush_interval,
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Redis round-trips per update: RedisStorage vs HybridStorage FSM storage"
+    )
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500, help="distinct users (chats)")
+    parser.add_argument("--start-share", type=float, default=0.3, help="share of /start messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=20, help="updates in flight")
+    parser.add_argument("--cache-size", type=int, default=10_000, help="FSM_CACHE_SIZE")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="FSM_FLUSH_INTERVAL")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--backend-python", default=sys.executable, help="python with backend deps")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--api-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_variant(args))))
+        return
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from aiohttp import web
+from pipeline import free_port, percentiles
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+ME_BODY = json.dumps({"tg_id": 1, "is_superuser": False}).encode()
+
+MODES = ("per_update", "pooled")
+
+
+def setup_bot_env(port: int) -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": "42:bench",
+        "SECRET_KEY": "bench-secret-key",
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": f"http://127.0.0.1:{port}/api",
+        "API_CACHE_REDIS": "False",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+class StubBackend:
+    """
+    /api/users/me/ с готовым ответом и задержкой delay: меряется клиент и соединения,
+    а не Django. Соединения считаются по портам клиента.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.client_ports: set[int] = set()
+
+    async def users_me(self, request: web.Request) -> web.Response:
+        self.client_ports.add(request.transport.get_extra_info("peername")[1])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.Response(body=ME_BODY, content_type="application/json")
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get("/api/users/me/", self.users_me)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+async def load(
+    call: Callable[[], Awaitable[Any]], updates: int, concurrency: int
+) -> dict[str, Any]:
+    latency: list[float] = []
+    failed = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def update() -> None:
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                failed += 1
+                return
+            latency.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(update() for _ in range(updates)))
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": round(elapsed, 2),
+        "updates_per_second": round(updates / elapsed, 1),
+        "failed": failed,
+        "latency_ms": percentiles(latency),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    port = free_port()
+    setup_bot_env(port)
+
+    from dishka import make_async_container
+    from httpx import AsyncClient
+
+    from core.di import HTTPClientProvider
+    from core.generated_api import BaseUsersAPI
+    from providers.api import APIClient
+
+    backend = StubBackend(args.backend_delay / 1000)
+    runner = await backend.start(port)
+
+    @asynccontextmanager
+    async def per_update_client() -> AsyncIterator[AsyncClient]:
+        # Прежняя схема: клиент REQUEST-scope, новое соединение на каждый апдейт
+        async with AsyncClient() as client:
+            yield client
+
+    # Новая схема: клиент APP-scope из того же провайдера, что и в боте
+    container = make_async_container(HTTPClientProvider())
+    pooled = await container.get(AsyncClient)
+
+    @asynccontextmanager
+    async def pooled_client() -> AsyncIterator[AsyncClient]:
+        yield pooled
+
+    clients = {"per_update": per_update_client, "pooled": pooled_client}
+    results = {}
+    try:
+        for mode in MODES if args.mode == "both" else (args.mode,):
+
+            async def get_me(make_client=clients[mode]) -> Any:
+                async with make_client() as client:
+                    users_api = BaseUsersAPI(api_client=APIClient(tg_id=1, http_client=client))
+                    return await users_api.get_me()
+
+            # Прогрев: импорты, пул соединений
+            await load(get_me, min(args.updates, 200), args.concurrency)
+            backend.client_ports.clear()
+            results[mode] = {
+                **await load(get_me, args.updates, args.concurrency),
+                "tcp_connections": len(backend.client_ports),
+            }
+    finally:
+        await container.close()
+        await runner.cleanup()
+
+    return {
+        "config": {
+            "updates": args.updates,
+            "concurrency": args.concurrency,
+            "backend_delay_ms": args.backend_delay,
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Bot HTTP client: new AsyncClient per update vs process-wide pool"
+    )
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50, help="updates in flight")
+    parser.add_argument("--backend-delay", type=float, default=2, help="stub response delay, ms")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
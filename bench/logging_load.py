@@ -0,0 +1,155 @@
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+# Окружение логгера для каждого режима; LOG_SINK=file заменяется путем во временном каталоге
+MODES = {
+    "dev": {"LOG_FORMAT": "text", "LOG_SINK": "stderr"},
+    "json": {"LOG_FORMAT": "json", "LOG_SINK": "stderr"},
+    "json_batched": {"LOG_FORMAT": "json", "LOG_SINK": "file"},
+}
+SCENARIOS = ("handled", "error_storm", "debug_dropped")
+
+
+def setup_bot_env() -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": "42:bench",
+        "SECRET_KEY": "bench-secret-key",
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": "http://backend/api",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "INFO",
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+def emit_percentiles(values: list[float]) -> dict[str, float]:
+    """
+    Перцентили в микросекундах: запись в очередь loguru занимает единицы мкс.
+    """
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1_000_000, 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+# ===============
+# Emitter (дочерний процесс: логгер настраивается из окружения при импорте)
+# ===============
+
+
+def run_emitter(scenario: str, records: int) -> dict[str, Any]:
+    setup_bot_env()
+
+    from providers.logger import InterceptHandler, logger
+
+    # Как в run_bot.py: stdlib logging (aiogram, httpx) через InterceptHandler
+    logging.basicConfig(handlers=[InterceptHandler()], level=os.environ["LOG_LEVEL"], force=True)
+    log = logging.getLogger("aiogram.event")
+
+    def emit(i: int) -> None:
+        if scenario == "handled":
+            log.info("Update id=%s is handled. Duration %d ms by bot id=%d", i, 3, 42)
+        elif scenario == "error_storm":
+            # Одно место вызова: повторы ограничивает RepeatFilter
+            log.error("Backend API unavailable. Path: %s", "/users/me/")
+        else:
+            log.debug("Update id=%s is received", i)
+
+    latency: list[float] = []
+    started = time.perf_counter()
+    for i in range(records):
+        emit_started = time.perf_counter()
+        emit(i)
+        latency.append(time.perf_counter() - emit_started)
+    emitted_in = time.perf_counter() - started
+    # Дождаться записи всего принятого: очередь enqueue и буфер BatchedSink
+    logger.remove()
+    written_in = time.perf_counter() - started
+
+    return {
+        "records_per_second": round(records / written_in),
+        "emit_records_per_second": round(records / emitted_in),
+        "emit_latency_us": emit_percentiles(latency),
+    }
+
+
+# ===============
+# Runner
+# ===============
+
+
+def run_mode(mode: str, scenario: str, records: int, workdir: Path) -> dict[str, Any]:
+    output = workdir / f"{mode}-{scenario}.log"
+    stderr = workdir / f"{mode}-{scenario}.stderr"
+    env = {**os.environ, **MODES[mode]}
+    if env["LOG_SINK"] == "file":
+        env["LOG_SINK"] = str(output)
+    else:
+        output = stderr
+
+    with stderr.open("w") as stderr_file:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--child", f"--scenario={scenario}", f"--records={records}"],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True,
+            check=False,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{mode}/{scenario} failed:\n{stderr.read_text()[-2000:]}")
+
+    # BatchedSink открывает файл при первой пачке
+    written = 0
+    if output.exists():
+        with output.open("rb") as file:
+            written = sum(1 for _ in file)
+    return {**json.loads(completed.stdout), "written": written}
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-logging-") as workdir:
+        for scenario in args.scenarios:
+            results[scenario] = {
+                mode: run_mode(mode, scenario, args.records, Path(workdir)) for mode in args.modes
+            }
+    return {"config": {"records": args.records}, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Logging throughput: stdlib logging through InterceptHandler into loguru"
+    )
+    parser.add_argument("--modes", nargs="+", choices=tuple(MODES), default=list(MODES))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_emitter(args.scenario, args.records)))
+        return
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
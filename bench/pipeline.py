@@ -0,0 +1,468 @@
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import itertools
+import json
+import os
+from pathlib import Path
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Iterator
+
+from aiohttp import web
+import httpx
+
+
+ROOT = Path(__file__).resolve().parent.parent
+BOT_DIR = ROOT / "bot"
+BACKEND_DIR = ROOT / "backend"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+BOT_TOKEN = "42:bench"
+SECRET_KEY = "bench-secret-key"
+
+# Одинаковые для обоих сервисов: подпись tg_id и трассировка каждого апдейта
+COMMON_ENV = {
+    "DEBUG": "False",
+    "SECRET_KEY": SECRET_KEY,
+    "REDIS_PASSWORD": "bench",
+    "LOG_LEVEL": "WARNING",
+    "TRACING_ENABLED": "True",
+    "TRACING_SAMPLE_RATE": "1",
+}
+
+
+# ===============
+# Helpers
+# ===============
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """
+    Перцентили в миллисекундах.
+    """
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 3)
+
+    return {"count": len(values), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ===============
+# Synthetic updates
+# ===============
+
+
+def generate_updates(count: int, users: int, start_share: float, seed: int) -> Iterator[dict]:
+    """
+    Сообщения в личных чатах от users пользователей: доля start_share - команда /start,
+    остальные - обычный текст.
+    """
+    rnd = random.Random(seed)
+    for update_id in range(1, count + 1):
+        user_id = 1_000_000 + rnd.randrange(users)
+        yield {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": "/start" if rnd.random() < start_share else "hello",
+            },
+        }
+
+
+# ===============
+# Fake Bot API
+# ===============
+
+
+class FakeBotAPI:
+    """
+    Сервер Bot API, отвечающий на исходящие вызовы бота и считающий их по методам.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        data = await request.post()
+
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(data.get("chat_id", 0))
+            result: Any = {
+                "message_id": int(data.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": data.get("text", ""),
+            }
+        elif method == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+# ===============
+# Backend
+# ===============
+
+
+class Backend:
+    """
+    Django ASGI (app.asgi) под uvicorn в отдельном процессе: у бота и бэкенда
+    одинаковые имена пакетов (providers, core, app), в одном интерпретаторе их не импортировать.
+    """
+
+    def __init__(
+        self,
+        python: str,
+        port: int,
+        database: str,
+        workdir: Path,
+        extra_env: dict[str, str] | None = None,
+    ) -> None:
+        self.port = port
+        self.spans_path = workdir / "backend_spans.ndjson"
+        self._python = python
+        self._process: subprocess.Popen | None = None
+        self._env = {
+            **os.environ,
+            **COMMON_ENV,
+            "PYTHONPATH": str(BACKEND_DIR),
+            "DJANGO_SETTINGS_MODULE": "app.settings",
+            "TRACING_EXPORTER": str(self.spans_path),
+            # Sampled флаг из traceparent бота ограничивается своей долей бэкенда (_in_sample),
+            # при 0 span бэкенда не пишутся и SQL запросов на HTTP запрос не посчитать
+            "TRACING_SAMPLE_RATE": "1",
+            "REDIS_CACHE_ENABLED": "False",
+        }
+        if database == "sqlite":
+            self._env.update(
+                {
+                    "DB_ENGINE": "sqlite",
+                    "DB_NAME": str(workdir / "bench.sqlite3"),
+                    "DB_PORT": "0",
+                    "DB_USER": "bench",
+                    "DB_PASSWORD": "bench",
+                }
+            )
+        else:
+            # Локальный Postgres из DB_* окружения (.env)
+            self._env["DB_ENGINE"] = "postgresql"
+        self._env.update(extra_env or {})
+
+    def start(self) -> None:
+        subprocess.run(
+            [self._python, "manage.py", "migrate", "--verbosity", "0"],
+            cwd=BACKEND_DIR,
+            env=self._env,
+            check=True,
+        )
+        self._process = subprocess.Popen(
+            [
+                self._python,
+                "-m",
+                "uvicorn",
+                "app.asgi:application",
+                "--port",
+                str(self.port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            cwd=BACKEND_DIR,
+            env=self._env,
+        )
+
+    async def wait_ready(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                if self._process is not None and self._process.poll() is not None:
+                    raise RuntimeError("Backend exited during startup")
+                try:
+                    await client.get(f"http://127.0.0.1:{self.port}/api/openapi.json")
+                    return
+                except httpx.TransportError:
+                    await asyncio.sleep(0.2)
+        raise TimeoutError("Backend is not ready")
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=10)
+
+    def read_spans(self) -> list[dict]:
+        if not self.spans_path.exists():
+            return []
+        with self.spans_path.open() as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def db_queries_per_request(spans: list[dict]) -> dict[str, Any]:
+    """
+    Число SQL запросов на HTTP запрос: db.query относится к ближайшему предку,
+    который является span запроса (не bot_auth и не db.query).
+    """
+    by_id = {span["span_id"]: span for span in spans}
+    requests = [span for span in spans if span["name"] not in ("db.query", "bot_auth")]
+    queries: Counter[str] = Counter()
+    for span in spans:
+        if span["name"] != "db.query":
+            continue
+        parent = by_id.get(span["parent_id"])
+        while parent is not None and parent["name"] in ("db.query", "bot_auth"):
+            parent = by_id.get(parent["parent_id"])
+        if parent is not None:
+            queries[parent["name"]] += 1
+
+    routes = Counter(span["name"] for span in requests)
+    return {
+        "overall": round(sum(queries.values()) / len(requests), 3) if requests else 0,
+        "by_route": {
+            route: {"requests": count, "queries_per_request": round(queries[route] / count, 3)}
+            for route, count in routes.items()
+        },
+    }
+
+
+# ===============
+# Bot
+# ===============
+
+
+def setup_bot_env(backend_port: int) -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    os.environ.update(
+        {
+            **COMMON_ENV,
+            "BOT_TOKEN": BOT_TOKEN,
+            "API_BASE_URL": f"http://127.0.0.1:{backend_port}/api",
+            "API_CACHE_REDIS": "False",
+            "METRICS_ENABLED": "False",
+            # Синтетические пользователи шлют апдейты чаще лимитов: меряется обработка, не отказ
+            "THROTTLE_ENABLED": "False",
+        }
+    )
+    sys.path.insert(0, str(BOT_DIR))
+
+
+async def run_bot_load(args: argparse.Namespace, api_port: int) -> dict[str, Any]:
+    # Модули бота импортируются только после setup_bot_env
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.types import Update
+
+    from app.run_bot import build_dispatcher
+    from providers.tracing import Span, SpanExporter, set_exporter
+
+    class CountingExporter(SpanExporter):
+        def __init__(self) -> None:
+            self.updates = 0
+            self.api_requests = 0
+
+        def export(self, span: Span) -> None:
+            if span.name.startswith("update "):
+                self.updates += 1
+            elif span.name.split(" ", 1)[0] in ("GET", "POST"):
+                self.api_requests += 1
+
+    handler_latency: dict[str, list[float]] = defaultdict(list)
+
+    async def handler_timer(handler, event, data):
+        callback = data["handler"].callback
+        name = f"{callback.__module__}.{callback.__qualname__}"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_latency[name].append(time.perf_counter() - started)
+
+    exporter = CountingExporter()
+    set_exporter(exporter)
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}"))
+    bot = Bot(token=BOT_TOKEN, session=session)
+    dp = build_dispatcher(MemoryStorage())
+    dp.message.middleware(handler_timer)
+    dp.callback_query.middleware(handler_timer)
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+
+    updates = [
+        Update.model_validate(raw, context={"bot": bot})
+        for raw in generate_updates(
+            args.warmup + args.updates, args.users, args.start_share, args.seed
+        )
+    ]
+    update_latency: list[float] = []
+
+    async def feed(batch: list[Update], measure: bool) -> None:
+        queue: asyncio.Queue[Update] = asyncio.Queue()
+        for update in batch:
+            queue.put_nowait(update)
+
+        async def worker() -> None:
+            while not queue.empty():
+                update = queue.get_nowait()
+                started = time.perf_counter()
+                await dp.feed_update(bot, update)
+                if measure:
+                    update_latency.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    try:
+        # Прогрев: соединения, кэши, первые импорты внутри обработчиков
+        await feed(updates[: args.warmup], measure=False)
+        handler_latency.clear()
+        exporter.updates = exporter.api_requests = 0
+
+        started = time.perf_counter()
+        await feed(updates[args.warmup :], measure=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+
+    return {
+        "updates_per_sec": round(len(update_latency) / elapsed, 1),
+        "update_latency_ms": percentiles(update_latency),
+        "handlers": {name: percentiles(values) for name, values in sorted(handler_latency.items())},
+        "backend_requests_per_update": round(exporter.api_requests / max(exporter.updates, 1), 3),
+    }
+
+
+# ===============
+# Report
+# ===============
+
+
+def compare(current: dict, previous: dict) -> None:
+    def delta(path: tuple[str, ...]) -> str:
+        old, new = previous, current
+        for key in path:
+            old, new = old.get(key, {}), new.get(key, {})
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            return "n/a"
+        return f"{old} -> {new} ({(new - old) / old * 100:+.1f}%)"
+
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('started_at')}):")
+    print(f"  updates/sec:          {delta(('updates_per_sec',))}")
+    for q in ("p50", "p95", "p99"):
+        print(f"  update latency {q}:   {delta(('update_latency_ms', q))}")
+    print(f"  backend req/update:   {delta(('backend_requests_per_update',))}")
+    print(f"  db queries/request:   {delta(('db_queries_per_request', 'overall'))}")
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api_port, backend_port = free_port(), free_port()
+    setup_bot_env(backend_port)
+
+    fake_api = FakeBotAPI()
+    api_runner = await fake_api.start(api_port)
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = Backend(args.backend_python, backend_port, args.database, Path(workdir))
+        backend.start()
+        try:
+            await backend.wait_ready()
+            bot_results = await run_bot_load(args, api_port)
+        finally:
+            backend.stop()
+            await api_runner.cleanup()
+        backend_spans = backend.read_spans()
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "updates": args.updates,
+            "warmup": args.warmup,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "start_share": args.start_share,
+            "database": args.database,
+            "seed": args.seed,
+        },
+        **bot_results,
+        "db_queries_per_request": db_queries_per_request(backend_spans),
+        "bot_api_calls": dict(fake_api.calls),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load test: synthetic updates -> bot Dispatcher -> Django ASGI backend"
+    )
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--users", type=int, default=200, help="distinct users (chats)")
+    parser.add_argument("--concurrency", type=int, default=50, help="updates processed at once")
+    parser.add_argument("--start-share", type=float, default=0.5, help="share of /start messages")
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend-python", default=sys.executable, help="python with backend deps")
+    parser.add_argument("--output", type=Path, help="result JSON path (default: bench/results/)")
+    parser.add_argument("--compare", type=Path, help="previous result JSON to compare with")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{result['commit'] or 'nogit'}.json"
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"\nSaved to {output}")
+    if args.compare is not None:
+        compare(result, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
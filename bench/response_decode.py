@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable
+
+import httpx
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+
+def setup_bot_env() -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": "42:bench",
+        "SECRET_KEY": "bench-secret-key",
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": "http://backend/api",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+def measure(call: Callable[[], Any], calls: int, rounds: int) -> float:
+    """
+    CPU на ответ в микросекундах (process_time), лучший из rounds проходов.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.process_time()
+        for _ in range(calls):
+            call()
+        best = min(best, time.process_time() - started)
+    return best / calls * 1_000_000
+
+
+def run(calls: int, items: int, rounds: int) -> dict[str, Any]:
+    from core.generated_api import BaseUsersAPI
+    from providers.api import API_REQUEST_DURATION, Endpoint, ResponseProcessor
+
+    def process_response_before(endpoint: Endpoint, response: httpx.Response) -> Any:
+        """
+        ResponseProcessor.process_response до перехода на validate_json: response.json()
+        в dict, затем валидация dict (списки прежний код не валидировал, для них тот же
+        валидатор через validate_python). Ветки ошибок не меряются.
+        """
+        path, response_dto = endpoint.path, endpoint.response_type
+        with API_REQUEST_DURATION.time(path=path, status=response.status_code, phase="decode"):
+            data = response.json()
+        if not response.is_success or response_dto is None:
+            return None
+        with API_REQUEST_DURATION.time(path=path, status=response.status_code, phase="validate"):
+            if isinstance(response_dto, type):
+                return response_dto.model_validate(data)
+            return endpoint.adapter.validate_python(data)
+
+    users = [{"tg_id": 1_000_000 + i, "is_superuser": i % 100 == 0} for i in range(items)]
+    payloads = {
+        "users_me": (BaseUsersAPI.get_me_endpoint, users[0]),
+        "users_page": (
+            BaseUsersAPI.list_users_endpoint,
+            {"items": users, "next_after": users[-1]["tg_id"]},
+        ),
+        "users_batch": (BaseUsersAPI.get_many_endpoint, users),
+    }
+
+    results: dict[str, Any] = {}
+    for name, (endpoint, body) in payloads.items():
+        response = httpx.Response(
+            200, content=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+        )
+
+        def decode_then_validate(endpoint=endpoint, response=response):
+            return process_response_before(endpoint, response)
+
+        def validate_json(endpoint=endpoint, response=response):
+            # Как APIClient: TypeAdapter берется из Endpoint
+            return ResponseProcessor.process_response(
+                path=endpoint.path,
+                response_dto=endpoint.response_type,
+                response=response,
+                adapter=endpoint.adapter,
+            )
+
+        # Большие ответы дольше, число вызовов масштабируется, чтобы проход занимал сравнимое время
+        n = max(calls // max(len(response.content) // 100, 1), 10)
+        old = measure(decode_then_validate, n, rounds)
+        new = measure(validate_json, n, rounds)
+        results[name] = {
+            "bytes": len(response.content),
+            "json_then_validate_cpu_us": round(old, 2),
+            "validate_json_cpu_us": round(new, 2),
+            "speedup": round(old / new, 2),
+        }
+
+    return {
+        "config": {
+            "calls": calls,
+            "items": items,
+            "rounds": rounds,
+            "metrics_enabled": os.environ["METRICS_ENABLED"],
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="API response decoding: response.json() + validation vs validate_json"
+    )
+    parser.add_argument("--calls", type=int, default=50_000, help="calls for the small payload")
+    parser.add_argument("--items", type=int, default=1000, help="users in list payloads")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_bot_env()
+    print(json.dumps(run(args.calls, args.items, args.rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
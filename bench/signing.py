@@ -0,0 +1,118 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+from pathlib import Path
+import random
+import sys
+import time
+from typing import Any, Callable
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent / "bot"
+
+KEY = "bench-secret-key"
+OLD_KEY = "bench-previous-key"
+
+
+def setup_bot_env() -> None:
+    # providers.env читает окружение при импорте, поэтому модули бота импортируются после этого
+    for name, value in {
+        "DEBUG": "False",
+        "BOT_TOKEN": "42:bench",
+        "SECRET_KEY": KEY,
+        "REDIS_PASSWORD": "bench",
+        "API_BASE_URL": "http://backend/api",
+        "METRICS_ENABLED": "False",
+        "TRACING_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(BOT_DIR))
+
+
+def measure(call: Callable[[int], Any], tg_ids: list[int], rounds: int) -> float:
+    """
+    Операций в секунду, лучший из rounds проходов по tg_ids.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for tg_id in tg_ids:
+            call(tg_id)
+        best = min(best, time.perf_counter() - started)
+    return len(tg_ids) / best
+
+
+def run(calls: int, users: int, rounds: int, seed: int) -> dict[str, Any]:
+    from providers.signing import HMACSigner
+
+    rnd = random.Random(seed)
+    # Повторяющиеся tg_id, как у апдейтов активных пользователей
+    tg_ids = [1_000_000 + rnd.randrange(users) for _ in range(calls)]
+
+    key = KEY.encode()
+    signer = HMACSigner([KEY])
+    uncached = HMACSigner([KEY], cache_size=0)
+    # Ротация: подписи старым ключом принимаются, пока он в списке
+    rotated = HMACSigner([KEY, OLD_KEY])
+    old_signer = HMACSigner([OLD_KEY])
+
+    def per_request_sign(tg_id: int) -> str:
+        # Прежняя схема: hmac.new на каждый запрос
+        return hmac.new(key, str(tg_id).encode(), hashlib.sha256).hexdigest()
+
+    def per_request_verify(tg_id: int) -> bool:
+        return hmac.compare_digest(per_request_sign(tg_id), signatures[tg_id])
+
+    signatures = {tg_id: per_request_sign(tg_id) for tg_id in set(tg_ids)}
+    old_signatures = {tg_id: old_signer.sign(tg_id) for tg_id in set(tg_ids)}
+
+    scenarios = {
+        "sign": {
+            "per_request": per_request_sign,
+            "precomputed": uncached.sign,
+            "memoized": signer.sign,
+        },
+        "verify": {
+            "per_request": per_request_verify,
+            "precomputed": lambda tg_id: uncached.verify(tg_id, signatures[tg_id]),
+            "memoized": lambda tg_id: signer.verify(tg_id, signatures[tg_id]),
+            "rotated_old_key": lambda tg_id: rotated.verify(tg_id, old_signatures[tg_id]),
+        },
+    }
+
+    results: dict[str, Any] = {}
+    for scenario, variants in scenarios.items():
+        results[scenario] = {}
+        for variant, call in variants.items():
+            ops = measure(call, tg_ids, rounds)
+            results[scenario][f"{variant}_ops_per_second"] = round(ops)
+        baseline = results[scenario]["per_request_ops_per_second"]
+        results[scenario]["memoized_speedup"] = round(
+            results[scenario]["memoized_ops_per_second"] / baseline, 2
+        )
+
+    return {
+        "config": {"calls": calls, "users": users, "rounds": rounds},
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="tg_id signing: hmac.new per request vs precomputed and memoized HMACSigner"
+    )
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=5000, help="distinct tg_id")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_bot_env()
+    print(json.dumps(run(args.calls, args.users, args.rounds, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import signal
+import sys
+import tempfile
+import time
+from typing import Any
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from pipeline import (
+    BOT_TOKEN,
+    Backend,
+    FakeBotAPI,
+    free_port,
+    generate_updates,
+    git_commit,
+    percentiles,
+    setup_bot_env,
+)
+
+
+WEBHOOK_PATH = "/webhook/bot"
+WEBHOOK_SECRET = "bench-webhook-secret"
+
+
+# ===============
+# Receiver (дочерний процесс на реплику)
+# ===============
+
+
+async def run_receiver(args: argparse.Namespace) -> dict[str, float]:
+    setup_bot_env(args.backend_port)
+    os.environ.update(
+        {
+            # Span бота не нужны, меряется только обработка
+            "TRACING_ENABLED": "False",
+            "WEBHOOK_BASE_URL": f"http://127.0.0.1:{args.port}",
+            "WEBHOOK_PATH": WEBHOOK_PATH,
+            "WEBHOOK_SECRET": WEBHOOK_SECRET,
+            "WEBHOOK_PORT": str(args.port),
+            "WEBHOOK_MAX_CONCURRENCY": str(args.max_concurrency),
+            # Остановка дожидается всех принятых апдейтов
+            "WEBHOOK_DRAIN_TIMEOUT": "3600",
+        }
+    )
+
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.fsm.storage.memory import MemoryStorage
+
+    from app.run_bot import build_dispatcher
+    from app.webhook import run_webhook
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.api_port}"))
+    bot = Bot(token=BOT_TOKEN, session=session)
+    dp = build_dispatcher(MemoryStorage())
+
+    # Время окончания обработки по update_id; время отправки знает генератор нагрузки
+    finished: dict[int, float] = {}
+
+    async def completion_timer(handler, event, data):
+        try:
+            return await handler(event, data)
+        finally:
+            finished[event.update_id] = time.time()
+
+    dp.update.outer_middleware(completion_timer)
+    try:
+        # До SIGTERM от генератора нагрузки, затем drain
+        await run_webhook(dp, bot)
+    finally:
+        await bot.session.close()
+    return finished
+
+
+# ===============
+# Load generator
+# ===============
+
+
+class Replica:
+    def __init__(self, args: argparse.Namespace, api_port: int, backend_port: int) -> None:
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}{WEBHOOK_PATH}"
+        self._args = [
+            f"--port={self.port}",
+            f"--api-port={api_port}",
+            f"--backend-port={backend_port}",
+            f"--max-concurrency={args.max_concurrency}",
+        ]
+        self._process: asyncio.subprocess.Process | None = None
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, __file__, "--child", *self._args, stdout=asyncio.subprocess.PIPE
+        )
+
+    async def wait_ready(self, client: ClientSession, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process is not None and self._process.returncode is not None:
+                raise RuntimeError("Webhook receiver exited during startup")
+            try:
+                # Без секретного токена: 401, но сервер уже принимает запросы
+                async with client.post(self.url, json={}):
+                    return
+            except ClientError:
+                await asyncio.sleep(0.2)
+        raise TimeoutError("Webhook receiver is not ready")
+
+    async def stop(self) -> dict[str, float]:
+        """
+        SIGTERM (drain принятых апдейтов) и время окончания обработки из stdout.
+        """
+        if self._process is None:
+            return {}
+        self._process.send_signal(signal.SIGTERM)
+        stdout, _ = await self._process.communicate()
+        if self._process.returncode != 0:
+            raise RuntimeError(f"Webhook receiver failed with code {self._process.returncode}")
+        return json.loads(stdout)
+
+
+async def post_updates(
+    client: ClientSession,
+    replicas: list[Replica],
+    updates: list[dict],
+    connections: int,
+) -> tuple[dict[int, float], list[float], dict[str, int]]:
+    """
+    Доставка апдейтов как у Telegram: не больше connections запросов одновременно.
+    Чат закреплен за репликой (sticky routing): у реплик FSM в памяти.
+    """
+    sent_at: dict[int, float] = {}
+    response_latency: list[float] = []
+    statuses: dict[str, int] = {}
+    queue = iter(updates)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET}
+
+    async def connection() -> None:
+        for update in queue:
+            replica = replicas[update["message"]["chat"]["id"] % len(replicas)]
+            sent_at[update["update_id"]] = time.time()
+            started = time.perf_counter()
+            try:
+                async with client.post(replica.url, json=update, headers=headers) as response:
+                    await response.read()
+                    status = str(response.status)
+            except ClientError as e:
+                status = type(e).__name__
+            response_latency.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return sent_at, response_latency, statuses
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api_port, backend_port = free_port(), free_port()
+    fake_api = FakeBotAPI()
+    api_runner = await fake_api.start(api_port)
+    updates = list(generate_updates(args.updates, args.users, args.start_share, args.seed))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = Backend(args.backend_python, backend_port, args.database, Path(workdir))
+        backend.start()
+        replicas = [Replica(args, api_port, backend_port) for _ in range(args.replicas)]
+        connector = TCPConnector(limit=args.connections)
+        client = ClientSession(connector=connector, timeout=ClientTimeout(total=300))
+        try:
+            await backend.wait_ready()
+            for replica in replicas:
+                await replica.start()
+            for replica in replicas:
+                await replica.wait_ready(client)
+
+            started = time.time()
+            sent_at, response_latency, statuses = await post_updates(
+                client, replicas, updates, args.connections
+            )
+            accepted_in = time.time() - started
+
+            finished: dict[str, float] = {}
+            for replica in replicas:
+                finished.update(await replica.stop())
+        finally:
+            await client.close()
+            backend.stop()
+            await api_runner.cleanup()
+
+    processed_in = max(finished.values(), default=started) - started
+    handler_latency = [done - sent_at[int(update_id)] for update_id, done in finished.items()]
+    return {
+        "commit": git_commit(),
+        "config": {
+            "updates": args.updates,
+            "users": args.users,
+            "replicas": args.replicas,
+            "connections": args.connections,
+            "max_concurrency": args.max_concurrency,
+            "database": args.database,
+        },
+        "statuses": statuses,
+        "accepted_per_second": round(len(response_latency) / accepted_in, 1),
+        "processed_per_second": round(len(finished) / processed_in, 1) if finished else 0,
+        "processed": len(finished),
+        # Ответ вебхука: прием апдейта, обработка идет в фоне
+        "response_latency_ms": percentiles(response_latency),
+        # От отправки апдейта до окончания его обработки
+        "handler_latency_ms": percentiles(handler_latency),
+        "bot_api_calls": dict(fake_api.calls),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Webhook mode load: synthetic updates posted to bot webhook replicas"
+    )
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000, help="distinct users (chats)")
+    parser.add_argument("--start-share", type=float, default=0.5, help="share of /start messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument(
+        "--connections", type=int, default=40, help="concurrent deliveries (max_connections)"
+    )
+    parser.add_argument("--max-concurrency", type=int, default=100, help="WEBHOOK_MAX_CONCURRENCY")
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--backend-python", default=sys.executable, help="python with backend deps")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_receiver(args))))
+        return
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
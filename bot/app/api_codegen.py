@@ -0,0 +1,367 @@
+import argparse
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import re
+import sys
+from typing import Any
+
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+SCHEMA_PATH = BOT_DIR / "core" / "openapi.json"
+OUTPUT_PATH = BOT_DIR / "core" / "generated_api.py"
+
+LINE_LENGTH = 100
+
+HEADER = """\
+# Сгенерировано app/api_codegen.py из core/openapi.json, не редактировать вручную.
+# Обновление: make api-codegen, проверка расхождения с бэкендом: make api-check
+
+from dataclasses import dataclass
+from typing import {typing}
+
+from pydantic import {pydantic}
+
+from providers.api import API, Endpoint"""
+
+_SCALAR_TYPES = {
+    "integer": "int",
+    "number": "float",
+    "string": "str",
+    "boolean": "bool",
+    "null": "None",
+}
+
+
+@dataclass
+class Param:
+    name: str
+    annotation: str
+    location: str  # path, query или body
+    required: bool
+    default: Any = None
+
+    @property
+    def optional_none(self) -> bool:
+        # Необязательный параметр без значения не передается
+        return not self.required and self.default is None
+
+    def render(self) -> str:
+        if self.required:
+            return f"{self.name}: {self.annotation}"
+        annotation = self.annotation
+        if self.optional_none and "None" not in annotation.split(" | "):
+            annotation += " | None"
+        return f"{self.name}: {annotation} = {_literal(self.default)}"
+
+
+@dataclass
+class Operation:
+    tag: str
+    name: str
+    method: str
+    path: str
+    response: str
+    response_schema: dict | None
+    description: str
+    params: list[Param] = field(default_factory=list)
+
+
+# ===============
+# Schema
+# ===============
+
+
+def _literal(value: Any) -> str:
+    # Строки в двойных кавычках, как в остальном коде
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, str) else repr(value)
+
+
+def dto_name(schema_name: str) -> str:
+    # SUsersGetMeOut (схемы бэкенда) -> UsersGetMeOutDTO
+    return re.sub(r"^S(?=[A-Z])", "", schema_name) + "DTO"
+
+
+def _ref_name(ref: str) -> str:
+    return ref.rsplit("/", 1)[-1]
+
+
+def python_type(schema: dict) -> str:
+    if "$ref" in schema:
+        return dto_name(_ref_name(schema["$ref"]))
+    if "anyOf" in schema:
+        return " | ".join(dict.fromkeys(python_type(item) for item in schema["anyOf"]))
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        return " | ".join(python_type({**schema, "type": item}) for item in schema_type)
+    if schema_type == "array":
+        return f"list[{python_type(schema.get('items', {}))}]"
+    if schema_type == "object":
+        return "dict[str, Any]"
+    return _SCALAR_TYPES.get(schema_type, "Any")
+
+
+def _collect_refs(schema: Any, refs: set[str]) -> None:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            refs.add(_ref_name(schema["$ref"]))
+        for value in schema.values():
+            _collect_refs(value, refs)
+    elif isinstance(schema, list):
+        for value in schema:
+            _collect_refs(value, refs)
+
+
+def _json_schema(content: dict) -> dict | None:
+    media = content.get("application/json")
+    return None if media is None else media.get("schema", {})
+
+
+# ===============
+# Parsing
+# ===============
+
+
+def parse_operations(schema: dict, path_prefix: str) -> tuple[list[Operation], list[str]]:
+    """
+    Операции с JSON (или пустым) телом запроса и имена пропущенных операций.
+    """
+    components = schema.get("components", {}).get("schemas", {})
+    operations, skipped = [], []
+
+    for path, methods in sorted(schema["paths"].items()):
+        for method, spec in sorted(methods.items()):
+            name = spec["operationId"].rsplit("_api_", 1)[-1]
+            request_body = spec.get("requestBody")
+            body_schema = None
+            if request_body is not None:
+                body_schema = _json_schema(request_body.get("content", {}))
+                if body_schema is None:
+                    skipped.append(name)
+                    continue
+
+            response_schema = None
+            success = spec.get("responses", {}).get("200")
+            if success is not None:
+                response_schema = _json_schema(success.get("content", {}))
+
+            operation = Operation(
+                tag=spec.get("tags", ["Default"])[0],
+                name=name,
+                method=method.upper(),
+                path=path.removeprefix(path_prefix),
+                response="None" if response_schema is None else python_type(response_schema),
+                response_schema=response_schema,
+                description=spec.get("description", ""),
+            )
+            for parameter in spec.get("parameters", []):
+                param_schema = parameter.get("schema", {})
+                operation.params.append(
+                    Param(
+                        name=parameter["name"],
+                        annotation=python_type(param_schema),
+                        location=parameter["in"],
+                        required=parameter.get("required", False),
+                        default=param_schema.get("default"),
+                    )
+                )
+            if body_schema is not None:
+                body_schema = (
+                    components[_ref_name(body_schema["$ref"])]
+                    if "$ref" in body_schema
+                    else body_schema
+                )
+                required = set(body_schema.get("required", ()))
+                for field_name, field_schema in body_schema.get("properties", {}).items():
+                    operation.params.append(
+                        Param(
+                            name=field_name,
+                            annotation=python_type(field_schema),
+                            location="body",
+                            required=field_name in required,
+                            default=field_schema.get("default"),
+                        )
+                    )
+            operations.append(operation)
+
+    return operations, skipped
+
+
+def response_models(schema: dict, operations: list[Operation]) -> list[str]:
+    """
+    Схемы ответов (со вложенными) в порядке зависимостей.
+    """
+    components = schema.get("components", {}).get("schemas", {})
+    roots: set[str] = set()
+    _collect_refs([operation.response_schema for operation in operations], roots)
+
+    ordered: list[str] = []
+
+    def visit(name: str) -> None:
+        if name in ordered:
+            return
+        refs: set[str] = set()
+        _collect_refs(components[name], refs)
+        for ref in sorted(refs - {name}):
+            visit(ref)
+        ordered.append(name)
+
+    for name in sorted(roots):
+        visit(name)
+    return ordered
+
+
+# ===============
+# Rendering
+# ===============
+
+
+def _render_docstring(text: str, indent: str) -> list[str]:
+    if not text:
+        return []
+    return [f'{indent}"""', *(f"{indent}{line}" for line in text.splitlines()), f'{indent}"""']
+
+
+def _render_call(head: str, args: list[str], tail: str, indent: str) -> list[str]:
+    """
+    Вызов или сигнатура в одну строку, если помещается, иначе по аргументу на строку.
+    """
+    line = f"{indent}{head}({', '.join(args)}){tail}"
+    if len(line) <= LINE_LENGTH or not args:
+        return [line]
+    return [f"{indent}{head}(", *(f"{indent}    {arg}," for arg in args), f"{indent}){tail}"]
+
+
+def render_dto(name: str, schema: dict) -> list[str]:
+    lines = [
+        f"class {dto_name(name)}(BaseModel):",
+        "    # Экземпляры разделяются между обработчиками через кэш, поэтому неизменяемые",
+        "    model_config = ConfigDict(frozen=True)",
+        "",
+    ]
+    required = set(schema.get("required", ()))
+    for field_name, field_schema in schema.get("properties", {}).items():
+        annotation = python_type(field_schema)
+        description = field_schema.get("description")
+        if field_name in required:
+            default = None if description is None else f"Field(description={_literal(description)})"
+        else:
+            default = _literal(field_schema.get("default"))
+            if description is not None:
+                default = f"Field({default}, description={_literal(description)})"
+        lines.append(
+            f"    {field_name}: {annotation}" + ("" if default is None else f" = {default}")
+        )
+    return lines
+
+
+def render_operation(operation: Operation) -> list[str]:
+    endpoint = f"{operation.name}_endpoint"
+    params = sorted(operation.params, key=lambda param: not param.required)
+
+    lines = _render_call(
+        f"async def {operation.name}",
+        ["self", *(param.render() for param in params)],
+        f" -> {operation.response}:",
+        "    ",
+    )
+    lines += _render_docstring(operation.description, "        ")
+
+    call_args = [f"self.{endpoint}"]
+    for location, argument in (("path", "path_params"), ("query", "params"), ("body", "json")):
+        located = [param for param in operation.params if param.location == location]
+        if not located:
+            continue
+        always = ", ".join(
+            f'"{param.name}": {param.name}' for param in located if not param.optional_none
+        )
+        lines.append(f"        {argument} = {{{always}}}")
+        for param in located:
+            if param.optional_none:
+                lines.append(f"        if {param.name} is not None:")
+                lines.append(f'            {argument}["{param.name}"] = {param.name}')
+        call_args.append(f"{argument}={argument}")
+
+    lines += _render_call("return await self.api_client.call", call_args, "", "        ")
+    return lines
+
+
+def render(schema: dict, path_prefix: str) -> str:
+    operations, _ = parse_operations(schema, path_prefix)
+    components = schema.get("components", {}).get("schemas", {})
+    models = response_models(schema, operations)
+
+    blocks = ["# ===============\n# DTO\n# ==============="]
+    for name in models:
+        blocks.append("\n".join(render_dto(name, components[name])))
+
+    blocks.append("# ===============\n# API\n# ===============")
+    class_names = []
+    for tag in sorted({operation.tag for operation in operations}):
+        class_name = f"Base{re.sub(r'[^0-9a-zA-Z]', '', tag.title())}API"
+        class_names.append(class_name)
+        tag_operations = [operation for operation in operations if operation.tag == tag]
+
+        lines = [
+            "@dataclass",
+            f"class {class_name}(API):",
+            '    """',
+            "    Методы API по OpenAPI схеме бэкенда. timeout и cache операций задаются",
+            "    в наследнике заменой *_endpoint через dataclasses.replace.",
+            '    """',
+            "",
+        ]
+        for operation in tag_operations:
+            lines += _render_call(
+                f"{operation.name}_endpoint: ClassVar[Endpoint[{operation.response}]] = Endpoint",
+                [f'"{operation.method}"', f'"{operation.path}"', operation.response],
+                "",
+                "    ",
+            )
+        for operation in tag_operations:
+            lines.append("")
+            lines += render_operation(operation)
+        blocks.append("\n".join(lines))
+
+    exports = sorted([*class_names, *map(dto_name, models)])
+    blocks.append("__all__ = (\n" + "".join(f'    "{name}",\n' for name in exports) + ")")
+    body = "\n\n\n".join(blocks)
+
+    # Импорты только используемых имен
+    typing_names = [name for name in ("Any", "ClassVar") if re.search(rf"\b{name}\b", body)]
+    pydantic_names = ["BaseModel", "ConfigDict", *(["Field"] if "Field(" in body else [])]
+    header = HEADER.format(typing=", ".join(typing_names), pydantic=", ".join(pydantic_names))
+    return f"{header}\n\n\n{body}\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate typed API client from backend OpenAPI schema"
+    )
+    parser.add_argument("--schema", type=Path, default=SCHEMA_PATH)
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--path-prefix", default="/api", help="API_BASE_URL path part")
+    parser.add_argument("--check", action="store_true", help="fail if output is out of date")
+    args = parser.parse_args()
+
+    schema = json.loads(args.schema.read_text(encoding="utf-8"))
+    _, skipped = parse_operations(schema, args.path_prefix)
+    for name in skipped:
+        print(f"Skipped {name}: request body is not JSON", file=sys.stderr)
+
+    code = render(schema, args.path_prefix)
+    current = args.output.read_text(encoding="utf-8") if args.output.exists() else None
+    if args.check:
+        if current != code:
+            print(f"{args.output} is out of date, run: make api-codegen", file=sys.stderr)
+            raise SystemExit(1)
+        return
+
+    if current != code:
+        args.output.write_text(code, encoding="utf-8")
+        print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
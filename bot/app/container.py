@@ -1,12 +1,33 @@
-from dishka import make_async_container
+from functools import lru_cache
+
+from dishka import AsyncContainer, make_async_container
 from dishka.integrations.aiogram import AiogramProvider
 
-from core.di import APIClientProvider, HTTPClientProvider, provider as core_provider
+from core.di import (
+    APIClientProvider,
+    APIResilienceProvider,
+    HTTPClientProvider,
+    ResponseCacheProvider,
+    UsersAPIProvider,
+)
 
 
-container = make_async_container(
-    core_provider,
-    APIClientProvider(),
-    HTTPClientProvider(),
-    AiogramProvider(),
-)
+@lru_cache(1)
+def get_container() -> AsyncContainer:
+    """
+    Контейнер собирается при первом обращении; зависимости создаются при первом запросе.
+    """
+    from contexts.broadcasts.di import BroadcastProvider
+
+    return make_async_container(
+        UsersAPIProvider(),
+        APIClientProvider(),
+        APIResilienceProvider(),
+        HTTPClientProvider(),
+        ResponseCacheProvider(),
+        BroadcastProvider(),
+        AiogramProvider(),
+    )
+
+
+__all__ = ("get_container",)
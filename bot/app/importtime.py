@@ -0,0 +1,121 @@
+import argparse
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+import json
+import subprocess
+import sys
+import time
+
+
+@dataclass
+class ImportTime:
+    module: str
+    depth: int  # Вложенность импорта, 0 - импорт верхнего уровня
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class ImportReport:
+    module: str
+    wall_time_ms: float  # Запуск интерпретатора и импорт
+    import_time_ms: float
+    max_rss_kb: int
+    modules_count: int
+
+
+# Импорт в дочернем процессе, который затем печатает свой пиковый RSS
+_CHILD_CODE = "import {module}, resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def _parse_importtime(stderr: str) -> list[ImportTime]:
+    items = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():  # Заголовок
+            continue
+        name = module.removeprefix(" ")
+        items.append(
+            ImportTime(
+                module=name.strip(),
+                depth=(len(name) - len(name.lstrip())) // 2,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+    return items
+
+
+def profile(module: str) -> tuple[ImportReport, list[ImportTime]]:
+    """
+    Импорт модуля в отдельном процессе с -X importtime: время холодного старта,
+    время импорта каждого модуля и пиковый RSS.
+    """
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE.format(module=module)],
+        capture_output=True,
+        text=True,
+        # Код возврата проверяется ниже, чтобы вывести stderr дочернего процесса
+        check=False,
+    )
+    wall_time = time.perf_counter() - started
+    if process.returncode != 0:
+        sys.stderr.write(process.stderr)
+        raise SystemExit(process.returncode)
+
+    items = _parse_importtime(process.stderr)
+    # Накопленное время модулей верхнего уровня (без отступа) покрывает все остальные
+    import_time_us = sum(item.cumulative_us for item in items if item.depth == 0)
+    report = ImportReport(
+        module=module,
+        wall_time_ms=round(wall_time * 1000, 1),
+        import_time_ms=round(import_time_us / 1000, 1),
+        max_rss_kb=int(process.stdout.split()[-1]),
+        modules_count=len(items),
+    )
+    return report, items
+
+
+def _print_report(report: ImportReport, items: list[ImportTime], top: int) -> None:
+    print(f"Module: {report.module}")
+    print(f"Cold start (interpreter + imports): {report.wall_time_ms} ms")
+    print(f"Imports: {report.import_time_ms} ms, {report.modules_count} modules")
+    print(f"Max RSS: {report.max_rss_kb / 1024:.1f} MiB")
+
+    print(f"\nTop {top} by cumulative time, ms:")
+    for item in sorted(items, key=lambda item: item.cumulative_us, reverse=True)[:top]:
+        print(f"{item.cumulative_us / 1000:10.1f}  {item.module}")
+
+    print(f"\nTop {top} by self time, ms:")
+    for item in sorted(items, key=lambda item: item.self_us, reverse=True)[:top]:
+        print(f"{item.self_us / 1000:10.1f}  {item.module}")
+
+    packages: dict[str, int] = defaultdict(int)
+    for item in items:
+        packages[item.module.split(".")[0]] += item.self_us
+    print(f"\nTop {top} packages by self time, ms:")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:10.1f}  {package}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Cold start profile: import time per module and RSS"
+    )
+    parser.add_argument("module", nargs="?", default="app.run_bot")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="only summary as JSON (for benchmarks)")
+    args = parser.parse_args()
+
+    report, items = profile(args.module)
+    if args.json:
+        print(json.dumps(asdict(report)))
+    else:
+        _print_report(report, items, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from aiohttp import web
+
+from providers import env, metrics
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.registry.render(), content_type="text/plain")
+
+
+async def start_metrics_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    await web.TCPSite(runner, host="0.0.0.0", port=env.metrics_port).start()
+    return runner
@@ -1,9 +1,18 @@
+from functools import lru_cache
+
 from aiogram import Router, filters, types
 from aiogram_dialog import DialogManager, StartMode
 
-from contexts.users.dialogs.menu import dialog as users_menu_dialog
 from contexts.users.states import UsersMenuSG
+from core.routers import LazyDialog, LazyRouter
+
 
+# Роутеры и диалоги контекстов. Модули импортируются при первом апдейте или старте диалога,
+# а не при сборке диспетчера.
+ROUTERS = (
+    LazyRouter("contexts.broadcasts.handlers:router", update_types=("message",)),
+    LazyDialog("contexts.users.dialogs.menu:dialog", states="contexts.users.states:UsersMenuSG"),
+)
 
 root_router = Router()
 
@@ -13,6 +22,10 @@ async def start_command(msg: types.Message, dialog_manager: DialogManager):
     await dialog_manager.start(UsersMenuSG.menu, mode=StartMode.RESET_STACK)
 
 
-root_router.include_routers(
-    users_menu_dialog,
-)
+@lru_cache(1)
+def get_root_router() -> Router:
+    root_router.include_routers(*ROUTERS)
+    return root_router
+
+
+__all__ = ("get_root_router",)
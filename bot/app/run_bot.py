@@ -1,33 +1,106 @@
 import logging
 
 from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
 from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from aiogram_dialog import setup_dialogs
 from dishka.integrations.aiogram import setup_dishka
 
-from app.container import container
-from app.root_router import root_router
+from app.container import get_container
+from app.metrics_server import start_metrics_server
+from app.root_router import get_root_router
+from core.middlewares import ThrottlingMiddleware, TracingMiddleware
 from providers import env
-from providers.bot import bot
+from providers.bot import get_bot
+from providers.fsm_storage import HybridStorage
 from providers.logger import InterceptHandler, logger
+from providers.throttling import make_limits, make_throttle_store
+
+
+async def run_broadcasts_supervisor():
+    from contexts.broadcasts.engine import Broadcaster
+
+    broadcaster = await get_container().get(Broadcaster)
+    broadcaster.run_supervisor()
+
+
+def build_dispatcher(
+    fsm_storage: BaseStorage,
+    events_isolation: BaseEventIsolation | None = None,
+) -> Dispatcher:
+    """
+    Диспетчер со всеми роутерами, диалогами и зависимостями (общий для запуска и бенчмарков).
+    """
+    dp = Dispatcher(storage=fsm_storage, events_isolation=events_isolation)
+    dp.include_router(get_root_router())
+    setup_dialogs(dp)
+    container = get_container()
+    setup_dishka(container=container, router=dp, auto_inject=True)
+    dp.update.outer_middleware(TracingMiddleware())
+    if env.throttle_enabled:
+        throttle_store = make_throttle_store()
+        dp.update.outer_middleware(
+            ThrottlingMiddleware(
+                throttle_store,
+                limits=make_limits(),
+                action=env.throttle_action,
+                max_delay=env.throttle_max_delay,
+                reply_text=env.throttle_reply_text,
+                reply_interval=env.throttle_reply_interval,
+            )
+        )
+        dp.shutdown.register(throttle_store.close)
+    dp.shutdown.register(container.close)
+    return dp
 
 
 async def main():
-    fsm_storage = RedisStorage.from_url(
+    redis_storage = RedisStorage.from_url(
         env.redis_fsm_dsn,
         key_builder=DefaultKeyBuilder(with_destiny=True),
     )
-    dp = Dispatcher(storage=fsm_storage)
-    dp.include_router(root_router)
-    setup_dialogs(dp)
-    setup_dishka(container=container, router=dp, auto_inject=True)
-    await dp.start_polling(bot)
+    fsm_storage = redis_storage
+    if env.fsm_cache_size > 0:
+        fsm_storage = HybridStorage(
+            redis_storage,
+            max_size=env.fsm_cache_size,
+            write_behind=env.fsm_write_behind,
+            flush_interval=env.fsm_flush_interval,
+        )
+    # Несколько реплик в режиме вебхука: апдейты одного чата не должны обрабатываться параллельно
+    events_isolation = redis_storage.create_isolation() if env.bot_run_mode == "webhook" else None
+    dp = build_dispatcher(fsm_storage, events_isolation)
+    if env.bot_run_mode != "intake":
+        dp.startup.register(run_broadcasts_supervisor)
+
+    if env.metrics_enabled:
+        metrics_runner = await start_metrics_server()
+        dp.shutdown.register(metrics_runner.cleanup)
+
+    # Импортируется только модуль выбранного режима
+    bot = get_bot()
+    if env.bot_run_mode == "webhook":
+        from app.webhook import run_webhook
+
+        await run_webhook(dp, bot)
+    elif env.bot_run_mode == "polling" and env.update_max_concurrency > 0:
+        from app.update_scheduler import run_polling
+
+        await run_polling(dp, bot)
+    elif env.bot_run_mode == "polling":
+        await dp.start_polling(bot)
+    elif env.bot_run_mode in ("intake", "worker"):
+        from app.update_queue import run_update_queue
+
+        await run_update_queue(dp, bot, mode=env.bot_run_mode)
+    else:
+        raise ValueError(f"Unknown BOT_RUN_MODE: {env.bot_run_mode}")
 
 
 if __name__ == "__main__":
     import asyncio
 
     logger.info("Starting bot...")
-    logging.basicConfig(handlers=[InterceptHandler()], level=logging.INFO, force=True)
+    logging.basicConfig(handlers=[InterceptHandler()], level=env.log_level, force=True)
 
     asyncio.run(main())
@@ -0,0 +1,404 @@
+import asyncio
+from collections import deque
+import json
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from providers import env
+from providers.logger import logger
+
+
+class UpdateQueue:
+    """
+    Очередь апдейтов в Redis Streams, шардированная по chat id.
+
+    Порядок апдейтов одного чата сохраняется: чат всегда попадает в один шард,
+    а каждый шард читает ровно один воркер. Доставка at-least-once: сообщение
+    подтверждается (XACK) только после обработки, повторы отсекаются ключом дедупликации.
+    Апдейт, обработка которого упала max_attempts раз, переносится в поток dead_stream.
+    """
+
+    group = "bot-workers"
+    offset_key = "updates:offset"
+    dead_stream = "updates:dead"
+
+    def __init__(
+        self,
+        redis: Redis,
+        shards: int,
+        maxlen: int,
+        dedup_ttl: int,
+        max_attempts: int,
+    ) -> None:
+        self.redis = redis
+        self.shards = shards
+        self.maxlen = maxlen
+        self.dedup_ttl = dedup_ttl
+        self.max_attempts = max_attempts
+
+    @staticmethod
+    def stream_name(shard: int) -> str:
+        return f"updates:{shard}"
+
+    @staticmethod
+    def dedup_key(update_id: int | str) -> str:
+        return f"updates:done:{update_id}"
+
+    @staticmethod
+    def attempts_key(update_id: int | str) -> str:
+        return f"updates:attempts:{update_id}"
+
+    async def push(self, update: Update) -> None:
+        event_context = UserContextMiddleware.resolve_event_context(update)
+        chat_id = event_context.chat_id or event_context.user_id or 0
+        await self.redis.xadd(
+            self.stream_name(chat_id % self.shards),
+            {
+                "update_id": update.update_id,
+                "chat_id": chat_id,
+                "data": update.model_dump_json(by_alias=True, exclude_none=True),
+            },
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+    async def ensure_groups(self, shards: list[int]) -> None:
+        for shard in shards:
+            try:
+                await self.redis.xgroup_create(
+                    self.stream_name(shard), self.group, id="0", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+
+# ===============
+# Intake
+# ===============
+
+
+async def run_intake(
+    dp: Dispatcher, bot: Bot, queue: UpdateQueue, stop_event: asyncio.Event
+) -> None:
+    """
+    Long polling, складывающий апдейты в очередь вместо обработки.
+    Offset сохраняется в Redis после записи апдейтов в поток, поэтому при падении
+    апдейты могут попасть в очередь повторно, но не теряются.
+    """
+    allowed_updates = dp.resolve_used_update_types()
+    offset = await queue.redis.get(queue.offset_key)
+    offset = int(offset) if offset is not None else None
+    backoff = Backoff(BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1))
+
+    logger.info("Update intake started")
+    while not stop_event.is_set():
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=env.update_queue_polling_timeout,
+                allowed_updates=allowed_updates,
+            )
+            for update in updates:
+                await queue.push(update)
+            if updates:
+                await queue.redis.set(queue.offset_key, updates[-1].update_id + 1)
+        except Exception as e:
+            # Offset не сдвинут: апдейты будут получены снова, повторы отсечет дедупликация
+            logger.error("Update intake failed - {error!r}", error=e)
+            await backoff.asleep()
+            continue
+        backoff.reset()
+        if updates:
+            offset = updates[-1].update_id + 1
+
+
+# ===============
+# Worker
+# ===============
+
+
+async def _ack(queue: UpdateQueue, stream: str, message_id: bytes, update_id: str) -> None:
+    async with queue.redis.pipeline(transaction=True) as pipe:
+        pipe.set(queue.dedup_key(update_id), 1, ex=queue.dedup_ttl)
+        pipe.xack(stream, queue.group, message_id)
+        await pipe.execute()
+
+
+async def _fail(
+    queue: UpdateQueue,
+    stream: str,
+    message_id: bytes,
+    fields: dict[bytes, bytes],
+    error: Exception,
+) -> bool:
+    """
+    Учет неудачной попытки. True - попытки исчерпаны и апдейт перенесен в dead_stream.
+    """
+    update_id = fields[b"update_id"].decode()
+    attempts_key = queue.attempts_key(update_id)
+    async with queue.redis.pipeline(transaction=True) as pipe:
+        pipe.incr(attempts_key)
+        pipe.expire(attempts_key, queue.dedup_ttl)
+        attempts, _ = await pipe.execute()
+    if attempts < queue.max_attempts:
+        return False
+
+    logger.error(
+        "Update {id} failed {attempts} times, moved to {stream}",
+        id=update_id,
+        attempts=attempts,
+        stream=queue.dead_stream,
+    )
+    await queue.redis.xadd(
+        queue.dead_stream,
+        {**fields, b"stream": stream, b"error": repr(error)},
+        maxlen=queue.maxlen,
+        approximate=True,
+    )
+    await _ack(queue, stream, message_id, update_id)
+    return True
+
+
+class UpdateWorker:
+    """
+    Обработка шардов воркера: у каждого чата своя задача с очередью апдейтов.
+
+    Задачи чатов живут между чтениями из потоков, поэтому медленный обработчик
+    задерживает только свой чат. Порядок внутри чата: следующий апдейт не начинается,
+    пока предыдущий не подтвержден; упавший повторяется раз в retry_interval секунд.
+    Неподтвержденные сообщения ушедших потребителей (другой UPDATE_QUEUE_WORKERS,
+    упавший воркер) забираются XAUTOCLAIM после claim_idle секунд простоя.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        queue: UpdateQueue,
+        shards: list[int],
+        consumer: str,
+        max_in_flight: int,
+        retry_interval: float,
+        claim_idle: float,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.queue = queue
+        self.shards = shards
+        self.consumer = consumer
+        self.max_in_flight = max_in_flight
+        self.retry_interval = retry_interval
+        self.claim_idle = claim_idle
+        # Как в start_polling: контекст запуска в data хэндлеров
+        self._workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+        self._chats: dict[tuple[str, bytes], deque[tuple[bytes, dict[bytes, bytes]]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        # id сообщений, полученных и еще не подтвержденных этим воркером
+        self._in_flight: set[bytes] = set()
+        self._has_capacity = asyncio.Event()
+        self._has_capacity.set()
+
+    # ===============
+    # Reading
+    # ===============
+
+    async def run(self, stop_event: asyncio.Event, drain_timeout: float) -> None:
+        backoff = Backoff(BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1))
+        streams = {self.queue.stream_name(shard): ">" for shard in self.shards}
+        loop = asyncio.get_running_loop()
+        claimed_at: float | None = None
+        while not stop_event.is_set():
+            try:
+                if claimed_at is None:
+                    await self.queue.ensure_groups(self.shards)
+                    # Свои неподтвержденные сообщения от прошлого запуска - сразу
+                    pending = {stream: "0" for stream in streams}
+                    self._dispatch(
+                        await self.queue.redis.xreadgroup(self.queue.group, self.consumer, pending)
+                    )
+                if claimed_at is None or loop.time() - claimed_at >= self.retry_interval:
+                    await self._claim_stale()
+                    claimed_at = loop.time()
+
+                await self._has_capacity.wait()
+                batch = await self.queue.redis.xreadgroup(
+                    self.queue.group,
+                    self.consumer,
+                    streams,
+                    count=min(env.update_queue_batch_size, self.max_in_flight),
+                    block=1000,
+                )
+            except (RedisError, OSError) as e:
+                logger.error("Update worker read failed - {error!r}", error=e)
+                await backoff.asleep()
+                continue
+            backoff.reset()
+            self._dispatch(batch)
+
+        await self._drain(drain_timeout)
+
+    async def _claim_stale(self) -> None:
+        for shard in self.shards:
+            stream = self.queue.stream_name(shard)
+            start_id: bytes | str = "0-0"
+            while True:
+                start_id, messages, *_ = await self.queue.redis.xautoclaim(
+                    stream,
+                    self.queue.group,
+                    self.consumer,
+                    min_idle_time=int(self.claim_idle * 1000),
+                    start_id=start_id,
+                    count=env.update_queue_batch_size,
+                )
+                claimed = self._dispatch([(stream.encode(), messages)])
+                if claimed:
+                    logger.warning(
+                        "Claimed {count} stale updates from {stream}", count=claimed, stream=stream
+                    )
+                if start_id in (b"0-0", "0-0"):
+                    break
+
+    def _dispatch(self, batch: list[tuple[bytes, list[tuple[bytes, dict[bytes, bytes]]]]]) -> int:
+        """
+        Постановка сообщений в очереди чатов. Возвращает число новых сообщений.
+        """
+        added = 0
+        for stream, messages in batch or ():
+            for message_id, fields in messages:
+                # fields None: сообщение удалено из потока (MAXLEN), пока было неподтвержденным.
+                # Свои сообщения в обработке тоже простаивают и возвращаются XAUTOCLAIM
+                if fields is None or message_id in self._in_flight:
+                    continue
+                chat = (stream.decode(), fields[b"chat_id"])
+                chat_messages = self._chats.get(chat)
+                if chat_messages is None:
+                    chat_messages = self._chats[chat] = deque()
+                    task = asyncio.create_task(self._run_chat(chat, chat_messages))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                chat_messages.append((message_id, fields))
+                self._in_flight.add(message_id)
+                added += 1
+        if len(self._in_flight) >= self.max_in_flight:
+            self._has_capacity.clear()
+        return added
+
+    async def _drain(self, timeout: float) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        # Неподтвержденные апдейты остаются в потоке и будут обработаны после перезапуска
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # ===============
+    # Processing
+    # ===============
+
+    async def _run_chat(
+        self,
+        chat: tuple[str, bytes],
+        messages: deque[tuple[bytes, dict[bytes, bytes]]],
+    ) -> None:
+        stream = chat[0]
+        try:
+            while messages:
+                message_id, fields = messages[0]
+                try:
+                    done = await self._process(stream, message_id, fields)
+                except (RedisError, OSError) as e:
+                    logger.error("Update acknowledge failed - {error!r}", error=e)
+                    done = False
+                if not done:
+                    await asyncio.sleep(self.retry_interval)
+                    continue
+
+                messages.popleft()
+                self._in_flight.discard(message_id)
+                if len(self._in_flight) < self.max_in_flight:
+                    self._has_capacity.set()
+        finally:
+            del self._chats[chat]
+
+    async def _process(self, stream: str, message_id: bytes, fields: dict[bytes, bytes]) -> bool:
+        """
+        True - апдейт подтвержден (обработан, повтор или перенесен в dead_stream),
+        False - обработка упала и апдейт нужно повторить.
+        """
+        queue = self.queue
+        update_id = fields[b"update_id"].decode()
+        if not await queue.redis.exists(queue.dedup_key(update_id)):
+            try:
+                response = await self.dp.feed_raw_update(
+                    self.bot, json.loads(fields[b"data"]), **self._workflow_data
+                )
+                if isinstance(response, TelegramMethod):
+                    await self.dp.silent_call_request(bot=self.bot, result=response)
+            except Exception as e:
+                logger.exception("Update processing failed. Update ID: {id}", id=update_id)
+                return await _fail(queue, stream, message_id, fields, e)
+
+        await _ack(queue, stream, message_id, update_id)
+        return True
+
+
+async def run_worker(
+    dp: Dispatcher, bot: Bot, queue: UpdateQueue, stop_event: asyncio.Event
+) -> None:
+    shards = [
+        shard
+        for shard in range(queue.shards)
+        if shard % env.update_queue_workers == env.update_queue_worker_index
+    ]
+    consumer = f"worker-{env.update_queue_worker_index}"
+    worker = UpdateWorker(
+        dp,
+        bot,
+        queue,
+        shards=shards,
+        consumer=consumer,
+        max_in_flight=env.update_queue_max_in_flight,
+        retry_interval=env.update_queue_retry_interval,
+        claim_idle=env.update_queue_claim_idle,
+    )
+    logger.info(
+        "Update worker {consumer} started, shards: {shards}", consumer=consumer, shards=shards
+    )
+    await worker.run(stop_event, drain_timeout=env.update_queue_drain_timeout)
+
+
+async def run_update_queue(dp: Dispatcher, bot: Bot, mode: str) -> None:
+    redis = Redis.from_url(env.redis_queue_dsn)
+    queue = UpdateQueue(
+        redis=redis,
+        shards=env.update_queue_shards,
+        maxlen=env.update_queue_maxlen,
+        dedup_ttl=env.update_queue_dedup_ttl,
+        max_attempts=env.update_queue_max_attempts,
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        if mode == "intake":
+            await run_intake(dp, bot, queue, stop_event)
+        else:
+            await run_worker(dp, bot, queue, stop_event)
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+        await redis.aclose()
@@ -0,0 +1,313 @@
+import asyncio
+from collections import Counter, deque
+import signal
+import time
+from typing import Awaitable, Callable, Literal
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+from providers import env, metrics
+from providers.logger import logger
+
+
+UPDATES_QUEUED = metrics.Gauge(
+    "bot_updates_queued",
+    "Updates waiting for a free slot or for the previous update of their chat",
+)
+UPDATES_RUNNING = metrics.Gauge(
+    "bot_updates_running",
+    "Updates being processed by update type",
+    labelnames=("type",),
+)
+UPDATES_SHED = metrics.Counter(
+    "bot_updates_shed_total",
+    "Updates dropped because the scheduler queue was full, by update type and policy",
+    labelnames=("type", "policy"),
+)
+UPDATE_QUEUE_WAIT = metrics.Histogram(
+    "bot_update_queue_wait_seconds",
+    "Time from receiving an update to the start of its processing",
+)
+
+OverflowPolicy = Literal["block", "drop_new", "drop_oldest"]
+
+
+class _Item:
+    __slots__ = ("key", "received_at", "state", "type", "update")
+
+    def __init__(self, update: Update, key: int | str) -> None:
+        self.update = update
+        self.key = key
+        self.type = update.event_type
+        self.received_at = time.perf_counter()
+        self.state = "queued"  # queued | started | dropped
+
+
+class UpdateScheduler:
+    """
+    Обработка апдейтов с ограниченной параллельностью.
+
+    - одновременно не больше max_concurrency апдейтов, апдейтов типа - не больше type_limits[тип]
+    - апдейты одного чата обрабатываются по одному в порядке получения, разных чатов - параллельно
+    - ждут обработки не больше max_queue апдейтов, при заполнении действует overflow:
+      block - submit ждет места, polling перестает забирать апдейты и они копятся у Telegram;
+      drop_new - отбрасывается новый апдейт; drop_oldest - самый давно ждущий
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Update], Awaitable[object]],
+        max_concurrency: int,
+        max_queue: int,
+        overflow: OverflowPolicy = "block",
+        type_limits: dict[str, int] | None = None,
+    ) -> None:
+        if max_concurrency < 1 or max_queue < 1:
+            raise ValueError("max_concurrency and max_queue must be positive")
+        if overflow not in ("block", "drop_new", "drop_oldest"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self._process = process
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._overflow = overflow
+        self._type_limits = type_limits or {}
+
+        # Ждущие апдейты по чатам; чат с обрабатываемым апдейтом - в _busy
+        self._chats: dict[int | str, deque[_Item]] = {}
+        self._busy: set[int | str] = set()
+        # Свободные чаты по типу первого ждущего апдейта. Записи проверяются при выборе:
+        # после drop_oldest в очереди может остаться устаревший ключ
+        self._ready: dict[str, deque[int | str]] = {}
+        # Порядок получения для drop_oldest, отброшенные и начатые пропускаются при выборе
+        self._order: deque[_Item] = deque()
+
+        self._queued = 0
+        self._running = 0
+        self._running_by_type: Counter[str] = Counter()
+        self._tasks: set[asyncio.Task] = set()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    async def submit(self, update: Update) -> bool:
+        """
+        Ставит апдейт в очередь. False - апдейт отброшен политикой drop_new.
+        """
+        event_context = UserContextMiddleware.resolve_event_context(update)
+        key = event_context.chat_id or event_context.user_id
+        if key is None:
+            # Апдейты без чата и пользователя (опросы и т.п.) друг от друга не зависят
+            key = f"update:{update.update_id}"
+        item = _Item(update, key)
+
+        if self._queued >= self._max_queue:
+            if self._overflow == "block":
+                while self._queued >= self._max_queue:
+                    self._space.clear()
+                    await self._space.wait()
+            elif self._overflow == "drop_new":
+                UPDATES_SHED.inc(type=item.type, policy="drop_new")
+                logger.warning("Update queue is full, update {id} dropped", id=update.update_id)
+                return False
+            else:
+                self._drop_oldest()
+
+        chat = self._chats.setdefault(key, deque())
+        chat.append(item)
+        if self._overflow == "drop_oldest":
+            self._order.append(item)
+            if len(self._order) > 2 * self._max_queue:
+                self._order = deque(item for item in self._order if item.state == "queued")
+        self._queued += 1
+        UPDATES_QUEUED.inc()
+        self._idle.clear()
+        if len(chat) == 1 and key not in self._busy:
+            self._mark_ready(key)
+        self._dispatch()
+        return True
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Ждет обработки очереди и начатых апдейтов, по таймауту отменяет оставшиеся.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except TimeoutError:
+            logger.warning(
+                "Update drain timed out, {queued} queued and {running} running updates cancelled",
+                queued=self._queued,
+                running=self._running,
+            )
+            UPDATES_QUEUED.dec(self._queued)
+            self._chats.clear()
+            self._ready.clear()
+            self._order.clear()
+            self._queued = 0
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _mark_ready(self, key: int | str) -> None:
+        head = self._chats[key][0]
+        self._ready.setdefault(head.type, deque()).append(key)
+
+    def _dispatch(self) -> None:
+        # Типы обходятся по кругу, по одному апдейту за проход: поток сообщений
+        # не задерживает callback_query, пока у обоих есть свободные слоты
+        progress = True
+        while progress and self._running < self._max_concurrency:
+            progress = False
+            for type_, keys in self._ready.items():
+                if not keys:
+                    continue
+                limit = self._type_limits.get(type_)
+                if limit is not None and self._running_by_type[type_] >= limit:
+                    continue
+                key = keys.popleft()
+                progress = True
+                chat = self._chats.get(key)
+                if key in self._busy or not chat or chat[0].type != type_:
+                    continue
+                self._start(key, chat)
+                if self._running >= self._max_concurrency:
+                    return
+
+    def _start(self, key: int | str, chat: deque[_Item]) -> None:
+        item = chat.popleft()
+        if not chat:
+            del self._chats[key]
+        self._busy.add(key)
+        item.state = "started"
+        self._queued -= 1
+        self._running += 1
+        self._running_by_type[item.type] += 1
+        UPDATES_QUEUED.dec()
+        UPDATES_RUNNING.inc(type=item.type)
+        UPDATE_QUEUE_WAIT.observe(time.perf_counter() - item.received_at)
+        if self._queued < self._max_queue:
+            self._space.set()
+
+        task = asyncio.create_task(self._run(item))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, item: _Item) -> None:
+        try:
+            await self._process(item.update)
+        except Exception:
+            logger.exception("Update processing failed. Update ID: {id}", id=item.update.update_id)
+        finally:
+            self._running -= 1
+            self._running_by_type[item.type] -= 1
+            UPDATES_RUNNING.dec(type=item.type)
+            self._busy.discard(item.key)
+            if item.key in self._chats:
+                self._mark_ready(item.key)
+            self._dispatch()
+            if not self._queued and not self._running:
+                self._idle.set()
+
+    def _drop_oldest(self) -> None:
+        while self._order:
+            item = self._order.popleft()
+            if item.state != "queued":
+                continue
+            chat = self._chats[item.key]
+            was_head = chat[0] is item
+            chat.remove(item)
+            if not chat:
+                del self._chats[item.key]
+            elif was_head and item.key not in self._busy:
+                self._mark_ready(item.key)
+            item.state = "dropped"
+            self._queued -= 1
+            UPDATES_QUEUED.dec()
+            UPDATES_SHED.inc(type=item.type, policy="drop_oldest")
+            logger.warning("Update queue is full, update {id} dropped", id=item.update.update_id)
+            return
+
+
+# ===============
+# Polling
+# ===============
+
+
+async def run_polling(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Long polling с обработкой апдейтов через UpdateScheduler вместо задачи на каждый апдейт.
+    Offset сдвигается после постановки апдейта в очередь: при остановке ждущие апдейты
+    дообрабатываются в пределах UPDATE_DRAIN_TIMEOUT, оставшиеся теряются.
+    """
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+
+    async def process(update: Update) -> None:
+        # Как Dispatcher._process_update в start_polling: контекст запуска в data хэндлеров,
+        # метод, возвращенный хэндлером, выполняется как ответ на webhook
+        response = await dp.feed_update(bot, update, **workflow_data)
+        if isinstance(response, TelegramMethod):
+            await dp.silent_call_request(bot=bot, result=response)
+
+    scheduler = UpdateScheduler(
+        process,
+        max_concurrency=env.update_max_concurrency,
+        max_queue=env.update_max_queue,
+        overflow=env.update_overflow,
+        type_limits=env.update_type_limits,
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    allowed_updates = dp.resolve_used_update_types()
+    backoff = Backoff(BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1))
+    offset: int | None = None
+
+    await dp.emit_startup(bot=bot, **workflow_data)
+    logger.info(
+        "Polling started, max concurrency: {concurrency}, max queue: {queue}, overflow: {overflow}",
+        concurrency=env.update_max_concurrency,
+        queue=env.update_max_queue,
+        overflow=env.update_overflow,
+    )
+    try:
+        while not stop_event.is_set():
+            try:
+                updates = await bot.get_updates(
+                    offset=offset,
+                    timeout=env.update_polling_timeout,
+                    allowed_updates=allowed_updates,
+                )
+            except Exception as e:
+                logger.error("Failed to fetch updates - {error!r}", error=e)
+                await backoff.asleep()
+                continue
+            backoff.reset()
+            for update in updates:
+                await scheduler.submit(update)
+                offset = update.update_id + 1
+        await scheduler.drain(env.update_drain_timeout)
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+
+
+__all__ = (
+    "UpdateScheduler",
+    "run_polling",
+)
@@ -0,0 +1,116 @@
+import asyncio
+import signal
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from providers import env
+from providers.logger import logger
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """
+    Приём апдейтов вебхуком.
+
+    Апдейт обрабатывается в фоне, ответ Telegram уходит сразу. Число одновременно
+    обрабатываемых апдейтов ограничено: при исчерпании лимита ответ задерживается,
+    и Telegram сам снижает темп доставки.
+    drain дожидается незавершенных обработчиков; при остановке он должен выполниться
+    до shutdown диспетчера и закрытия сессии бота (см. run_webhook).
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: str,
+        max_concurrency: int,
+        drain_timeout: float,
+        **data: Any,
+    ) -> None:
+        # Фоновая обработка своя: handle проверяет секрет и передает запрос в _handle_request
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=False,
+            secret_token=secret_token,
+            **data,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._drain_timeout = drain_timeout
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _handle_request(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        await self._semaphore.acquire()
+
+        task = asyncio.create_task(self._feed_update(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_update_done)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=bot, result=result)
+
+    def _on_update_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._semaphore.release()
+
+    async def drain(self, *args: Any, **kwargs: Any) -> None:
+        tasks = set(self._tasks)
+        if not tasks:
+            return
+
+        logger.info("Draining {count} updates...", count=len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=self._drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Drain timeout, {count} updates cancelled", count=len(pending))
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    if not env.webhook_base_url or not env.webhook_secret:
+        raise ValueError("WEBHOOK_BASE_URL and WEBHOOK_SECRET are required in webhook mode")
+
+    app = web.Application()
+    handler = WebhookRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=env.webhook_secret,
+        max_concurrency=env.webhook_max_concurrency,
+        drain_timeout=env.webhook_drain_timeout,
+    )
+    # on_shutdown выполняется по порядку: drain, shutdown диспетчера,
+    # затем закрытие сессии бота, которое добавляет register
+    app.on_shutdown.append(handler.drain)
+    setup_application(app, dp, bot=bot)
+    handler.register(app, path=env.webhook_path)
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    await web.TCPSite(runner, host=env.webhook_host, port=env.webhook_port).start()
+
+    # Все реплики регистрируют один и тот же URL, повторный вызов идемпотентен
+    await bot.set_webhook(
+        url=f"{env.webhook_base_url}{env.webhook_path}",
+        secret_token=env.webhook_secret,
+        max_connections=env.webhook_max_connections,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("Webhook server started on port {port}", port=env.webhook_port)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
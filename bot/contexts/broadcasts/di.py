@@ -0,0 +1,33 @@
+from typing import AsyncIterable
+
+from dishka import Provider, Scope, provide
+from httpx import AsyncClient
+from redis.asyncio import Redis
+
+from providers import env
+from providers.bot import get_bot
+from providers.cache import ResponseCache
+from providers.resilience import APIResilience
+
+from .engine import Broadcaster
+
+
+class BroadcastProvider(Provider):
+    @provide(scope=Scope.APP)
+    async def get_broadcaster(
+        self,
+        http_client: AsyncClient,
+        response_cache: ResponseCache,
+        resilience: APIResilience,
+    ) -> AsyncIterable[Broadcaster]:
+        redis = Redis.from_url(env.redis_broadcast_dsn)
+        broadcaster = Broadcaster(
+            bot=get_bot(),
+            redis=redis,
+            http_client=http_client,
+            response_cache=response_cache,
+            resilience=resilience,
+        )
+        yield broadcaster
+        await broadcaster.stop()
+        await redis.aclose()
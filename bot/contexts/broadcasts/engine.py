@@ -0,0 +1,383 @@
+import asyncio
+import os
+import socket
+from typing import Literal
+from uuid import uuid4
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.utils.backoff import Backoff, BackoffConfig
+from httpx import AsyncClient, TransportError
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.api import UsersAPI
+from lib.rate_limit import TokenBucket
+from providers import env, metrics
+from providers.api import APIClient, APIInvalidStatusCodeError, APIUnavailableError
+from providers.cache import ResponseCache, TTLCache
+from providers.logger import logger as log
+from providers.resilience import APIResilience
+
+
+BROADCAST_MESSAGES = metrics.Counter(
+    "bot_broadcast_messages_total",
+    "Broadcast send attempts by result",
+    labelnames=("status",),
+)
+BROADCAST_RATE = metrics.Gauge(
+    "bot_broadcast_rate",
+    "Current broadcast send rate limit, messages per second",
+)
+
+
+# Операции с lease и курсором выполняются, только пока lease принадлежит процессу (ARGV[1]):
+# процесс, у которого задачу перехватили, не продлевает, не удаляет чужой lease и не
+# перезаписывает курсор нового владельца.
+_RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# KEYS - lease и задача, ARGV - владелец и JSON задачи
+_CHECKPOINT_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Временная недоступность бэкенда или Redis: рассылка повторяется с сохраненного курсора.
+    """
+    if isinstance(error, APIInvalidStatusCodeError):
+        return error.status_code >= 500
+    return isinstance(error, (APIUnavailableError, TransportError, RedisError, OSError))
+
+
+class BroadcastJob(BaseModel):
+    id: str
+    admin_tg_id: int
+    from_chat_id: int
+    message_id: int
+    status: Literal["running", "done", "failed"] = "running"
+    cursor: int | None = None  # Последний tg_id полностью обработанной страницы
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+
+
+class Broadcaster:
+    """
+    Рассылка сообщения всем пользователям.
+
+    - Глобальный token bucket и token bucket на чат; при RetryAfter глобальный лимит
+      ставится на паузу и уменьшается вдвое, затем постепенно восстанавливается (AIMD).
+    - Пользователи читаются постранично по tg_id, страница отправляется пулом из
+      broadcast_concurrency воркеров.
+    - После каждой страницы курсор сохраняется в Redis: упавшая рассылка продолжается
+      с последней сохраненной страницы (сообщения этой страницы могут уйти повторно).
+    - Задачу выполняет один процесс: lease в Redis, который владелец продлевает каждые
+      broadcast_lease_ttl / 3 секунд. Незанятые активные задачи периодически подхватываются
+      любым процессом; процесс, потерявший lease, останавливает рассылку без сохранения курсора.
+    """
+
+    active_key = "broadcast:active"
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis: Redis,
+        http_client: AsyncClient,
+        response_cache: ResponseCache,
+        resilience: APIResilience,
+    ) -> None:
+        self._bot = bot
+        self._redis = redis
+        self._http_client = http_client
+        self._response_cache = response_cache
+        self._resilience = resilience
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._global_bucket = TokenBucket(rate=env.broadcast_rate)
+        self._chat_buckets = TTLCache(max_size=100_000)
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._supervisor: asyncio.Task | None = None
+        self._renew_lease_script = redis.register_script(_RENEW_LEASE_SCRIPT)
+        self._release_lease_script = redis.register_script(_RELEASE_LEASE_SCRIPT)
+        self._checkpoint_script = redis.register_script(_CHECKPOINT_SCRIPT)
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"broadcast:job:{job_id}"
+
+    @staticmethod
+    def _lease_key(job_id: str) -> str:
+        return f"broadcast:lease:{job_id}"
+
+    # ===============
+    # Public API
+    # ===============
+
+    async def start(self, admin_tg_id: int, from_chat_id: int, message_id: int) -> BroadcastJob:
+        job = BroadcastJob(
+            id=uuid4().hex,
+            admin_tg_id=admin_tg_id,
+            from_chat_id=from_chat_id,
+            message_id=message_id,
+        )
+        await self._save(job)
+        await self._redis.sadd(self.active_key, job.id)
+        await self._spawn(job)
+        return job
+
+    async def get_job(self, job_id: str) -> BroadcastJob | None:
+        raw = await self._redis.get(self._job_key(job_id))
+        return BroadcastJob.model_validate_json(raw) if raw is not None else None
+
+    def run_supervisor(self) -> None:
+        """
+        Фоновое подхватывание активных рассылок (после рестарта или падения другого процесса).
+        """
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        tasks = [*self._tasks.values(), *([self._supervisor] if self._supervisor else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ===============
+    # Internals
+    # ===============
+
+    async def _supervise(self) -> None:
+        while True:
+            try:
+                for job_id in await self._redis.smembers(self.active_key):
+                    job = await self.get_job(job_id.decode())
+                    if job is not None and job.id not in self._tasks:
+                        await self._spawn(job)
+            except Exception:
+                log.exception("Broadcast supervisor error")
+            await asyncio.sleep(env.broadcast_lease_ttl / 2)
+
+    async def _spawn(self, job: BroadcastJob) -> None:
+        is_acquired = await self._redis.set(
+            self._lease_key(job.id),
+            self._owner,
+            nx=True,
+            ex=env.broadcast_lease_ttl,
+        )
+        if not is_acquired:
+            return
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+
+    async def _save(self, job: BroadcastJob) -> None:
+        await self._redis.set(self._job_key(job.id), job.model_dump_json())
+
+    async def _checkpoint(self, job: BroadcastJob) -> bool:
+        """
+        Сохранение задачи, если lease все еще у этого процесса.
+        """
+        saved = await self._checkpoint_script(
+            keys=[self._lease_key(job.id), self._job_key(job.id)],
+            args=[self._owner, job.model_dump_json()],
+        )
+        return bool(saved)
+
+    async def _release_lease(self, job_id: str) -> None:
+        await self._release_lease_script(keys=[self._lease_key(job_id)], args=[self._owner])
+
+    async def _keep_lease(self, job_id: str, lease_lost: asyncio.Event, run: asyncio.Task) -> None:
+        """
+        Продление lease, пока идет рассылка. Если lease истек или занят другим процессом,
+        рассылка этого процесса отменяется.
+        """
+        ttl_ms = int(env.broadcast_lease_ttl * 1000)
+        while True:
+            await asyncio.sleep(env.broadcast_lease_ttl / 3)
+            try:
+                renewed = await self._renew_lease_script(
+                    keys=[self._lease_key(job_id)],
+                    args=[self._owner, ttl_ms],
+                )
+            except RedisError:
+                # Повтор через треть TTL; если lease успеет истечь, курсор не сохранится
+                log.exception("Broadcast {id}: lease renewal failed", id=job_id)
+                continue
+            if not renewed:
+                lease_lost.set()
+                run.cancel()
+                return
+
+    async def _run(self, job: BroadcastJob) -> None:
+        users_api = UsersAPI(
+            APIClient(
+                tg_id=job.admin_tg_id,
+                http_client=self._http_client,
+                cache=self._response_cache,
+                resilience=self._resilience,
+            )
+        )
+        log.info("Broadcast {id} started from cursor {cursor}", id=job.id, cursor=job.cursor)
+
+        lease_lost = asyncio.Event()
+        keeper = asyncio.create_task(self._keep_lease(job.id, lease_lost, asyncio.current_task()))
+        backoff = Backoff(BackoffConfig(min_delay=1.0, max_delay=60.0, factor=2.0, jitter=0.1))
+        try:
+            while True:
+                cursor = job.cursor
+                try:
+                    await self._send_pages(job, users_api, lease_lost)
+                    break
+                except Exception as e:
+                    if not _is_retryable(e):
+                        raise
+                    if job.cursor != cursor:
+                        backoff.reset()
+                    # Задача остается активной, продолжение с курсора последней страницы
+                    log.warning(
+                        "Broadcast {id}: {error!r}, retry from cursor {cursor} in {delay:.1f}s",
+                        id=job.id,
+                        error=e,
+                        cursor=job.cursor,
+                        delay=backoff.next_delay,
+                    )
+                    await backoff.asleep()
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                # Остановка процесса: задача остается активной и будет продолжена
+                await self._release_lease(job.id)
+                raise
+            # Отмена из _keep_lease, не остановка процесса
+            asyncio.current_task().uncancel()
+        except Exception:
+            log.exception("Broadcast {id} failed", id=job.id)
+            job.status = "failed"
+        finally:
+            keeper.cancel()
+
+        # Задачу продолжает другой процесс с последнего сохраненного им курсора
+        if lease_lost.is_set() or not await self._checkpoint(job):
+            log.warning("Broadcast {id}: lease lost, stopped without checkpoint", id=job.id)
+            return
+
+        await self._redis.srem(self.active_key, job.id)
+        await self._release_lease(job.id)
+        log.info("Broadcast {id} finished with status {status}", id=job.id, status=job.status)
+
+    async def _send_pages(
+        self, job: BroadcastJob, users_api: UsersAPI, lease_lost: asyncio.Event
+    ) -> None:
+        """
+        Страницы пользователей после job.cursor; курсор сохраняется после каждой страницы.
+        """
+        async for users in users_api.iter_user_pages(
+            after=job.cursor,
+            page_size=env.broadcast_page_size,
+        ):
+            if not users:
+                continue
+            await self._send_page(job, [user.tg_id for user in users])
+            job.cursor = users[-1].tg_id
+            if not await self._checkpoint(job):
+                lease_lost.set()
+                return
+            self._recover_rate()
+            log.info(
+                "Broadcast {id}: sent {sent}, blocked {blocked}, failed {failed}",
+                id=job.id,
+                sent=job.sent,
+                blocked=job.blocked,
+                failed=job.failed,
+            )
+        job.status = "done"
+
+    async def _send_page(self, job: BroadcastJob, tg_ids: list[int]) -> None:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for tg_id in tg_ids:
+            queue.put_nowait(tg_id)
+
+        async def worker():
+            while not queue.empty():
+                await self._send(job, queue.get_nowait())
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(env.broadcast_concurrency, len(tg_ids))))
+        )
+
+    def _get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        key = str(chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=env.broadcast_chat_rate, capacity=1)
+            self._chat_buckets.set(key, bucket, ttl=60)
+        return bucket
+
+    def _recover_rate(self) -> None:
+        self._global_bucket.rate = min(env.broadcast_rate, self._global_bucket.rate + 1)
+        BROADCAST_RATE.set(self._global_bucket.rate)
+
+    async def _send(self, job: BroadcastJob, chat_id: int) -> None:
+        for _ in range(env.broadcast_max_retries + 1):
+            await self._global_bucket.acquire()
+            await self._get_chat_bucket(chat_id).acquire()
+            try:
+                await self._bot.copy_message(
+                    chat_id=chat_id,
+                    from_chat_id=job.from_chat_id,
+                    message_id=job.message_id,
+                )
+            except TelegramRetryAfter as e:
+                # Флуд-лимит относится ко всему боту: пауза и снижение общего темпа
+                BROADCAST_MESSAGES.inc(status="retry_after")
+                # Остальные воркеры получают 429 на запросы, отправленные до паузы:
+                # темп снижается один раз на паузу, а не на каждый ответ
+                if not self._global_bucket.paused:
+                    self._global_bucket.rate = max(
+                        env.broadcast_min_rate, self._global_bucket.rate / 2
+                    )
+                    BROADCAST_RATE.set(self._global_bucket.rate)
+                self._global_bucket.pause(e.retry_after)
+                continue
+            except TelegramForbiddenError:
+                BROADCAST_MESSAGES.inc(status="blocked")
+                job.blocked += 1
+                return
+            except TelegramAPIError as e:
+                BROADCAST_MESSAGES.inc(status="failed")
+                log.warning(
+                    "Broadcast send failed. Chat: {chat_id}. Error: {e}", chat_id=chat_id, e=e
+                )
+                job.failed += 1
+                return
+
+            BROADCAST_MESSAGES.inc(status="sent")
+            job.sent += 1
+            return
+
+        BROADCAST_MESSAGES.inc(status="failed")
+        job.failed += 1
+
+
+__all__ = (
+    "BroadcastJob",
+    "Broadcaster",
+)
@@ -0,0 +1,47 @@
+from aiogram import F, Router, filters, types
+from dishka.integrations.aiogram import FromDishka
+
+from core.filters import IsAdmin
+
+from .engine import Broadcaster
+
+
+router = Router()
+router.message.filter(IsAdmin())
+
+
+@router.message(filters.Command("broadcast"), F.reply_to_message)
+async def start_broadcast(msg: types.Message, broadcaster: FromDishka[Broadcaster]):
+    if msg.from_user is None or msg.reply_to_message is None:
+        raise ValueError("User or replied message is None")
+
+    job = await broadcaster.start(
+        admin_tg_id=msg.from_user.id,
+        from_chat_id=msg.chat.id,
+        message_id=msg.reply_to_message.message_id,
+    )
+    await msg.answer(f"Рассылка запущена. Статус: /broadcast_status {job.id}")
+
+
+@router.message(filters.Command("broadcast"))
+async def broadcast_help(msg: types.Message):
+    await msg.answer("Ответьте командой /broadcast на сообщение, которое нужно разослать")
+
+
+@router.message(filters.Command("broadcast_status"))
+async def broadcast_status(
+    msg: types.Message,
+    command: filters.CommandObject,
+    broadcaster: FromDishka[Broadcaster],
+):
+    job = await broadcaster.get_job(command.args or "")
+    if job is None:
+        await msg.answer("Рассылка не найдена")
+        return
+
+    await msg.answer(
+        f"Статус: {job.status}\n"
+        f"Отправлено: {job.sent}\n"
+        f"Заблокировали бота: {job.blocked}\n"
+        f"Ошибки: {job.failed}"
+    )
@@ -1,8 +1,95 @@
-from providers.api import API
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, Iterable
 
-from . import dtos
+from providers.batching import BatchLoader
+from providers.cache import CachePolicy
 
+from .generated_api import BaseUsersAPI, UsersGetMeOutDTO
 
-class UsersAPI(API):
-    async def get_me(self):
-        return await self.api_client.get("/users/me/", response_dto=dtos.UsersMeDTO)
+
+USERS_BATCH_MAX_SIZE = 1000  # Ограничение бэкенда на один запрос /users/batch/
+
+
+@dataclass
+class UsersAPI(BaseUsersAPI):
+    get_me_endpoint = replace(BaseUsersAPI.get_me_endpoint, timeout=3, cache=CachePolicy(ttl=30))
+    get_many_endpoint = replace(BaseUsersAPI.get_many_endpoint, timeout=10)
+    list_users_endpoint = replace(BaseUsersAPI.list_users_endpoint, timeout=15)
+
+    # Общий для процесса (APP scope): объединяет запросы разных апдейтов
+    users_loader: "UsersLoader | None" = field(default=None, repr=False)
+
+    async def get_many(
+        self,
+        tg_ids: Iterable[int],
+        create_missing: bool = False,
+    ) -> list[UsersGetMeOutDTO]:
+        """
+        Пользователи по любому числу tg_id, запросами по USERS_BATCH_MAX_SIZE.
+        """
+        tg_ids = list(tg_ids)
+        users: list[UsersGetMeOutDTO] = []
+        for start in range(0, len(tg_ids), USERS_BATCH_MAX_SIZE):
+            users.extend(
+                await super().get_many(tg_ids[start : start + USERS_BATCH_MAX_SIZE], create_missing)
+            )
+        return users
+
+    def iter_user_pages(
+        self,
+        after: int | None = None,
+        page_size: int = 500,
+    ) -> AsyncIterator[list[UsersGetMeOutDTO]]:
+        """
+        Пользователи с tg_id больше after страницами по возрастанию tg_id
+        (только для суперпользователя).
+        """
+        return self.api_client.iter_pages(
+            "/users/",
+            item_dto=UsersGetMeOutDTO,
+            params={"after": after} if after is not None else None,
+            page_size=page_size,
+            timeout=15,
+        )
+
+    def iter_users(self, page_size: int = 500) -> AsyncIterator[UsersGetMeOutDTO]:
+        return self.api_client.stream(
+            "/users/",
+            item_dto=UsersGetMeOutDTO,
+            page_size=page_size,
+            timeout=15,
+        )
+
+    async def get_user(self, tg_id: int) -> UsersGetMeOutDTO | None:
+        """
+        Одиночный запрос; конкурентные вызовы объединяются в один /users/batch/.
+        """
+        if self.users_loader is None:
+            users = await self.get_many([tg_id])
+            return users[0] if users else None
+        return await self.users_loader.load(self, tg_id)
+
+
+class UsersLoader:
+    """
+    Пакетная загрузка пользователей на процесс: одиночные get_user из разных апдейтов
+    в пределах API_BATCH_WINDOW уходят одним /users/batch/.
+
+    Эндпоинт доступен любому пользователю, поэтому пакет отправляется клиентом
+    последнего вызвавшего апдейта.
+    """
+
+    def __init__(self, window: float, max_batch_size: int) -> None:
+        self._loader: BatchLoader[int, UsersGetMeOutDTO] = BatchLoader(
+            self._load_users,
+            window=window,
+            max_batch_size=min(max_batch_size, USERS_BATCH_MAX_SIZE),
+        )
+        self._users_api: UsersAPI | None = None
+
+    async def load(self, users_api: UsersAPI, tg_id: int) -> UsersGetMeOutDTO | None:
+        self._users_api = users_api
+        return await self._loader.load(tg_id)
+
+    async def _load_users(self, tg_ids: list[int]) -> dict[int, UsersGetMeOutDTO]:
+        return {user.tg_id: user for user in await self._users_api.get_many(tg_ids)}
@@ -3,30 +3,91 @@ from typing import AsyncIterable
 from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY, EventContext
 from dishka import Provider, Scope, provide
 from dishka.integrations.aiogram import AiogramMiddlewareData
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Timeout
+from redis.asyncio import Redis
 
+from providers import env
 from providers.api import APIClient
+from providers.cache import ResponseCache
+from providers.resilience import APIResilience
 
-from .api import UsersAPI
+from .api import UsersAPI, UsersLoader
 
 
-provider = Provider(scope=Scope.REQUEST)
-provider.provide(UsersAPI)
+class UsersAPIProvider(Provider):
+    @provide(scope=Scope.APP)
+    def get_users_loader(self) -> UsersLoader:
+        return UsersLoader(window=env.api_batch_window, max_batch_size=env.api_batch_max_size)
+
+    @provide(scope=Scope.REQUEST)
+    def get_users_api(self, api_client: APIClient, users_loader: UsersLoader) -> UsersAPI:
+        return UsersAPI(api_client=api_client, users_loader=users_loader)
 
 
 class HTTPClientProvider(Provider):
-    @provide(scope=Scope.REQUEST)
+    """
+    Один пул соединений на процесс: keep-alive и HTTP/2 переиспользуются между апдейтами.
+    Закрывается вместе с контейнером при остановке диспетчера.
+    """
+
+    @provide(scope=Scope.APP)
     async def get_http_client(self) -> AsyncIterable[AsyncClient]:
-        client = AsyncClient()
+        client = AsyncClient(
+            limits=Limits(
+                max_connections=env.http_max_connections,
+                max_keepalive_connections=env.http_max_keepalive_connections,
+                keepalive_expiry=env.http_keepalive_expiry,
+            ),
+            timeout=Timeout(
+                env.http_read_timeout,
+                connect=env.http_connect_timeout,
+                pool=env.http_pool_timeout,
+            ),
+            http2=env.http2,
+        )
         yield client
         await client.aclose()
 
 
+class ResponseCacheProvider(Provider):
+    @provide(scope=Scope.APP)
+    async def get_response_cache(self) -> AsyncIterable[ResponseCache]:
+        redis = Redis.from_url(env.redis_cache_dsn) if env.api_cache_redis else None
+        yield ResponseCache(
+            max_size=env.api_cache_max_size,
+            redis=redis,
+            etag_ttl=env.api_cache_etag_ttl,
+        )
+        if redis is not None:
+            await redis.aclose()
+
+
+class APIResilienceProvider(Provider):
+    """
+    Размыкатели цепи и лимит одновременных запросов общие для всех апдейтов процесса.
+    """
+
+    @provide(scope=Scope.APP)
+    def get_api_resilience(self) -> APIResilience:
+        return APIResilience(
+            max_concurrency=env.api_max_concurrency,
+            acquire_timeout=env.api_acquire_timeout,
+            failure_threshold=env.api_circuit_failure_threshold,
+            recovery_timeout=env.api_circuit_recovery_timeout,
+            retries=env.api_retries,
+            backoff_base=env.api_backoff_base,
+            backoff_max=env.api_backoff_max,
+            hedge_delay=env.api_hedge_delay,
+        )
+
+
 class APIClientProvider(Provider):
     @provide(scope=Scope.REQUEST)
     def get_api_client(
         self,
         http_client: AsyncClient,
+        response_cache: ResponseCache,
+        resilience: APIResilience,
         middleware_data: AiogramMiddlewareData,
     ) -> APIClient:
         event_context: EventContext = middleware_data[EVENT_CONTEXT_KEY]
@@ -37,4 +98,6 @@ class APIClientProvider(Provider):
         return APIClient(
             tg_id=user_id,
             http_client=http_client,
+            cache=response_cache,
+            resilience=resilience,
         )
@@ -1,6 +0,0 @@
-from pydantic import BaseModel
-
-
-class UsersMeDTO(BaseModel):
-    tg_id: int
-    is_superuser: bool
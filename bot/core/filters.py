@@ -1,10 +1,12 @@
 from aiogram import filters, types
-from dishka.integrations.aiogram import FromDishka
+from dishka.integrations.aiogram import FromDishka, inject
 
 from .api import UsersAPI
 
 
 class IsAdmin(filters.BaseFilter):
+    # Фильтры не проходят через auto_inject диспетчера, поэтому inject явно
+    @inject
     async def __call__(
         self,
         message: types.Message,
@@ -14,5 +16,6 @@ class IsAdmin(filters.BaseFilter):
         if user is None:
             raise ValueError("User is None")
 
-        data = await users_api_client.get_me()
-        return data.is_superuser
+        # Проверки разных апдейтов объединяются в один /users/batch/
+        data = await users_api_client.get_user(user.id)
+        return data is not None and data.is_superuser
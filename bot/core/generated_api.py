@@ -0,0 +1,90 @@
+# Сгенерировано app/api_codegen.py из core/openapi.json, не редактировать вручную.
+# Обновление: make api-codegen, проверка расхождения с бэкендом: make api-check
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from providers.api import API, Endpoint
+
+
+# ===============
+# DTO
+# ===============
+
+
+class UsersGetMeOutDTO(BaseModel):
+    # Экземпляры разделяются между обработчиками через кэш, поэтому неизменяемые
+    model_config = ConfigDict(frozen=True)
+
+    tg_id: int
+    is_superuser: bool
+
+
+class UsersPageOutDTO(BaseModel):
+    # Экземпляры разделяются между обработчиками через кэш, поэтому неизменяемые
+    model_config = ConfigDict(frozen=True)
+
+    items: list[UsersGetMeOutDTO]
+    next_after: int | None = Field(None, description="tg_id для запроса следующей страницы")
+
+
+# ===============
+# API
+# ===============
+
+
+@dataclass
+class BaseUsersAPI(API):
+    """
+    Методы API по OpenAPI схеме бэкенда. timeout и cache операций задаются
+    в наследнике заменой *_endpoint через dataclasses.replace.
+    """
+
+    list_users_endpoint: ClassVar[Endpoint[UsersPageOutDTO]] = Endpoint(
+        "GET",
+        "/users/",
+        UsersPageOutDTO,
+    )
+    get_many_endpoint: ClassVar[Endpoint[list[UsersGetMeOutDTO]]] = Endpoint(
+        "POST",
+        "/users/batch/",
+        list[UsersGetMeOutDTO],
+    )
+    get_me_endpoint: ClassVar[Endpoint[UsersGetMeOutDTO]] = Endpoint(
+        "GET",
+        "/users/me/",
+        UsersGetMeOutDTO,
+    )
+
+    async def list_users(self, after: int | None = None, limit: int = 100) -> UsersPageOutDTO:
+        """
+        Keyset-пагинация по tg_id: страница после указанного tg_id, без OFFSET.
+        """
+        params = {"limit": limit}
+        if after is not None:
+            params["after"] = after
+        return await self.api_client.call(self.list_users_endpoint, params=params)
+
+    async def get_many(
+        self,
+        tg_ids: list[int],
+        create_missing: bool = False,
+    ) -> list[UsersGetMeOutDTO]:
+        """
+        Пользователи по списку tg_id одним запросом.
+        create_missing: создать отсутствующих пользователей (одним bulk insert).
+        """
+        json = {"tg_ids": tg_ids, "create_missing": create_missing}
+        return await self.api_client.call(self.get_many_endpoint, json=json)
+
+    async def get_me(self) -> UsersGetMeOutDTO:
+        return await self.api_client.call(self.get_me_endpoint)
+
+
+__all__ = (
+    "BaseUsersAPI",
+    "UsersGetMeOutDTO",
+    "UsersPageOutDTO",
+)
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Literal, Sequence
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY, EventContext
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import TelegramObject, Update
+
+from providers import metrics
+from providers.cache import TTLCache
+from providers.logger import logger as log
+from providers.throttling import Bucket, Limit, ThrottleStore
+from providers.tracing import start_span
+
+
+THROTTLED_UPDATES = metrics.Counter(
+    "bot_throttled_updates_total",
+    "Updates over a throttling limit by limit scope and action taken",
+    labelnames=("scope", "action"),
+)
+
+ThrottleAction = Literal["drop", "delay", "reply"]
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Span на каждый апдейт; запросы к API внутри обработки становятся его дочерними span.
+    Регистрируется как outer middleware на dp.update.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        with start_span(f"update {event.event_type}", update_id=event.update_id) as span:
+            result = await handler(event, data)
+            if span is not None:
+                event_context = data.get(EVENT_CONTEXT_KEY)
+                if event_context is not None:
+                    span.set_attribute("chat_id", event_context.chat_id)
+                    span.set_attribute("user_id", event_context.user_id)
+                span.set_attribute("handled", result is not UNHANDLED)
+            return result
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты апдейтов на пользователя, чат и общее (token bucket в ThrottleStore).
+    Регистрируется как outer middleware на dp.update: апдейт отбрасывается до диалогов,
+    обработчиков и запросов к бэкенду.
+
+    Апдейт сверх лимита:
+    - drop: отбрасывается
+    - delay: ждет токен не дольше max_delay секунд, затем отбрасывается
+    - reply: отбрасывается, пользователю отвечают reply_text не чаще раза в reply_interval
+      секунд (ответы сами расходуют лимиты Telegram, поэтому не на каждый апдейт)
+    Апдейты без пользователя и чата не ограничиваются.
+    """
+
+    def __init__(
+        self,
+        store: ThrottleStore,
+        limits: Sequence[Limit],
+        action: ThrottleAction = "drop",
+        max_delay: float = 2.0,
+        reply_text: str = "",
+        reply_interval: float = 10.0,
+    ) -> None:
+        if action not in ("drop", "delay", "reply"):
+            raise ValueError(f"Unknown throttle action: {action}")
+        self._store = store
+        self._limits = limits
+        self._action = action
+        self._max_delay = max_delay
+        self._reply_text = reply_text
+        self._reply_interval = reply_interval
+        self._replied = TTLCache(max_size=100_000)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        event_context: EventContext | None = data.get(EVENT_CONTEXT_KEY)
+        if not isinstance(event, Update) or event_context is None:
+            return await handler(event, data)
+
+        buckets = self._buckets(event_context)
+        if not buckets:
+            return await handler(event, data)
+
+        denial = await self._store.acquire(buckets)
+        if denial is None:
+            return await handler(event, data)
+
+        scope, _ = denial
+        if self._action == "delay":
+            deadline = time.monotonic() + self._max_delay
+            while denial is not None and time.monotonic() + denial[1] <= deadline:
+                await asyncio.sleep(denial[1])
+                denial = await self._store.acquire(buckets)
+            if denial is None:
+                THROTTLED_UPDATES.inc(scope=scope, action="delay")
+                return await handler(event, data)
+            THROTTLED_UPDATES.inc(scope=denial[0], action="drop")
+            return None
+
+        if self._action == "reply" and await self._reply(event, event_context, data["bot"]):
+            THROTTLED_UPDATES.inc(scope=scope, action="reply")
+        else:
+            THROTTLED_UPDATES.inc(scope=scope, action="drop")
+        return None
+
+    def _buckets(self, event_context: EventContext) -> list[Bucket]:
+        ids = {"user": event_context.user_id, "chat": event_context.chat_id, "global": ""}
+        return [
+            (f"{limit.scope}:{ids[limit.scope]}", limit)
+            for limit in self._limits
+            if ids[limit.scope] is not None
+        ]
+
+    async def _reply(self, event: Update, event_context: EventContext, bot: Bot) -> bool:
+        key = str(event_context.user_id or event_context.chat_id)
+        if self._replied.get(key) is not None:
+            return False
+        self._replied.set(key, True, ttl=self._reply_interval)
+
+        try:
+            if event.callback_query is not None:
+                await bot.answer_callback_query(event.callback_query.id, text=self._reply_text)
+            elif event_context.chat_id is not None:
+                await bot.send_message(event_context.chat_id, self._reply_text)
+            else:
+                return False
+        except TelegramAPIError as e:
+            log.warning("Throttle reply failed: {error}", error=e)
+            return False
+        return True
+
+
+__all__ = (
+    "ThrottlingMiddleware",
+    "TracingMiddleware",
+)
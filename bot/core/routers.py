@@ -0,0 +1,116 @@
+from typing import Any, Iterable
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import TelegramObject
+from aiogram_dialog import DialogManager
+from aiogram_dialog.api.entities import Context, Data, LaunchMode, NewMessage
+from aiogram_dialog.api.internal import CONTEXT_KEY
+from aiogram_dialog.api.protocols import DialogProtocol
+from dishka.integrations.aiogram import inject_router
+
+from lib.imports import import_object
+
+
+async def _placeholder(*args: Any, **kwargs: Any) -> Any:
+    return UNHANDLED
+
+
+class LazyRouter(Router):
+    """
+    Роутер, модуль которого импортируется при первом дошедшем до него апдейте.
+
+    До импорта типы апдейтов роутера (update_types) нужны для allowed_updates:
+    на них регистрируются пустые обработчики, при импорте они заменяются роутером модуля.
+    Роутер модуля не получает startup/shutdown диспетчера: к этому моменту они уже прошли.
+    """
+
+    def __init__(self, path: str, update_types: Iterable[str]) -> None:
+        super().__init__(name=path)
+        self.path = path
+        self._router: Router | None = None
+        for update_type in update_types:
+            self.observers[update_type].register(_placeholder)
+
+    @property
+    def router(self) -> Router:
+        if self._router is None:
+            router = import_object(self.path)
+            for observer in self.observers.values():
+                observer.handlers.clear()
+            self.include_router(router)
+            # auto_inject диспетчера (setup_dishka) обходит роутеры только при старте
+            inject_router(router)
+            self._router = router
+        return self._router
+
+    async def propagate_event(self, update_type: str, event: TelegramObject, **kwargs: Any) -> Any:
+        _ = self.router
+        return await super().propagate_event(update_type, event, **kwargs)
+
+
+class LazyDialog(LazyRouter, DialogProtocol):
+    """
+    Диалог aiogram_dialog, модуль которого импортируется при первом старте диалога
+    или первом апдейте в его контексте. states - путь к StatesGroup диалога:
+    по нему диалог находит реестр aiogram_dialog без импорта модуля.
+    """
+
+    # Обработчики, которые регистрирует Dialog
+    UPDATE_TYPES = ("business_message", "callback_query", "message")
+
+    def __init__(self, path: str, states: str) -> None:
+        super().__init__(path, update_types=self.UPDATE_TYPES)
+        self._states_group: type[StatesGroup] = import_object(states)
+
+    @property
+    def dialog(self) -> DialogProtocol:
+        return self.router  # type: ignore[return-value]
+
+    async def propagate_event(self, update_type: str, event: TelegramObject, **kwargs: Any) -> Any:
+        # Все обработчики Dialog отфильтрованы по группе состояний текущего контекста
+        context: Context | None = kwargs.get(CONTEXT_KEY)
+        if context is None or context.state.group != self._states_group:
+            return UNHANDLED
+        return await super().propagate_event(update_type, event, **kwargs)
+
+    # ===============
+    # DialogProtocol
+    # ===============
+
+    @property
+    def launch_mode(self) -> LaunchMode:
+        return self.dialog.launch_mode
+
+    def states_group_name(self) -> str:
+        return self._states_group.__full_group_name__
+
+    def states(self) -> list[State]:
+        return self.dialog.states()
+
+    def states_group(self) -> type[StatesGroup]:
+        return self._states_group
+
+    async def process_close(self, result: Any, manager: DialogManager) -> None:
+        await self.dialog.process_close(result, manager)
+
+    async def process_start(
+        self, manager: DialogManager, start_data: Data, state: State | None = None
+    ) -> None:
+        await self.dialog.process_start(manager, start_data, state)
+
+    async def process_result(self, start_data: Data, result: Any, manager: DialogManager) -> None:
+        await self.dialog.process_result(start_data, result, manager)
+
+    def find(self, widget_id: str) -> Any:
+        return self.dialog.find(widget_id)
+
+    async def load_data(self, manager: DialogManager) -> dict:
+        return await self.dialog.load_data(manager)
+
+    async def render(self, manager: DialogManager) -> NewMessage:
+        return await self.dialog.render(manager)
+
+
+__all__ = ("LazyDialog", "LazyRouter")
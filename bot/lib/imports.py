@@ -0,0 +1,15 @@
+from importlib import import_module
+from typing import Any
+
+
+def import_object(path: str) -> Any:
+    """
+    Объект по пути вида "package.module:attribute".
+    """
+    module_path, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"Import path must be in 'module:attribute' format, got {path!r}")
+    return getattr(import_module(module_path), attribute)
+
+
+__all__ = ("import_object",)
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, накапливается не больше capacity.
+    Ожидающие acquire обслуживаются по очереди (FIFO).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def paused(self) -> bool:
+        return time.monotonic() < self._paused_until
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+
+        self._refill(now)
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """
+        Через сколько секунд будут доступны tokens токенов (0 - уже доступны), без списания.
+        """
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now + tokens / self.rate
+
+        self._refill(now)
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                else:
+                    await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Запрет выдачи токенов на seconds секунд (например, по RetryAfter от Telegram).
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+        # Токены начинают копиться только после паузы
+        self._updated_at = self._paused_until
@@ -1,12 +1,28 @@
+import asyncio
 from dataclasses import dataclass, field
-import hmac
-from typing import Any, TypeVar, overload
-
-from httpx import AsyncClient, Auth, NetworkError, Request, Response
-from pydantic import BaseModel
-
-from providers import env
+from functools import lru_cache, partial
+import json
+import time
+from typing import Any, AsyncIterator, Generic, Iterable, TypeVar, overload
+from urllib.parse import urlencode
+
+from httpx import (
+    USE_CLIENT_DEFAULT,
+    AsyncClient,
+    Auth,
+    Request,
+    Response,
+    TimeoutException,
+    TransportError,
+)
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from providers import env, metrics
+from providers.cache import CachePolicy, ResponseCache
 from providers.logger import logger as log
+from providers.resilience import APIResilience
+from providers.signing import signer
+from providers.tracing import TRACEPARENT_HEADER, start_span
 
 
 @dataclass
@@ -26,6 +42,24 @@ class APIUnavailableError(APIError):
     """
 
 
+class APITimeoutError(APIUnavailableError):
+    """
+    API не ответило за отведенное время.
+    """
+
+
+class APICircuitOpenError(APIUnavailableError):
+    """
+    Цепь разомкнута после серии ошибок: запрос отклонен без обращения к API.
+    """
+
+
+class APIOverloadedError(APIUnavailableError):
+    """
+    Слишком много одновременных запросов к API: слот не освободился вовремя.
+    """
+
+
 @dataclass
 class APIInvalidStatusCodeError(APIError):
     status_code: int
@@ -33,20 +67,79 @@ class APIInvalidStatusCodeError(APIError):
 
 
 DTO = TypeVar("DTO", bound=BaseModel)
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class PageDTO(BaseModel, Generic[DTO]):
+    """
+    Страница keyset-пагинации: next_after передается в параметр after следующего запроса.
+    """
+
+    items: list[DTO]
+    next_after: int | None = None
+
+
+API_REQUEST_DURATION = metrics.Histogram(
+    "bot_api_request_duration_seconds",
+    "Backend API request duration by phase (network, decode, validate)",
+    labelnames=("path", "status", "phase"),
+)
+API_REQUESTS_IN_FLIGHT = metrics.Gauge(
+    "bot_api_requests_in_flight",
+    "Backend API requests in flight",
+    labelnames=("path",),
+)
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_dto: type[DTO]) -> TypeAdapter[DTO]:
+    """
+    TypeAdapter строится (с компиляцией валидатора) один раз на DTO.
+    """
+    return TypeAdapter(response_dto)
+
+
+@dataclass(frozen=True, slots=True)
+class Endpoint(Generic[T]):
+    """
+    Операция API, собранная один раз при импорте: шаблон пути (он же метка метрик и
+    размыкателя цепи), готовый URL и TypeAdapter ответа с уже скомпилированным валидатором.
+    Описания генерируются app/api_codegen.py, timeout и cache задаются через dataclasses.replace.
+    """
+
+    method: str
+    path: str
+    response_type: Any = None
+    timeout: float | None = None
+    cache: CachePolicy | None = None
+    url: str = field(init=False)
+    adapter: TypeAdapter[T] | None = field(init=False)
+
+    def __post_init__(self) -> None:
+        if self.cache is not None and (self.method != "GET" or not _is_model(self.response_type)):
+            raise ValueError(f"Only GET endpoints returning a model can be cached: {self.path}")
+
+        object.__setattr__(self, "url", f"{env.api_base_url}{self.path}")
+        object.__setattr__(
+            self,
+            "adapter",
+            None if self.response_type is None else get_type_adapter(self.response_type),
+        )
+
+
+def _is_model(response_type: Any) -> bool:
+    return isinstance(response_type, type) and issubclass(response_type, BaseModel)
 
 
 class TelegramHMACAuth(Auth):
-    def __init__(self, tg_id: int, secret_key: str) -> None:
-        self._auth_header = self._make_header(tg_id, secret_key)
+    def __init__(self, tg_id: int) -> None:
+        self._auth_header = self._make_header(tg_id)
 
     @staticmethod
-    def _make_header(tg_id: int, secret_key: str) -> str:
-        signature = hmac.new(
-            key=secret_key.encode(),
-            msg=str(tg_id).encode(),
-            digestmod="sha256",
-        ).hexdigest()
-        return f"Bearer {tg_id}:{signature}"
+    def _make_header(tg_id: int) -> str:
+        return f"Bearer {tg_id}:{signer.sign(tg_id)}"
 
     def auth_flow(self, request: Request):
         request.headers["Authorization"] = self._auth_header
@@ -104,62 +197,279 @@ class ResponseProcessor:
         )
         raise APIEmptyResponseError(path=path)
 
+    @staticmethod
+    def _decode_error_data(path: str, response: Response) -> dict | None:
+        with API_REQUEST_DURATION.time(path=path, status=response.status_code, phase="decode"):
+            try:
+                return json.loads(response.content)
+            except ValueError:
+                return None
+
     @classmethod
     def process_response(
         cls,
         path: str,
         response_dto: type[DTO] | None,
         response: Response,
+        adapter: TypeAdapter | None = None,
     ) -> DTO | None:
-        try:
-            data = response.json()
-        except ValueError:
-            return cls._process_empty_response(
-                path=path,
-                response_dto=response_dto,
+        """
+        Успешный ответ валидируется сразу из байтов, без промежуточного dict.
+        Тело ответа с ошибкой разбирается только на этом (редком) пути.
+        adapter: готовый TypeAdapter response_dto (из Endpoint).
+        """
+        # Вместо response.is_success: сравнение дешевле на пути маленьких ответов
+        status_code = response.status_code
+        if not 200 <= status_code < 300:
+            return cls._process_unsuccessful_response(
                 response=response,
+                path=path,
+                data=cls._decode_error_data(path, response),
             )
 
-        if not response.is_success:
-            return cls._process_unsuccessful_response(response=response, path=path, data=data)
-
         if response_dto is None:
             return None
 
-        return response_dto.model_validate(data)
+        content = response.content
+        if not content:
+            return cls._process_empty_response(
+                path=path, response_dto=response_dto, response=response
+            )
+
+        # Фаза validate здесь включает и декодирование JSON
+        with API_REQUEST_DURATION.time(path=path, status=status_code, phase="validate"):
+            try:
+                if adapter is None:
+                    adapter = get_type_adapter(response_dto)
+                return adapter.validate_json(content)
+            except ValidationError as e:
+                if e.errors(include_url=False)[0]["type"] != "json_invalid":
+                    raise
+
+        return cls._process_empty_response(path=path, response_dto=response_dto, response=response)
 
 
 @dataclass
 class APIClient:
     tg_id: int
     http_client: AsyncClient
-
-    async def _make_request(
+    cache: ResponseCache | None = None
+    resilience: APIResilience | None = None
+    _auth: TelegramHMACAuth = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._auth = TelegramHMACAuth(self.tg_id)
+
+    def _make_cache_key(self, path: str, params: dict | None = None) -> str:
+        if not params:
+            return f"{self.tg_id}:{path}"
+        return f"{self.tg_id}:{path}?{urlencode(sorted(params.items()))}"
+
+    async def invalidate(self, path: str, params: dict | None = None) -> None:
+        """
+        Сброс закэшированного ответа текущего пользователя.
+        """
+        if self.cache is not None:
+            await self.cache.invalidate(self._make_cache_key(path, params))
+
+    async def _send(self, method: str, path: str, **kwargs) -> Response:
+        """
+        Запрос с учетом размыкателя цепи пути.
+        GET повторяется с экспоненциальной задержкой при недоступности API или ответе 502/503/504,
+        а при заданном hedge_delay дублируется, если первый запрос отвечает слишком долго.
+        """
+        resilience = self.resilience
+        if resilience is None:
+            return await self._send_once(method, path, **kwargs)
+
+        attempts = 1 + resilience.retries if method == "GET" else 1
+        for attempt in range(1, attempts):
+            try:
+                response = await self._send_attempt(method, path, **kwargs)
+            except (APICircuitOpenError, APIOverloadedError):
+                # Повтор только увеличит нагрузку
+                raise
+            except APIUnavailableError:
+                pass
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+
+            await asyncio.sleep(resilience.backoff(attempt))
+
+        return await self._send_attempt(method, path, **kwargs)
+
+    async def _send_attempt(self, method: str, path: str, **kwargs) -> Response:
+        if not self.resilience.get_breaker(path).allow():
+            log.warning("Circuit is open, request rejected. Path: {path}", path=path)
+            raise APICircuitOpenError(path=path)
+
+        if method == "GET" and self.resilience.hedge_delay > 0:
+            return await self._send_hedged(method, path, **kwargs)
+        return await self._send_once(method, path, **kwargs)
+
+    async def _send_hedged(self, method: str, path: str, **kwargs) -> Response:
+        """
+        Если ответ не пришел за hedge_delay, отправляется второй такой же запрос;
+        используется первый успешный ответ, оставшийся запрос отменяется.
+        """
+        pending = {asyncio.ensure_future(self._send_once(method, path, **kwargs))}
+        error: BaseException | None = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.resilience.hedge_delay)
+            if not done:
+                pending.add(asyncio.ensure_future(self._send_once(method, path, **kwargs)))
+
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send_once(
         self,
         method: str,
         path: str,
-        response_dto: type[DTO] | None = None,
+        timeout: float | None = None,
+        url: str | None = None,
         **kwargs,
-    ):
-        url = f"{env.api_base_url}{path}"
+    ) -> Response:
+        """
+        path: метка метрик и размыкателя цепи; url (если не передан, строится из path).
+        """
+        resilience = self.resilience
+        if resilience is not None and not await resilience.acquire():
+            log.error("Too many concurrent requests. Path: {path}", path=path)
+            raise APIOverloadedError(path=path)
+
+        if url is None:
+            url = f"{env.api_base_url}{path}"
+        API_REQUESTS_IN_FLIGHT.inc(path=path)
+        started = time.perf_counter()
         try:
-            response = await self.http_client.request(
+            response = await self._request(
                 method,
                 url,
-                timeout=10,
-                auth=TelegramHMACAuth(self.tg_id, env.secret_key),
+                path=path,
+                auth=self._auth,
+                timeout=USE_CLIENT_DEFAULT if timeout is None else timeout,
                 **kwargs,
             )
-        except NetworkError as e:
+        except TimeoutException as e:
+            self._on_transport_error(path, started, status="timeout")
+            log.error("Timeout while request. Path: {path}", path=path)
+            raise APITimeoutError(path=path) from e
+        except TransportError as e:
+            self._on_transport_error(path, started, status="network_error")
             log.error("NetworkError while request. Path: {path}", path=path)
             raise APIUnavailableError(path=path) from e
+        finally:
+            API_REQUESTS_IN_FLIGHT.dec(path=path)
+            if resilience is not None:
+                resilience.release()
+
+        API_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            path=path,
+            status=response.status_code,
+            phase="network",
+        )
+        if resilience is not None:
+            breaker = resilience.get_breaker(path)
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        path: str,
+        headers: dict | None = None,
+        **kwargs,
+    ) -> Response:
+        """
+        HTTP запрос в дочернем span; контекст трейса передается бэкенду в заголовке traceparent.
+        """
+        if not env.tracing_enabled:
+            return await self.http_client.request(method, url, headers=headers, **kwargs)
+
+        with start_span(f"{method} {path}", tg_id=self.tg_id) as span:
+            if span is not None:
+                headers = {**(headers or {}), TRACEPARENT_HEADER: span.traceparent}
+            response = await self.http_client.request(method, url, headers=headers, **kwargs)
+            if span is not None:
+                span.set_attribute("status_code", response.status_code)
+            return response
+
+    def _on_transport_error(self, path: str, started: float, status: str) -> None:
+        API_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            path=path,
+            status=status,
+            phase="network",
+        )
+        if self.resilience is not None:
+            self.resilience.get_breaker(path).record_failure()
 
+    async def _make_request(
+        self,
+        method: str,
+        path: str,
+        response_dto: type[DTO] | None = None,
+        **kwargs,
+    ):
+        response = await self._send(method, path, **kwargs)
         return ResponseProcessor.process_response(
             path=path,
             response_dto=response_dto,
             response=response,
         )
 
+    async def _make_conditional_get(
+        self,
+        cache: ResponseCache,
+        key: str,
+        path: str,
+        response_dto: type[DTO],
+        headers: dict | None = None,
+        params: dict | None = None,
+        timeout: float | None = None,
+        url: str | None = None,
+        adapter: TypeAdapter | None = None,
+    ) -> DTO:
+        """
+        GET с If-None-Match по сохраненному ETag: на 304 возвращается ранее полученный DTO.
+        """
+        revalidation = cache.get_revalidation(key)
+        if revalidation is not None:
+            headers = {**(headers or {}), "If-None-Match": revalidation[0]}
+
+        response = await self._send(
+            "GET", path, params=params, headers=headers, timeout=timeout, url=url
+        )
+        if response.status_code == 304 and revalidation is not None:
+            return revalidation[1]
+
+        value = ResponseProcessor.process_response(
+            path=path,
+            response_dto=response_dto,
+            response=response,
+            adapter=adapter,
+        )
+        etag = response.headers.get("ETag")
+        if etag is not None:
+            cache.remember_etag(key, etag, value)
+        return value
+
     # ===============
     # GET Request
     # ===============
@@ -172,6 +482,8 @@ class APIClient:
         response_dto: type[DTO],
         headers: dict | None = None,
         params: dict | None = None,
+        cache: CachePolicy | None = None,
+        timeout: float | None = None,
     ) -> DTO: ...
 
     @overload
@@ -182,6 +494,8 @@ class APIClient:
         response_dto: None = None,
         headers: dict | None = None,
         params: dict | None = None,
+        cache: CachePolicy | None = None,
+        timeout: float | None = None,
     ) -> None: ...
 
     async def get(
@@ -191,15 +505,99 @@ class APIClient:
         response_dto: type[DTO] | None = None,
         headers: dict | None = None,
         params: dict | None = None,
+        cache: CachePolicy | None = None,
+        timeout: float | None = None,
     ) -> Any:
-        return await self._make_request(
-            method="GET",
-            path=path,
-            params=params,
+        if cache is None:
+            cache = getattr(response_dto, "cache_policy", None)
+        if self.cache is None or cache is None or response_dto is None:
+            return await self._make_request(
+                method="GET",
+                path=path,
+                params=params,
+                response_dto=response_dto,
+                headers=headers,
+                timeout=timeout,
+            )
+
+        key = self._make_cache_key(path, params)
+        return await self.cache.get_or_fetch(
+            key=key,
+            policy=cache,
             response_dto=response_dto,
-            headers=headers,
+            fetch=partial(
+                self._make_conditional_get,
+                self.cache,
+                key,
+                path,
+                response_dto,
+                headers=headers,
+                params=params,
+                timeout=timeout,
+            ),
         )
 
+    # ===============
+    # Paginated GET
+    # ===============
+
+    async def iter_pages(
+        self,
+        path: str,
+        *,
+        item_dto: type[DTO],
+        params: dict | None = None,
+        page_size: int = 100,
+        timeout: float | None = None,
+    ) -> AsyncIterator[list[DTO]]:
+        """
+        Постраничный обход keyset-пагинации.
+        Следующая страница запрашивается, пока обрабатывается текущая;
+        в памяти одновременно не больше двух страниц.
+        """
+        page_dto = PageDTO[item_dto]
+        params = {**(params or {}), "limit": page_size}
+
+        next_page: asyncio.Future | None = asyncio.ensure_future(
+            self.get(path, response_dto=page_dto, params=params, timeout=timeout)
+        )
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+                if page.next_after is not None:
+                    next_page = asyncio.ensure_future(
+                        self.get(
+                            path,
+                            response_dto=page_dto,
+                            params={**params, "after": page.next_after},
+                            timeout=timeout,
+                        )
+                    )
+                yield page.items
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def stream(
+        self,
+        path: str,
+        *,
+        item_dto: type[DTO],
+        params: dict | None = None,
+        page_size: int = 100,
+        timeout: float | None = None,
+    ) -> AsyncIterator[DTO]:
+        async for items in self.iter_pages(
+            path,
+            item_dto=item_dto,
+            params=params,
+            page_size=page_size,
+            timeout=timeout,
+        ):
+            for item in items:
+                yield item
+
     # ===============
     # POST Request
     # ===============
@@ -212,6 +610,8 @@ class APIClient:
         response_dto: type[DTO],
         headers: dict | None = None,
         json: dict | None = None,
+        invalidates: Iterable[str] = (),
+        timeout: float | None = None,
     ) -> DTO: ...
 
     @overload
@@ -222,6 +622,8 @@ class APIClient:
         response_dto: None = None,
         headers: dict | None = None,
         json: dict | None = None,
+        invalidates: Iterable[str] = (),
+        timeout: float | None = None,
     ) -> None: ...
 
     async def post(
@@ -231,13 +633,78 @@ class APIClient:
         response_dto: type[DTO] | None = None,
         headers: dict | None = None,
         json: dict | None = None,
+        invalidates: Iterable[str] = (),
+        timeout: float | None = None,
     ) -> Any:
-        return await self._make_request(
+        """
+        invalidates: пути, закэшированные ответы которых устаревают после записи.
+        POST не повторяется автоматически: запрос не идемпотентен.
+        """
+        result = await self._make_request(
             method="POST",
             path=path,
             response_dto=response_dto,
             json=json,
             headers=headers,
+            timeout=timeout,
+        )
+        for invalidated_path in invalidates:
+            await self.invalidate(invalidated_path)
+        return result
+
+    # ===============
+    # Endpoint Request
+    # ===============
+
+    async def call(
+        self,
+        endpoint: Endpoint[T],
+        path_params: dict | None = None,
+        params: dict | None = None,
+        json: Any = None,
+    ) -> T:
+        """
+        Запрос по готовому описанию операции (сгенерированные методы core/generated_api.py):
+        без разбора перегрузок, поиска TypeAdapter и сборки URL на каждый вызов.
+        """
+        if path_params:
+            path = endpoint.path.format_map(path_params)
+            url = f"{env.api_base_url}{path}"
+        else:
+            path, url = endpoint.path, endpoint.url
+
+        if endpoint.cache is not None and self.cache is not None:
+            key = self._make_cache_key(path, params)
+            return await self.cache.get_or_fetch(
+                key=key,
+                policy=endpoint.cache,
+                response_dto=endpoint.response_type,
+                fetch=partial(
+                    self._make_conditional_get,
+                    self.cache,
+                    key,
+                    endpoint.path,
+                    endpoint.response_type,
+                    params=params,
+                    timeout=endpoint.timeout,
+                    url=url,
+                    adapter=endpoint.adapter,
+                ),
+            )
+
+        response = await self._send(
+            endpoint.method,
+            endpoint.path,
+            url=url,
+            params=params,
+            json=json,
+            timeout=endpoint.timeout,
+        )
+        return ResponseProcessor.process_response(
+            path=endpoint.path,
+            response_dto=endpoint.response_type,
+            response=response,
+            adapter=endpoint.adapter,
         )
 
 
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Объединение одиночных загрузок в пакеты (в стиле DataLoader).
+
+    Ключи, запрошенные в течение window секунд, загружаются одним вызовом batch_fn.
+    Одинаковые ключи в пределах пакета загружаются один раз.
+    Ключ, отсутствующий в ответе batch_fn, резолвится в None.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[K]], Awaitable[dict[K, V]]],
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        self._batch_fn = batch_fn
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: dict[K, asyncio.Future[V | None]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self._max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._dispatch)
+
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+        try:
+            result = await self._batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(result.get(key))
+
+
+__all__ = ("BatchLoader",)
@@ -1,8 +1,16 @@
+from functools import lru_cache
+
 from aiogram import Bot
 
 from . import env
 
 
-bot = Bot(token=env.bot_token)
+@lru_cache(1)
+def get_bot() -> Bot:
+    """
+    Bot создается при первом обращении, а не при импорте.
+    """
+    return Bot(token=env.bot_token)
+
 
-__all__ = ("bot",)
+__all__ = ("get_bot",)
@@ -0,0 +1,180 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from providers.logger import logger as log
+
+
+DTO = TypeVar("DTO", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Политика кэширования ответа API.
+    Объявляется на эндпоинте (APIClient.get(cache=...)) или на DTO (атрибут cache_policy).
+    """
+
+    ttl: float
+    shared: bool = True  # Кэшировать также в Redis (общий уровень для всех процессов бота)
+
+
+class TTLCache:
+    """
+    In-process LRU с TTL на запись.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class ResponseCache:
+    """
+    Двухуровневый кэш ответов API: in-process LRU + Redis.
+    Одновременные одинаковые запросы объединяются в один (single flight).
+    После истечения TTL ответ с ETag хранится еще etag_ttl секунд для условных запросов.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        redis: Redis | None = None,
+        prefix: str = "api_cache:",
+        etag_ttl: float = 3600,
+    ) -> None:
+        self._memory = TTLCache(max_size)
+        self._etags = TTLCache(max_size)
+        self._etag_ttl = etag_ttl
+        self._redis = redis
+        self._prefix = prefix
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def get_revalidation(self, key: str) -> tuple[str, Any] | None:
+        """
+        (ETag, значение) последнего ответа для If-None-Match.
+        """
+        return self._etags.get(key)
+
+    def remember_etag(self, key: str, etag: str, value: Any) -> None:
+        self._etags.set(key, (etag, value), self._etag_ttl)
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        policy: CachePolicy,
+        response_dto: type[DTO],
+        fetch: Callable[[], Awaitable[DTO]],
+    ) -> DTO:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, policy, response_dto, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget_inflight(key, t))
+
+        return await asyncio.shield(task)
+
+    async def invalidate(self, key: str) -> None:
+        self._memory.delete(key)
+        self._etags.delete(key)
+        self._inflight.pop(key, None)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.delete(self._prefix + key)
+        except RedisError:
+            log.exception("Redis error while cache invalidation. Key: {key}", key=key)
+
+    async def _load(
+        self,
+        key: str,
+        policy: CachePolicy,
+        response_dto: type[DTO],
+        fetch: Callable[[], Awaitable[DTO]],
+    ) -> DTO:
+        current_task = asyncio.current_task()
+
+        value = await self._get_shared(key, policy, response_dto)
+        if value is None:
+            value = await fetch()
+            # Ключ могли инвалидировать, пока запрос был в полете
+            if self._inflight.get(key) is not current_task:
+                return value
+            await self._set_shared(key, policy, value)
+
+        self._memory.set(key, value, policy.ttl)
+        return value
+
+    async def _get_shared(
+        self,
+        key: str,
+        policy: CachePolicy,
+        response_dto: type[DTO],
+    ) -> DTO | None:
+        if self._redis is None or not policy.shared:
+            return None
+
+        try:
+            raw = await self._redis.get(self._prefix + key)
+        except RedisError:
+            log.exception("Redis error while cache read. Key: {key}", key=key)
+            return None
+
+        if raw is None:
+            return None
+        return response_dto.model_validate_json(raw)
+
+    async def _set_shared(self, key: str, policy: CachePolicy, value: BaseModel) -> None:
+        if self._redis is None or not policy.shared:
+            return
+
+        try:
+            await self._redis.set(
+                self._prefix + key, value.model_dump_json(), px=int(policy.ttl * 1000)
+            )
+        except RedisError:
+            log.exception("Redis error while cache write. Key: {key}", key=key)
+
+    def _forget_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+
+__all__ = (
+    "CachePolicy",
+    "ResponseCache",
+    "TTLCache",
+)
@@ -5,10 +5,139 @@ _env.read_env()
 
 debug = _env.bool("DEBUG")
 secret_key = _env.str("SECRET_KEY")
+# Ключи подписи tg_id: первый основной, остальные принимаются при проверке (ротация)
+api_sign_keys = _env.list("API_SIGN_KEYS", default=[secret_key])
 bot_token = _env.str("BOT_TOKEN")
 
 api_base_url = _env.str("API_BASE_URL")
 
+# Run mode: polling | webhook | intake | worker
+bot_run_mode = _env.str("BOT_RUN_MODE", default="polling")
+
+# FSM storage: in-process кэш поверх Redis (0 - выключен)
+fsm_cache_size = _env.int("FSM_CACHE_SIZE", default=0)
+fsm_write_behind = _env.bool("FSM_WRITE_BEHIND", default=False)
+fsm_flush_interval = _env.float("FSM_FLUSH_INTERVAL", default=1.0)
+
+# Webhook
+webhook_base_url = _env.str("WEBHOOK_BASE_URL", default="")
+webhook_path = _env.str("WEBHOOK_PATH", default="/webhook/bot")
+webhook_secret = _env.str("WEBHOOK_SECRET", default="")
+webhook_host = "0.0.0.0"
+webhook_port = _env.int("WEBHOOK_PORT", default=8080)
+webhook_max_connections = _env.int("WEBHOOK_MAX_CONNECTIONS", default=40)
+webhook_max_concurrency = _env.int("WEBHOOK_MAX_CONCURRENCY", default=100)
+webhook_drain_timeout = _env.float("WEBHOOK_DRAIN_TIMEOUT", default=30.0)
+
+# Polling: обработка апдейтов с ограниченной параллельностью (0 - задача на каждый апдейт)
+update_max_concurrency = _env.int("UPDATE_MAX_CONCURRENCY", default=100)
+# Лимиты по типу апдейта, например "callback_query=50,inline_query=20"
+update_type_limits = _env.dict("UPDATE_TYPE_LIMITS", default={}, subcast_values=int)
+update_max_queue = _env.int("UPDATE_MAX_QUEUE", default=1000)  # ждущих обработки апдейтов
+update_overflow = _env.str("UPDATE_OVERFLOW", default="block")  # block | drop_new | drop_oldest
+update_drain_timeout = _env.float("UPDATE_DRAIN_TIMEOUT", default=30.0)
+update_polling_timeout = _env.int("UPDATE_POLLING_TIMEOUT", default=10)
+
+# HTTP client pool (общий на процесс)
+http_max_connections = _env.int("HTTP_MAX_CONNECTIONS", default=100)
+http_max_keepalive_connections = _env.int("HTTP_MAX_KEEPALIVE_CONNECTIONS", default=20)
+http_keepalive_expiry = _env.float("HTTP_KEEPALIVE_EXPIRY", default=30.0)
+http2 = _env.bool("HTTP2", default=False)
+http_connect_timeout = _env.float("HTTP_CONNECT_TIMEOUT", default=3.0)
+http_read_timeout = _env.float("HTTP_READ_TIMEOUT", default=10.0)
+http_pool_timeout = _env.float("HTTP_POOL_TIMEOUT", default=5.0)
+
+# API resilience
+# Одновременных запросов к бэкенду
+api_max_concurrency = _env.int("API_MAX_CONCURRENCY", default=50)
+api_acquire_timeout = _env.float("API_ACQUIRE_TIMEOUT", default=5.0)
+api_circuit_failure_threshold = _env.int("API_CIRCUIT_FAILURE_THRESHOLD", default=5)
+api_circuit_recovery_timeout = _env.float("API_CIRCUIT_RECOVERY_TIMEOUT", default=10.0)
+api_retries = _env.int("API_RETRIES", default=2)  # только GET
+api_backoff_base = _env.float("API_BACKOFF_BASE", default=0.1)
+api_backoff_max = _env.float("API_BACKOFF_MAX", default=2.0)
+api_hedge_delay = _env.float("API_HEDGE_DELAY", default=0.0)  # 0 - без дублирующих GET
+
 redis_password = _env.str("REDIS_PASSWORD")
 redis_fsm_db = 0
 redis_fsm_dsn = f"redis://:{redis_password}@redis:6379/{redis_fsm_db}"
+redis_cache_db = 1
+redis_cache_dsn = f"redis://:{redis_password}@redis:6379/{redis_cache_db}"
+redis_queue_db = 3
+redis_queue_dsn = f"redis://:{redis_password}@redis:6379/{redis_queue_db}"
+redis_broadcast_db = 4
+redis_broadcast_dsn = f"redis://:{redis_password}@redis:6379/{redis_broadcast_db}"
+redis_throttle_db = 5
+redis_throttle_dsn = f"redis://:{redis_password}@redis:6379/{redis_throttle_db}"
+
+# Update queue (режимы intake / worker)
+update_queue_shards = _env.int("UPDATE_QUEUE_SHARDS", default=16)
+update_queue_workers = _env.int("UPDATE_QUEUE_WORKERS", default=1)
+update_queue_worker_index = _env.int("UPDATE_QUEUE_WORKER_INDEX", default=0)
+update_queue_batch_size = _env.int("UPDATE_QUEUE_BATCH_SIZE", default=100)
+update_queue_maxlen = _env.int("UPDATE_QUEUE_MAXLEN", default=100_000)
+update_queue_dedup_ttl = _env.int("UPDATE_QUEUE_DEDUP_TTL", default=86_400)
+update_queue_polling_timeout = _env.int("UPDATE_QUEUE_POLLING_TIMEOUT", default=10)
+# Ошибка обработки: повтор раз в RETRY_INTERVAL секунд, после MAX_ATTEMPTS - в поток updates:dead
+update_queue_max_attempts = _env.int("UPDATE_QUEUE_MAX_ATTEMPTS", default=5)
+update_queue_retry_interval = _env.float("UPDATE_QUEUE_RETRY_INTERVAL", default=5.0)
+# Неподтвержденные апдейты других потребителей забираются после CLAIM_IDLE секунд простоя
+update_queue_claim_idle = _env.float("UPDATE_QUEUE_CLAIM_IDLE", default=60.0)
+# Полученных и еще не подтвержденных апдейтов на воркер, сверх этого чтение ждет
+update_queue_max_in_flight = _env.int("UPDATE_QUEUE_MAX_IN_FLIGHT", default=1000)
+update_queue_drain_timeout = _env.float("UPDATE_QUEUE_DRAIN_TIMEOUT", default=30.0)
+
+# Broadcasts
+broadcast_rate = _env.float("BROADCAST_RATE", default=25.0)  # сообщений в секунду на бота
+broadcast_min_rate = _env.float("BROADCAST_MIN_RATE", default=1.0)
+broadcast_chat_rate = _env.float("BROADCAST_CHAT_RATE", default=1.0)  # сообщений в секунду на чат
+broadcast_concurrency = _env.int("BROADCAST_CONCURRENCY", default=10)
+broadcast_page_size = _env.int("BROADCAST_PAGE_SIZE", default=200)
+broadcast_max_retries = _env.int("BROADCAST_MAX_RETRIES", default=5)
+broadcast_lease_ttl = _env.int("BROADCAST_LEASE_TTL", default=120)
+
+# Throttling (token bucket на пользователя, чат и общий; rate 0 - лимит выключен)
+throttle_enabled = _env.bool("THROTTLE_ENABLED", default=False)
+throttle_store = _env.str("THROTTLE_STORE", default="memory")  # memory | redis (общий для реплик)
+throttle_max_keys = _env.int("THROTTLE_MAX_KEYS", default=100_000)  # бакетов в памяти
+throttle_user_rate = _env.float("THROTTLE_USER_RATE", default=2.0)  # апдейтов в секунду
+throttle_user_burst = _env.float("THROTTLE_USER_BURST", default=10.0)
+throttle_chat_rate = _env.float("THROTTLE_CHAT_RATE", default=0.0)
+throttle_chat_burst = _env.float("THROTTLE_CHAT_BURST", default=20.0)
+throttle_global_rate = _env.float("THROTTLE_GLOBAL_RATE", default=0.0)
+throttle_global_burst = _env.float("THROTTLE_GLOBAL_BURST", default=100.0)
+throttle_action = _env.str("THROTTLE_ACTION", default="reply")  # drop | delay | reply
+throttle_max_delay = _env.float("THROTTLE_MAX_DELAY", default=2.0)  # delay: дольше - drop
+throttle_reply_text = _env.str(
+    "THROTTLE_REPLY_TEXT", default="Слишком много запросов, подождите немного"
+)
+throttle_reply_interval = _env.float("THROTTLE_REPLY_INTERVAL", default=10.0)  # на пользователя
+
+# Metrics (Prometheus text format)
+metrics_enabled = _env.bool("METRICS_ENABLED", default=False)
+metrics_port = _env.int("METRICS_PORT", default=9100)
+
+# API batching (объединение одиночных запросов в пакеты)
+api_batch_window = _env.float("API_BATCH_WINDOW", default=0.005)
+api_batch_max_size = _env.int("API_BATCH_MAX_SIZE", default=100)
+
+# API response cache
+api_cache_max_size = _env.int("API_CACHE_MAX_SIZE", default=10_000)
+api_cache_redis = _env.bool("API_CACHE_REDIS", default=True)
+api_cache_etag_ttl = _env.float("API_CACHE_ETAG_TTL", default=3600.0)
+
+# Logging
+log_level = _env.str("LOG_LEVEL", default="INFO")
+log_format = _env.str("LOG_FORMAT", default="text")  # text | json
+log_sink = _env.str("LOG_SINK", default="stderr")  # stderr | путь к файлу | tcp://host:port
+log_batch_size = _env.int("LOG_BATCH_SIZE", default=500)
+log_flush_interval = _env.float("LOG_FLUSH_INTERVAL", default=0.5)
+# Не более LOG_REPEAT_BURST одинаковых предупреждений/ошибок с одного места за окно
+log_repeat_burst = _env.int("LOG_REPEAT_BURST", default=10)
+log_repeat_window = _env.float("LOG_REPEAT_WINDOW", default=60.0)
+
+# Tracing (W3C traceparent, общий трейс бота и бэкенда)
+tracing_enabled = _env.bool("TRACING_ENABLED", default=False)
+tracing_sample_rate = _env.float("TRACING_SAMPLE_RATE", default=0.01)  # доля новых трейсов
+tracing_exporter = _env.str("TRACING_EXPORTER", default="stdout")  # stdout | путь к файлу
+tracing_service_name = _env.str("TRACING_SERVICE_NAME", default="bot")
@@ -0,0 +1,273 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Mapping
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.exceptions import RedisError
+
+from providers import metrics
+from providers.logger import logger as log
+
+
+FSM_REDIS_ROUNDTRIPS = metrics.Counter(
+    "bot_fsm_redis_roundtrips_total",
+    "FSM storage round-trips to Redis by operation",
+    labelnames=("op",),
+)
+FSM_CACHE_HITS = metrics.Counter(
+    "bot_fsm_cache_hits_total",
+    "FSM storage reads served from the in-process cache",
+)
+
+# Поле еще не загружено из Redis
+_UNKNOWN: Any = object()
+
+_STACK_DESTINY = "aiogd:stack:"
+_CONTEXT_DESTINY = "aiogd:context:"
+
+# Стек aiogram_dialog и контексты всех его intent за один round-trip.
+# KEYS - state и data стека, ARGV - ключ data контекста до и после intent id.
+# Ключи контекстов строятся в скрипте, поэтому только для Redis без кластера.
+_LOAD_STACK_SCRIPT = """
+local state = redis.call("GET", KEYS[1])
+local stack = redis.call("GET", KEYS[2])
+local contexts = {}
+if stack then
+    local ok, data = pcall(cjson.decode, stack)
+    if ok and type(data) == "table" and type(data["intents"]) == "table" then
+        for _, intent in ipairs(data["intents"]) do
+            table.insert(contexts, intent)
+            table.insert(contexts, redis.call("GET", ARGV[1] .. intent .. ARGV[2]) or "")
+        end
+    end
+end
+return {state or "", stack or "", contexts}
+"""
+
+
+class _Entry:
+    __slots__ = ("data", "state")
+
+    def __init__(self) -> None:
+        self.state: str | None = _UNKNOWN
+        self.data: str | None = _UNKNOWN  # JSON: закэшированные dict не должны изменяться снаружи
+
+
+class HybridStorage(BaseStorage):
+    """
+    FSM storage: in-process LRU поверх RedisStorage.
+
+    - Промах читает state и data ключа одним MGET, дальше чтения идут из памяти.
+      Промах по стеку aiogram_dialog читает стек и контексты всех его intent
+      одним скриптом: открытие диалога не ждет отдельного round-trip на контекст.
+    - Запись обновляет кэш только после успешной записи в Redis; при ошибке записи
+      ключ вытесняется из кэша и следующее чтение идет в Redis.
+    - write_behind=False: запись сразу уходит в Redis.
+    - write_behind=True: измененные ключи записываются одним pipeline раз в flush_interval
+      секунд и при закрытии хранилища (остановке диспетчера). При падении процесса
+      теряются изменения последних flush_interval секунд.
+
+    Кэш согласован, только если апдейты одного чата всегда обрабатывает один процесс
+    (polling, воркеры очереди апдейтов). Для нескольких реплик вебхука max_size должен быть 0.
+    """
+
+    def __init__(
+        self,
+        redis_storage: RedisStorage,
+        max_size: int,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.redis_storage = redis_storage
+        self._max_size = max_size
+        self._write_behind = write_behind
+        self._flush_interval = flush_interval
+        self._entries: OrderedDict[StorageKey, _Entry] = OrderedDict()
+        # Ключ Redis -> (новое значение или None для удаления, TTL),
+        # еще не записанное при write-behind
+        self._dirty: dict[str, tuple[str | None, int | None]] = {}
+        self._flushing: dict[str, tuple[str | None, int | None]] = {}
+        self._flusher: asyncio.Task | None = None
+        self._load_stack_script = redis_storage.redis.register_script(_LOAD_STACK_SCRIPT)
+
+    # ===============
+    # BaseStorage
+    # ===============
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._write(
+            key,
+            self.redis_storage.key_builder.build(key, "state"),
+            value,
+            ttl=self.redis_storage.state_ttl,
+        )
+        self._get_entry(key).state = value
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._load(key, "state")).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+
+        value = self.redis_storage.json_dumps(data) if data else None
+        await self._write(
+            key,
+            self.redis_storage.key_builder.build(key, "data"),
+            value,
+            ttl=self.redis_storage.data_ttl,
+        )
+        self._get_entry(key).data = value
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value = (await self._load(key, "data")).data
+        if value is None:
+            return {}
+        return self.redis_storage.json_loads(value)
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+        await self.redis_storage.close()
+
+    # ===============
+    # Write-behind
+    # ===============
+
+    async def flush(self) -> None:
+        """
+        Запись всех отложенных изменений в Redis одним pipeline.
+        """
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        self._flushing = dirty
+        try:
+            async with self.redis_storage.redis.pipeline(transaction=False) as pipe:
+                for redis_key, (value, ttl) in dirty.items():
+                    if value is None:
+                        pipe.delete(redis_key)
+                    else:
+                        pipe.set(redis_key, value, ex=ttl)
+                await pipe.execute()
+        except (RedisError, OSError):
+            # Более новые изменения, сделанные во время записи, не перезаписываются
+            self._dirty = {**dirty, **self._dirty}
+            raise
+        finally:
+            self._flushing = {}
+            FSM_REDIS_ROUNDTRIPS.inc(op="flush")
+
+    async def _run_flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except (RedisError, OSError):
+                log.exception(
+                    "FSM storage flush failed, {count} keys pending", count=len(self._dirty)
+                )
+
+    # ===============
+    # Internals
+    # ===============
+
+    def _get_entry(self, key: StorageKey) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            while len(self._entries) > self._max_size:
+                # Отложенные записи хранятся отдельно в _dirty и при вытеснении не теряются
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def _load(self, key: StorageKey, field: str) -> _Entry:
+        entry = self._get_entry(key)
+        if getattr(entry, field) is not _UNKNOWN:
+            FSM_CACHE_HITS.inc()
+            return entry
+
+        key_builder = self.redis_storage.key_builder
+        state_key = key_builder.build(key, "state")
+        data_key = key_builder.build(key, "data")
+        if key.destiny.startswith(_STACK_DESTINY):
+            state, data = await self._load_stack(key, state_key, data_key)
+        else:
+            state, data = await self.redis_storage.redis.mget(state_key, data_key)
+        FSM_REDIS_ROUNDTRIPS.inc(op="read")
+
+        # Пока шел запрос, поле могли записать; отложенная запись новее значения в Redis
+        if entry.state is _UNKNOWN:
+            entry.state = self._get_pending(state_key, default=_decode(state))
+        if entry.data is _UNKNOWN:
+            entry.data = self._get_pending(data_key, default=_decode(data))
+        return entry
+
+    async def _load_stack(
+        self, key: StorageKey, state_key: str, data_key: str
+    ) -> tuple[bytes | None, bytes | None]:
+        """
+        Стек и data контекстов его intent; контексты сразу кладутся в кэш.
+        """
+        marker = "\x00"
+        context_key = replace(key, destiny=f"{_CONTEXT_DESTINY}{marker}")
+        prefix, suffix = self.redis_storage.key_builder.build(context_key, "data").split(marker)
+        state, data, contexts = await self._load_stack_script(
+            keys=[state_key, data_key], args=[prefix, suffix]
+        )
+
+        for intent, context_data in zip(contexts[::2], contexts[1::2]):
+            intent_id = _decode(intent)
+            entry = self._get_entry(replace(key, destiny=f"{_CONTEXT_DESTINY}{intent_id}"))
+            if entry.data is _UNKNOWN:
+                entry.data = self._get_pending(
+                    f"{prefix}{intent_id}{suffix}", default=_decode(context_data) or None
+                )
+        return state or None, data or None
+
+    def _get_pending(self, redis_key: str, default: str | None) -> str | None:
+        for pending in (self._dirty, self._flushing):
+            if redis_key in pending:
+                return pending[redis_key][0]
+        return default
+
+    async def _write(
+        self, key: StorageKey, redis_key: str, value: str | None, ttl: int | None
+    ) -> None:
+        if self._write_behind:
+            self._dirty[redis_key] = (value, ttl)
+            if self._flusher is None:
+                self._flusher = asyncio.create_task(self._run_flusher())
+            return
+
+        try:
+            if value is None:
+                await self.redis_storage.redis.delete(redis_key)
+            else:
+                await self.redis_storage.redis.set(redis_key, value, ex=ttl)
+        except (RedisError, OSError):
+            # Записалось ли значение, неизвестно: следующее чтение идет в Redis
+            self._entries.pop(key, None)
+            raise
+        finally:
+            FSM_REDIS_ROUNDTRIPS.inc(op="write")
+
+
+def _decode(value: bytes | str | None) -> str | None:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+__all__ = ("HybridStorage",)
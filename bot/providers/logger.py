@@ -1,26 +1,201 @@
+from collections import OrderedDict
 from functools import lru_cache
 import inspect
+import json
 import logging
+import socket
 import sys
+import threading
+import time
+import traceback
+from typing import Any, ClassVar, TextIO
 
 from loguru import logger as _logger
 
+from providers import env
+
+
+# ===============
+# Filters & formatting
+# ===============
+
+
+class RepeatFilter:
+    """
+    Ограничение повторяющихся записей уровня WARNING и выше.
+
+    Запись считается повторной, если совпадает место вызова (модуль, функция, строка).
+    За окно window пропускается не более burst записей, число подавленных
+    записывается в extra["suppressed"] первой записи следующего окна.
+    """
+
+    def __init__(self, burst: int, window: float, max_keys: int = 1024) -> None:
+        self._burst = burst
+        self._window = window
+        self._max_keys = max_keys
+        # место вызова -> [начало окна, пропущено, подавлено]
+        self._counters: OrderedDict[tuple, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict[str, Any]) -> bool:
+        if record["level"].no < logging.WARNING:
+            return True
+
+        key = (record["name"], record["function"], record["line"])
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self._window:
+                suppressed = counter[2] if counter is not None else 0
+                self._counters[key] = [now, 1, 0]
+                self._counters.move_to_end(key)
+                if len(self._counters) > self._max_keys:
+                    self._counters.popitem(last=False)
+                if suppressed:
+                    record["extra"]["suppressed"] = suppressed
+                return True
+
+            if counter[1] < self._burst:
+                counter[1] += 1
+                return True
+
+            counter[2] += 1
+            return False
+
+
+def _format_json(record: dict[str, Any]) -> str:
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **record["extra"],
+    }
+    exception = record["exception"]
+    if exception is not None:
+        payload["exception"] = "".join(
+            traceback.format_exception(exception.type, exception.value, exception.traceback)
+        )
+
+    record["extra"]["_json"] = json.dumps(payload, default=str, ensure_ascii=False)
+    return "{extra[_json]}\n"
+
+
+# ===============
+# Sinks
+# ===============
+
+
+class BatchedSink:
+    """
+    Sink, копящий строки и записывающий их пачками в файл или TCP-сокет.
+
+    Запись происходит при накоплении batch_size строк или раз в flush_interval секунд
+    из фонового потока. Если получатель недоступен, пачка отбрасывается с сообщением в stderr.
+    """
+
+    def __init__(self, target: str, batch_size: int, flush_interval: float) -> None:
+        self._target = target
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._stream: TextIO | socket.socket | None = None
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, name="log-flusher", daemon=True)
+        self._flusher.start()
+
+    def write(self, message: str) -> None:
+        with self._lock:
+            self._buffer.append(message)
+            if len(self._buffer) < self._batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write_batch(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._write_batch(batch)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._flusher.join()
+        self.flush()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.wait(self._flush_interval):
+            self.flush()
+
+    def _connect(self) -> TextIO | socket.socket:
+        if self._target.startswith("tcp://"):
+            host, port = self._target.removeprefix("tcp://").rsplit(":", 1)
+            return socket.create_connection((host, int(port)), timeout=5)
+        return open(self._target, "a", encoding="utf-8", buffering=1 << 16)
+
+    def _write_batch(self, batch: list[str]) -> None:
+        data = "".join(batch)
+        # Запись из фонового потока и из write не должна перемешиваться
+        with self._io_lock:
+            try:
+                if self._stream is None:
+                    self._stream = self._connect()
+                if isinstance(self._stream, socket.socket):
+                    self._stream.sendall(data.encode())
+                else:
+                    self._stream.write(data)
+                    self._stream.flush()
+            except OSError as e:
+                sys.stderr.write(
+                    f"Log sink {self._target} error, {len(batch)} records dropped: {e}\n"
+                )
+                if self._stream is not None:
+                    self._stream.close()
+                self._stream = None
+
+
+# ===============
+# Setup
+# ===============
+
 
 @lru_cache(1)
 def init_logger():
     _logger.remove()
-    _logger.add(
-        sys.stderr,
-        format=(
+
+    if env.log_format == "json":
+        format_ = _format_json
+        colorize = False
+    else:
+        format_ = (
             "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
             "<level>{name}</level> | "
             "<level>{level}</level> | "
             "<level>{message}</level>"
-        ),
+        )
+        colorize = env.log_sink == "stderr"
+
+    if env.log_sink == "stderr":
+        sink = sys.stderr
+    else:
+        sink = BatchedSink(env.log_sink, env.log_batch_size, env.log_flush_interval)
+
+    _logger.add(
+        sink,
+        level=env.log_level,
+        format=format_,
+        filter=RepeatFilter(env.log_repeat_burst, env.log_repeat_window),
         backtrace=False,
         diagnose=False,
         enqueue=True,
-        colorize=True,
+        colorize=colorize,
     )
     return _logger
 
@@ -29,13 +204,38 @@ logger = init_logger()
 
 
 class InterceptHandler(logging.Handler):
+    """
+    Перенаправление stdlib logging в loguru.
+    """
+
+    # Место вызова -> глубина стека от emit до вызывающего кода
+    _depths: ClassVar[dict[tuple[str, int], int]] = {}
+
+    def __init__(self, level: int | str = logging.NOTSET) -> None:
+        super().__init__(level)
+        self._min_level = logger.level(env.log_level).no
+
     def emit(self, record: logging.LogRecord) -> None:
+        # Отброшенные записи не должны стоить обхода стека
+        if record.levelno < self._min_level:
+            return
+
         try:
             level: str | int = logger.level(record.levelname).name
         except ValueError:
             level = record.levelno
 
-        frame, depth = inspect.currentframe(), 0
+        call_site = (record.pathname, record.lineno)
+        depth = self._depths.get(call_site)
+        if depth is None:
+            depth = self._depths[call_site] = self._find_depth()
+
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+    @staticmethod
+    def _find_depth() -> int:
+        # Обход начинается с кадра emit, как если бы он выполнялся в нем
+        frame, depth = inspect.currentframe().f_back, 0
         while frame:
             filename = frame.f_code.co_filename
             is_logging = filename == logging.__file__
@@ -44,8 +244,7 @@ class InterceptHandler(logging.Handler):
                 break
             frame = frame.f_back
             depth += 1
-
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+        return depth
 
 
 __all__ = (
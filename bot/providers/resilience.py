@@ -0,0 +1,121 @@
+import asyncio
+from dataclasses import dataclass, field
+import random
+import time
+
+from providers import metrics
+from providers.logger import logger as log
+
+
+API_CIRCUIT_OPEN = metrics.Gauge(
+    "bot_api_circuit_open",
+    "Backend API circuit breaker state by path (1 - open)",
+    labelnames=("path",),
+)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для одного пути API.
+
+    После failure_threshold ошибок подряд цепь размыкается и запросы сразу отклоняются.
+    Раз в recovery_timeout секунд пропускается один пробный запрос:
+    успех замыкает цепь, ошибка снова откладывает следующую пробу.
+    """
+
+    def __init__(self, path: str, failure_threshold: int, recovery_timeout: float) -> None:
+        self._path = path
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+
+        now = time.monotonic()
+        if now - self._opened_at < self._recovery_timeout:
+            return False
+
+        # Пробный запрос; следующая проба не раньше чем через recovery_timeout
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._opened_at is not None:
+            self._opened_at = None
+            API_CIRCUIT_OPEN.set(0, path=self._path)
+            log.info("Circuit closed. Path: {path}", path=self._path)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures < self._failure_threshold:
+            return
+
+        if self._opened_at is None:
+            API_CIRCUIT_OPEN.set(1, path=self._path)
+            log.warning("Circuit opened. Path: {path}", path=self._path)
+        self._opened_at = time.monotonic()
+
+
+@dataclass
+class APIResilience:
+    """
+    Общие на процесс параметры и состояние отказоустойчивости клиента API:
+    размыкатели цепи по путям и ограничение числа одновременных запросов к бэкенду.
+    """
+
+    max_concurrency: int
+    acquire_timeout: float
+    failure_threshold: int
+    recovery_timeout: float
+    retries: int  # Дополнительные попытки, только для GET
+    backoff_base: float
+    backoff_max: float
+    hedge_delay: float  # 0 - без дублирующих запросов
+    _breakers: dict[str, CircuitBreaker] = field(default_factory=dict, init=False, repr=False)
+    _semaphore: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def get_breaker(self, path: str) -> CircuitBreaker:
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker(
+                path,
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+            )
+        return breaker
+
+    async def acquire(self) -> bool:
+        """
+        Слот для запроса к бэкенду. False, если слот не освободился за acquire_timeout.
+        """
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Экспоненциальная задержка с полным джиттером перед попыткой attempt (с 1).
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+__all__ = (
+    "APIResilience",
+    "CircuitBreaker",
+)
@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from lib.rate_limit import TokenBucket
+from providers import env
+from providers.cache import TTLCache
+from providers.logger import logger as log
+
+
+@dataclass(frozen=True, slots=True)
+class Limit:
+    """
+    Token bucket: rate апдейтов в секунду, до burst подряд.
+    """
+
+    scope: str  # user | chat | global
+    rate: float
+    burst: float
+
+    @property
+    def idle_ttl(self) -> float:
+        # Через это время бакет без запросов снова полон и неотличим от нового
+        return self.burst / self.rate
+
+
+Bucket = tuple[str, Limit]  # Ключ бакета и его лимит
+Denial = tuple[str, float]  # scope исчерпанного лимита и через сколько секунд повторить
+
+
+class ThrottleStore(ABC):
+    """
+    Хранилище бакетов ограничения апдейтов.
+
+    acquire списывает по токену из всех бакетов сразу или ни из одного:
+    апдейт, отклоненный лимитом пользователя, не расходует глобальный лимит.
+    """
+
+    @abstractmethod
+    async def acquire(self, buckets: Sequence[Bucket]) -> Denial | None: ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """
+    Бакеты в памяти процесса: лимиты действуют на каждую реплику отдельно.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._buckets = TTLCache(max_size=max_size)
+
+    async def acquire(self, buckets: Sequence[Bucket]) -> Denial | None:
+        # Без await между проверкой и списанием: атомарно в пределах event loop
+        token_buckets = []
+        denial: Denial | None = None
+        for key, limit in buckets:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate=limit.rate, capacity=limit.burst)
+            self._buckets.set(key, bucket, ttl=limit.idle_ttl)
+            token_buckets.append(bucket)
+
+            wait = bucket.wait_time()
+            if wait > 0 and (denial is None or wait > denial[1]):
+                denial = (limit.scope, wait)
+
+        if denial is None:
+            for bucket in token_buckets:
+                bucket.try_acquire()
+        return denial
+
+
+# KEYS - бакеты, ARGV - rate и burst каждого бакета по порядку.
+# Время берется из Redis (TIME): у реплик могут расходиться часы.
+# Возвращает {0, "0"} или {номер исчерпанного бакета, секунд до токена}; дробные
+# числа возвращаются строкой, иначе Redis обрежет их до целых.
+_ACQUIRE_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local denied, denied_wait = 0, 0
+
+for i = 1, #KEYS do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call("HMGET", KEYS[i], "tokens", "updated_at")
+    local value = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    value = math.min(burst, value + math.max(0, now - updated_at) * rate)
+    tokens[i] = value
+    if value < 1 and (1 - value) / rate > denied_wait then
+        denied, denied_wait = i, (1 - value) / rate
+    end
+end
+
+if denied > 0 then
+    return {denied, tostring(denied_wait)}
+end
+
+for i = 1, #KEYS do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call("HSET", KEYS[i], "tokens", tokens[i] - 1, "updated_at", now)
+    redis.call("PEXPIRE", KEYS[i], math.ceil(burst / rate * 1000))
+end
+return {0, "0"}
+"""
+
+
+class RedisThrottleStore(ThrottleStore):
+    """
+    Бакеты в Redis: общие лимиты для всех реплик бота, проверка и списание одним Lua-скриптом.
+    При недоступности Redis апдейты пропускаются без ограничения.
+    """
+
+    prefix = "throttle:"
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+        self._script = redis.register_script(_ACQUIRE_SCRIPT)
+
+    async def acquire(self, buckets: Sequence[Bucket]) -> Denial | None:
+        args = []
+        for _, limit in buckets:
+            args += [limit.rate, limit.burst]
+        try:
+            index, wait = await self._script(
+                keys=[self.prefix + key for key, _ in buckets],
+                args=args,
+            )
+        except RedisError:
+            log.exception("Redis error while throttling, update allowed")
+            return None
+
+        if index == 0:
+            return None
+        return buckets[int(index) - 1][1].scope, float(wait)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def make_throttle_store() -> ThrottleStore:
+    if env.throttle_store == "redis":
+        return RedisThrottleStore(Redis.from_url(env.redis_throttle_dsn))
+    if env.throttle_store == "memory":
+        return MemoryThrottleStore(max_size=env.throttle_max_keys)
+    raise ValueError(f"Unknown THROTTLE_STORE: {env.throttle_store}")
+
+
+def make_limits() -> list[Limit]:
+    """
+    Включенные лимиты (rate > 0) из окружения.
+    """
+    limits = [
+        Limit("user", env.throttle_user_rate, env.throttle_user_burst),
+        Limit("chat", env.throttle_chat_rate, env.throttle_chat_burst),
+        Limit("global", env.throttle_global_rate, env.throttle_global_burst),
+    ]
+    return [limit for limit in limits if limit.rate > 0]
+
+
+__all__ = (
+    "Limit",
+    "MemoryThrottleStore",
+    "RedisThrottleStore",
+    "ThrottleStore",
+    "make_limits",
+    "make_throttle_store",
+)
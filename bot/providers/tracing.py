@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+import atexit
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Iterator, TextIO
+
+from providers import env
+
+
+TRACEPARENT_HEADER = "traceparent"
+
+
+@dataclass(slots=True)
+class Span:
+    """
+    Участок трейса. Идентификаторы и формат заголовка по W3C Trace Context.
+    Неотобранный (sampled=False) span только передает контекст дальше и не экспортируется.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    sampled: bool
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "service": env.tracing_service_name,
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+# ===============
+# Exporters
+# ===============
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span) -> None: ...
+
+    def flush(self) -> None:
+        pass
+
+
+class StreamExporter(SpanExporter):
+    """
+    Span построчно в JSON: в stdout или в файл (для работы без коллектора).
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._stream.write(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._stream.flush()
+
+
+def _make_exporter() -> SpanExporter:
+    if env.tracing_exporter == "stdout":
+        return StreamExporter(sys.stdout)
+    return StreamExporter(open(env.tracing_exporter, "a", encoding="utf-8"))
+
+
+_exporter: SpanExporter | None = None
+
+
+def get_exporter() -> SpanExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = _make_exporter()
+        atexit.register(_exporter.flush)
+    return _exporter
+
+
+def set_exporter(exporter: SpanExporter) -> None:
+    """
+    Подключение своего получателя span (например, отправка в коллектор).
+    """
+    global _exporter
+    _exporter = exporter
+
+
+# ===============
+# Spans
+# ===============
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def get_current_span() -> Span | None:
+    return _current_span.get()
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """
+    (trace_id, parent span_id, sampled) из заголовка traceparent.
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1] + parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def _in_sample(trace_id: str) -> bool:
+    # Решение по младшим 64 битам trace_id (как TraceIdRatioBased в OpenTelemetry): сервисы
+    # с одинаковым TRACING_SAMPLE_RATE отбирают одни и те же трейсы, с меньшим - их часть
+    return int(trace_id[16:], 16) < env.tracing_sample_rate * 2**64
+
+
+@contextmanager
+def start_span(
+    name: str, traceparent: str | None = None, **attributes: Any
+) -> Iterator[Span | None]:
+    """
+    Дочерний span текущего (или удаленного из traceparent) span, иначе новый трейс.
+    Новый трейс отбирается с вероятностью TRACING_SAMPLE_RATE, решение наследуется дочерними span.
+    Флаг sampled из traceparent принимается только в пределах своего TRACING_SAMPLE_RATE:
+    клиент не может включить запись трейса для каждого своего запроса.
+    При выключенной трассировке отдает None.
+    """
+    if not env.tracing_enabled:
+        yield None
+        return
+
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent)
+    if remote is not None:
+        trace_id, parent_id, sampled = remote
+        sampled = sampled and _in_sample(trace_id)
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = _in_sample(trace_id)
+
+    span = Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=os.urandom(8).hex(),
+        parent_id=parent_id,
+        sampled=sampled,
+        attributes=attributes if sampled else {},
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.set_attribute("error", type(e).__name__)
+        raise
+    finally:
+        span.duration = time.perf_counter() - span._started
+        _current_span.reset(token)
+        if span.sampled:
+            get_exporter().export(span)
+
+
+__all__ = (
+    "TRACEPARENT_HEADER",
+    "Span",
+    "SpanExporter",
+    "StreamExporter",
+    "get_current_span",
+    "parse_traceparent",
+    "set_exporter",
+    "start_span",
+)
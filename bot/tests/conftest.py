@@ -0,0 +1,14 @@
+import os
+
+
+# providers.env читает окружение при импорте: значения для тестов без .env
+for name, value in {
+    "DEBUG": "False",
+    "SECRET_KEY": "test-secret-key",
+    "BOT_TOKEN": "42:test",
+    "API_BASE_URL": "http://backend/api",
+    "REDIS_PASSWORD": "test",
+    "METRICS_ENABLED": "False",
+    "TRACING_ENABLED": "False",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,10 @@
+import json
+
+from app.api_codegen import OUTPUT_PATH, SCHEMA_PATH, render
+
+
+def test_generated_client_is_up_to_date() -> None:
+    # То же, что make api-check для клиента: схема изменена без make api-codegen
+    schema = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+    code = render(schema, "/api")
+    assert code == OUTPUT_PATH.read_text(encoding="utf-8"), "run: make api-codegen"
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any
+
+from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY, EventContext
+from aiogram.types import Chat, Update, User
+
+from core.middlewares import ThrottlingMiddleware
+from providers.throttling import Limit, MemoryThrottleStore
+
+
+USER_LIMIT = Limit("user", rate=1, burst=2)
+GLOBAL_LIMIT = Limit("global", rate=100, burst=100)
+
+
+def message(update_id: int, user_id: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+                "text": "text",
+            },
+        }
+    )
+
+
+class StubBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+async def feed(middleware: ThrottlingMiddleware, updates: list[Update], bot: StubBot) -> list[int]:
+    """
+    Апдейты по очереди через middleware; возвращает update_id дошедших до обработчика.
+    """
+    handled: list[int] = []
+
+    async def handler(event: Update, data: dict[str, Any]) -> None:
+        handled.append(event.update_id)
+
+    for update in updates:
+        user_id = update.message.from_user.id
+        event_context = EventContext(
+            chat=Chat(id=user_id, type="private"),
+            user=User(id=user_id, is_bot=False, first_name="user"),
+        )
+        await middleware(handler, update, {EVENT_CONTEXT_KEY: event_context, "bot": bot})
+    return handled
+
+
+# ===============
+# MemoryThrottleStore
+# ===============
+
+
+def test_memory_store_allows_burst_then_denies_with_wait() -> None:
+    store = MemoryThrottleStore(max_size=100)
+    buckets = [("user:1", USER_LIMIT)]
+
+    async def scenario() -> list:
+        return [await store.acquire(buckets) for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+
+    assert (first, second) == (None, None)
+    scope, wait = third
+    assert scope == "user"
+    assert 0 < wait <= 1
+
+
+def test_memory_store_denial_does_not_consume_other_buckets() -> None:
+    store = MemoryThrottleStore(max_size=100)
+    global_limit = Limit("global", rate=0.001, burst=2)
+
+    async def scenario() -> list:
+        user_1 = [("user:1", Limit("user", rate=0.001, burst=1)), ("global:", global_limit)]
+        user_2 = [("user:2", Limit("user", rate=0.001, burst=5)), ("global:", global_limit)]
+        # Второй апдейт пользователя 1 отклонен его лимитом и не расходует глобальный
+        return [
+            await store.acquire(user_1),
+            await store.acquire(user_1),
+            await store.acquire(user_2),
+            await store.acquire(user_2),
+        ]
+
+    results = asyncio.run(scenario())
+
+    assert results[0] is None
+    assert results[1][0] == "user"
+    assert results[2] is None
+    assert results[3][0] == "global"
+
+
+# ===============
+# ThrottlingMiddleware
+# ===============
+
+
+def test_middleware_drops_updates_over_limit() -> None:
+    middleware = ThrottlingMiddleware(
+        MemoryThrottleStore(max_size=100), limits=[USER_LIMIT, GLOBAL_LIMIT], action="drop"
+    )
+    bot = StubBot()
+    updates = [message(1, 1), message(2, 1), message(3, 1), message(4, 2)]
+
+    handled = asyncio.run(feed(middleware, updates, bot))
+
+    # Лимит у каждого пользователя свой
+    assert handled == [1, 2, 4]
+    assert bot.sent == []
+
+
+def test_middleware_replies_once_per_interval() -> None:
+    middleware = ThrottlingMiddleware(
+        MemoryThrottleStore(max_size=100),
+        limits=[USER_LIMIT],
+        action="reply",
+        reply_text="slow down",
+        reply_interval=60,
+    )
+    bot = StubBot()
+    updates = [message(update_id, 1) for update_id in range(1, 6)]
+
+    handled = asyncio.run(feed(middleware, updates, bot))
+
+    assert handled == [1, 2]
+    assert bot.sent == [(1, "slow down")]
@@ -0,0 +1,218 @@
+import asyncio
+from collections import Counter
+
+from aiogram.types import Update
+
+from app.update_scheduler import UpdateScheduler
+
+
+def message(update_id: int, chat_id: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "text",
+            },
+        }
+    )
+
+
+def callback_query(update_id: int, user_id: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+                "chat_instance": "chat",
+                "data": "data",
+            },
+        }
+    )
+
+
+class Recorder:
+    """
+    process для планировщика: запоминает порядок и параллельность.
+    Апдейт ждет своего события в held, остальные - общего gate.
+    """
+
+    def __init__(self) -> None:
+        self.started: list[int] = []
+        self.running: Counter[str] = Counter()
+        self.max_running: Counter[str] = Counter()
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.held: dict[int, asyncio.Event] = {}
+
+    def hold(self, *update_ids: int) -> None:
+        for update_id in update_ids:
+            self.held[update_id] = asyncio.Event()
+
+    async def release(self, update_id: int) -> None:
+        self.held.pop(update_id).set()
+        # Обработчик завершается, планировщик выбирает следующие апдейты
+        await asyncio.sleep(0.01)
+
+    async def __call__(self, update: Update) -> None:
+        if update.message:
+            chat = f"chat:{update.message.chat.id}"
+        else:
+            chat = f"chat:{update.callback_query.from_user.id}"
+        self.started.append(update.update_id)
+        for key in (chat, update.event_type, "total"):
+            self.running[key] += 1
+            self.max_running[key] = max(self.max_running[key], self.running[key])
+        try:
+            await self.held.get(update.update_id, self.gate).wait()
+            await asyncio.sleep(0.001)
+        finally:
+            for key in (chat, update.event_type, "total"):
+                self.running[key] -= 1
+
+
+def test_chat_updates_are_processed_in_order_one_at_a_time() -> None:
+    async def scenario() -> Recorder:
+        recorder = Recorder()
+        scheduler = UpdateScheduler(recorder, max_concurrency=10, max_queue=100)
+        for update_id, chat_id in enumerate((1, 2, 1, 1, 2, 3, 1), start=1):
+            await scheduler.submit(message(update_id, chat_id))
+        await scheduler.drain(timeout=5)
+        return recorder
+
+    recorder = asyncio.run(scenario())
+
+    chat_1 = [update_id for update_id in recorder.started if update_id in (1, 3, 4, 7)]
+    assert chat_1 == [1, 3, 4, 7]
+    assert recorder.max_running["chat:1"] == 1
+    # Разные чаты обрабатываются параллельно
+    assert recorder.max_running["total"] == 3
+
+
+def test_type_limit_does_not_hold_other_types() -> None:
+    async def scenario() -> Recorder:
+        recorder = Recorder()
+        scheduler = UpdateScheduler(
+            recorder, max_concurrency=10, max_queue=100, type_limits={"callback_query": 1}
+        )
+        for user_id in range(1, 4):
+            await scheduler.submit(callback_query(user_id, user_id))
+            await scheduler.submit(message(10 + user_id, 100 + user_id))
+        await scheduler.drain(timeout=5)
+        return recorder
+
+    recorder = asyncio.run(scenario())
+
+    assert recorder.max_running["callback_query"] == 1
+    assert recorder.max_running["message"] == 3
+    assert sorted(recorder.started) == [1, 2, 3, 11, 12, 13]
+
+
+def test_block_overflow_waits_for_space() -> None:
+    async def scenario() -> tuple[bool, Recorder]:
+        recorder = Recorder()
+        recorder.gate.clear()
+        scheduler = UpdateScheduler(recorder, max_concurrency=1, max_queue=1)
+        await scheduler.submit(message(1, 1))  # обрабатывается
+        await scheduler.submit(message(2, 2))  # ждет, очередь заполнена
+        blocked = asyncio.create_task(scheduler.submit(message(3, 3)))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+
+        recorder.gate.set()
+        assert await blocked
+        await scheduler.drain(timeout=5)
+        return was_blocked, recorder
+
+    was_blocked, recorder = asyncio.run(scenario())
+
+    assert was_blocked
+    assert recorder.started == [1, 2, 3]
+
+
+def test_drop_new_overflow_rejects_the_new_update() -> None:
+    async def scenario() -> tuple[bool, Recorder]:
+        recorder = Recorder()
+        recorder.gate.clear()
+        scheduler = UpdateScheduler(recorder, max_concurrency=1, max_queue=1, overflow="drop_new")
+        await scheduler.submit(message(1, 1))
+        await scheduler.submit(message(2, 2))
+        accepted = await scheduler.submit(message(3, 3))
+        assert scheduler.queued == 1
+
+        recorder.gate.set()
+        await scheduler.drain(timeout=5)
+        return accepted, recorder
+
+    accepted, recorder = asyncio.run(scenario())
+
+    assert not accepted
+    assert recorder.started == [1, 2]
+
+
+def test_drop_oldest_overflow_skips_stale_ready_keys() -> None:
+    async def scenario() -> Recorder:
+        recorder = Recorder()
+        recorder.gate.clear()
+        scheduler = UpdateScheduler(
+            recorder, max_concurrency=1, max_queue=2, overflow="drop_oldest"
+        )
+        await scheduler.submit(message(1, 1))  # обрабатывается
+        await scheduler.submit(message(2, 2))
+        await scheduler.submit(message(3, 3))
+        # Отбрасывается 2: ключ чата 2 остается в _ready устаревшим
+        await scheduler.submit(message(4, 4))
+        # Отбрасывается 3; новый апдейт чата 2 при устаревшем ключе в очереди
+        await scheduler.submit(message(5, 2))
+        assert scheduler.queued == 2
+
+        recorder.gate.set()
+        await scheduler.drain(timeout=5)
+        return recorder
+
+    recorder = asyncio.run(scenario())
+
+    assert recorder.started[0] == 1
+    # Каждый оставшийся апдейт обработан ровно один раз
+    assert sorted(recorder.started[1:]) == [4, 5]
+
+
+def test_drop_oldest_stale_ready_key_does_not_start_a_busy_chat() -> None:
+    async def scenario() -> Recorder:
+        recorder = Recorder()
+        recorder.hold(1, 2, 5, 6, 7)
+        scheduler = UpdateScheduler(
+            recorder,
+            max_concurrency=10,
+            max_queue=3,
+            overflow="drop_oldest",
+            type_limits={"message": 2},
+        )
+        await scheduler.submit(message(1, 1))  # обрабатываются 1 и 2
+        await scheduler.submit(message(2, 9))
+        await scheduler.submit(message(3, 2))
+        await scheduler.submit(message(4, 3))
+        await scheduler.submit(message(5, 4))
+        # Отбрасывается 3, ключ чата 2 остается в _ready; новый апдейт добавляет его снова
+        await scheduler.submit(message(6, 2))
+        # Отбрасывается 4, у чата 2 два ждущих апдейта
+        await scheduler.submit(message(7, 2))
+
+        await recorder.release(1)  # по устаревшему ключу начинается 6
+        await recorder.release(2)  # начинается 5
+        # Слот свободен, пока 6 обрабатывается: второй ключ чата 2 пропускается
+        await recorder.release(5)
+        assert recorder.running["chat:2"] == 1
+
+        await recorder.release(6)
+        await recorder.release(7)
+        await scheduler.drain(timeout=5)
+        return recorder
+
+    recorder = asyncio.run(scenario())
+
+    assert recorder.started == [1, 2, 6, 5, 7]
+    assert recorder.max_running["chat:2"] == 1